@@ -5,7 +5,7 @@ a = Analysis(
     ['pi_serveur.py'],
     pathex=[],
     binaries=[],
-    datas=[],
+    datas=[('pi_serveur_config.json', '.')],  # recopiée à côté de l'exe au 1er lancement
     hiddenimports=['flask', 'psutil', 'keyboard', 'pynvml'],
     hookspath=[],
     hooksconfig={},
@@ -0,0 +1,135 @@
+"""Alertes du PiPanel sur le flux de métriques (/metrics).
+
+- règles lues dans spotify_keys.json ("ALERTS"), trois types :
+    threshold : la valeur dépasse la limite
+    sustained : la valeur reste au-delà de la limite pendant for_s secondes
+    rate      : la variation par seconde sur window_s secondes dépasse la limite
+- chaque sample est évalué en O(1) amorti : fenêtres glissantes avec somme
+  courante et deques monotones (min / max), jamais de parcours de l'historique ;
+- une alerte ne se déclenche qu'à la transition ok -> alerte, puis se réarme
+  quand la condition redevient fausse (avec hystérésis "clear").
+"""
+import operator, time
+from collections import deque
+
+OPS = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le}
+TYPES = ("threshold", "sustained", "rate")
+
+DEFAULT_RULES = [
+    {"name": "GPU chaud", "metric": "temp_gpu", "type": "threshold", "op": ">", "value": 85, "clear": 80},
+    {"name": "CPU saturé", "metric": "cpu", "type": "sustained", "op": ">", "value": 95, "for_s": 30},
+]
+
+
+class RollingWindow:
+    """Samples (t, v) des window_s dernières secondes : moyenne, min et max en O(1) amorti."""
+
+    def __init__(self, window_s):
+        self.window_s = window_s
+        self.items = deque()
+        self.total = 0.0
+        self.mins = deque()  # valeurs croissantes : mins[0] = minimum de la fenêtre
+        self.maxs = deque()  # valeurs décroissantes : maxs[0] = maximum
+
+    def push(self, t, v):
+        self.items.append((t, v))
+        self.total += v
+        while self.mins and self.mins[-1][1] > v: self.mins.pop()
+        self.mins.append((t, v))
+        while self.maxs and self.maxs[-1][1] < v: self.maxs.pop()
+        self.maxs.append((t, v))
+        while t - self.items[0][0] > self.window_s:
+            t0, v0 = self.items.popleft()
+            self.total -= v0
+            if self.mins[0][0] <= t0: self.mins.popleft()
+            if self.maxs[0][0] <= t0: self.maxs.popleft()
+
+    def span(self):
+        return self.items[-1][0] - self.items[0][0] if self.items else 0.0
+
+    def mean(self): return self.total / len(self.items)
+    def min(self): return self.mins[0][1]
+    def max(self): return self.maxs[0][1]
+    def oldest(self): return self.items[0]
+
+    def clear(self):
+        self.items.clear(); self.mins.clear(); self.maxs.clear()
+        self.total = 0.0
+
+
+class Rule:
+    def __init__(self, spec):
+        self.name = str(spec.get("name") or spec["metric"])
+        self.metric = spec["metric"]
+        self.type = spec.get("type", "threshold")
+        if self.type not in TYPES: raise ValueError(f"type inconnu : {self.type}")
+        self.op_s = spec.get("op", ">")
+        self.op = OPS[self.op_s]
+        self.value = float(spec["value"])
+        self.clear = float(spec.get("clear", self.value))  # hystérésis : se réarme au-delà de clear
+        self.for_s = float(spec.get("for_s", 0))
+        self.window_s = float(spec.get("window_s", 10))
+        self.cooldown_s = float(spec.get("cooldown_s", 60))
+        if self.type == "sustained" and self.for_s <= 0: raise ValueError("for_s manquant")
+        self.win = RollingWindow(self.for_s if self.type == "sustained" else self.window_s)
+        self.active = False
+        self.last_fire = None
+
+    def measure(self, t, v):
+        """Valeur comparée à la limite, ou None tant que la fenêtre n'est pas pleine."""
+        if self.type == "threshold": return v
+        self.win.push(t, v)
+        if self.type == "sustained":
+            if self.win.span() < self.for_s * 0.9: return None  # tolérance sur la cadence de poll
+            # "reste au-dessus" = le minimum de la fenêtre est au-dessus (et inversement)
+            return self.win.min() if self.op_s[0] == ">" else self.win.max()
+        t0, v0 = self.win.oldest()
+        return (v - v0) / (t - t0) if t > t0 else None
+
+    def update(self, t, v):
+        """True si l'alerte se déclenche sur ce sample."""
+        m = self.measure(t, v)
+        if m is None: return False
+        if self.active:
+            if not self.op(m, self.clear): self.active = False
+            return False
+        if not self.op(m, self.value): return False
+        self.active = True
+        if self.last_fire is not None and t - self.last_fire < self.cooldown_s: return False
+        self.last_fire = t
+        return True
+
+    def message(self, v):
+        unit = "/s" if self.type == "rate" else ""
+        lim = f"{self.op_s} {self.value:g}{unit}"
+        if self.type == "sustained": lim += f" depuis {self.for_s:g}s"
+        return f"{self.name} : {v:g} ({lim})"
+
+
+def parse_rules(specs):
+    """Règles valides + liste des erreurs (une règle invalide est ignorée, pas fatale)."""
+    rules, errors = [], []
+    for spec in specs or []:
+        try: rules.append(Rule(spec))
+        except (KeyError, TypeError, ValueError) as e: errors.append(f"{spec!r}: {e!r}")
+    return rules, errors
+
+
+class AlertEngine:
+    def __init__(self, rules, clock=time.monotonic):
+        self.rules = rules
+        self.clock = clock
+
+    def update(self, sample, t=None):
+        """sample : objet avec get(nom) (MetricsRecord ou dict). Renvoie les messages
+        des alertes déclenchées par ce sample."""
+        t = self.clock() if t is None else t
+        fired = []
+        for r in self.rules:
+            v = sample.get(r.metric)
+            if not isinstance(v, (int, float)):
+                # trou dans le flux (helper absent, "n/a") : on repart de zéro
+                r.win.clear()
+                continue
+            if r.update(t, v): fired.append(r.message(v))
+        return fired
@@ -0,0 +1,127 @@
+"""Icônes des apps du launcher pour pi_serveur.py.
+
+- chaque icône est extraite une seule fois, réduite à la taille du panel puis
+  gardée en mémoire et sur disque (PNG), avec un ETag stable tant que le fichier
+  source (image ou exe) ne change pas ;
+- l'extraction passe par des backends interchangeables : FileIconBackend
+  (images ordinaires, fonctionne partout) puis ExeIconBackend (icône d'un .exe,
+  Windows + pywin32).
+"""
+import glob, hashlib, io, os, shutil, threading
+
+IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".bmp", ".gif", ".ico")
+
+
+class FileIconBackend:
+    """Icône = fichier image : APP_ICONS[nom], <dossier>/<nom>.png, ou la cible elle-même."""
+
+    def __init__(self, icon_dir, overrides=dict):
+        self.icon_dir = icon_dir
+        self.overrides = overrides  # callable : la config peut être rechargée
+
+    def sources(self, name, target):
+        return [p for p in (self.overrides().get(name), os.path.join(self.icon_dir, name + ".png"), target)
+                if p and p.lower().endswith(IMAGE_EXTS)]
+
+    def extract(self, name, target):
+        from PIL import Image
+        for path in self.sources(name, target):
+            if os.path.isfile(path): return Image.open(path)
+        return None
+
+
+class ExeIconBackend:
+    """Première icône d'un exécutable Windows (ExtractIconEx)."""
+
+    def sources(self, name, target):
+        exe = target if os.path.isfile(target) else shutil.which(target)
+        return [exe] if exe and exe.lower().endswith(".exe") else []
+
+    def extract(self, name, target):
+        exe = (self.sources(name, target) or [None])[0]
+        if exe is None: return None
+        import win32api, win32con, win32gui, win32ui
+        from PIL import Image
+        large, small = win32gui.ExtractIconEx(exe, 0)
+        if not large: return None
+        screen = win32gui.GetDC(0)
+        mem = bmp = None
+        try:
+            size = win32api.GetSystemMetrics(win32con.SM_CXICON)
+            hdc = win32ui.CreateDCFromHandle(screen)
+            bmp = win32ui.CreateBitmap()
+            bmp.CreateCompatibleBitmap(hdc, size, size)
+            mem = hdc.CreateCompatibleDC()
+            mem.SelectObject(bmp)
+            mem.DrawIcon((0, 0), large[0])
+            bits = bmp.GetBitmapBits(True)
+            return Image.frombuffer("RGBA", (size, size), bits, "raw", "BGRA", 0, 1)
+        finally:
+            # Handles GDI limités (10 000 par process) : tout rendre, même en cas d'erreur
+            if mem is not None: mem.DeleteDC()
+            if bmp is not None: win32gui.DeleteObject(bmp.GetHandle())
+            win32gui.ReleaseDC(0, screen)  # hdc ne fait qu'envelopper ce DC écran : pas de DeleteDC
+            for h in large + small: win32gui.DestroyIcon(h)
+
+
+class IconStore:
+    def __init__(self, backends, cache_dir):
+        self.backends = backends
+        self.cache_dir = cache_dir
+        self.lock = threading.Lock()
+        self.mem = {}  # (nom, cible, taille, source) -> (empreinte, (png, etag)) ; (None, None) si aucune icône
+
+    def stamp(self, name, target):
+        """(chemin, mtime_ns, taille) des fichiers d'où l'icône peut venir : une
+        image remplacée ou un exe mis à jour change la clé, donc l'icône et l'ETag."""
+        out = []
+        for b in self.backends:
+            try: paths = b.sources(name, target)
+            except Exception: continue
+            for p in paths:
+                try: st = os.stat(p)
+                except OSError: continue
+                out.append((p, st.st_mtime_ns, st.st_size))
+        return tuple(out)
+
+    def get(self, name, target, size, source=""):
+        """Renvoie (png, etag) ou (None, None). Extraction une seule fois par version
+        des fichiers sources ; source (ex : chemin d'icône imposé) fait partie de la clé."""
+        base = (name, target, size, source)
+        stamp = self.stamp(name, target)
+        with self.lock: hit = self.mem.get(base)
+        if hit is not None and hit[0] == stamp: return hit[1]
+        h = hashlib.sha1("\0".join(map(str, base)).encode("utf-8")).hexdigest()[:16]
+        hs = hashlib.sha1(repr(stamp).encode("utf-8")).hexdigest()[:8]
+        path = os.path.join(self.cache_dir, f"{h}-{hs}.png")
+        if os.path.isfile(path):
+            with open(path, "rb") as f: png = f.read()
+        else:
+            png = self.extract(name, target, size)
+            if png is not None:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                for old in glob.glob(os.path.join(glob.escape(self.cache_dir), f"{h}-*.png")):
+                    try: os.remove(old)  # versions précédentes de la même icône
+                    except OSError: pass
+                tmp = path + ".tmp"
+                with open(tmp, "wb") as f: f.write(png)
+                os.replace(tmp, path)
+        res = (png, '"%s"' % hashlib.sha1(png).hexdigest()[:16]) if png is not None else (None, None)
+        with self.lock: self.mem[base] = (stamp, res)  # remplace la version précédente
+        return res
+
+    def extract(self, name, target, size):
+        from PIL import Image
+        for b in self.backends:
+            try: im = b.extract(name, target)
+            except Exception: im = None
+            if im is None: continue
+            im = im.convert("RGBA")
+            im.thumbnail((size, size), Image.LANCZOS)
+            out = io.BytesIO()
+            im.save(out, "PNG", optimize=True)
+            return out.getvalue()
+        return None
+
+    def clear(self):
+        with self.lock: self.mem.clear()
@@ -0,0 +1,126 @@
+"""Surveillance GPU pour pi_serveur.py.
+
+- les GPU sont énumérés une seule fois au démarrage ;
+- un seul thread échantillonne charge, température, VRAM, fréquences et
+  puissance de toutes les cartes ; les routes ne lisent que le cache ;
+- NVML est derrière une petite interface (NvmlBackend) : FakeGpuBackend
+  permet de tester le sampler sur une machine sans GPU.
+"""
+import math, threading, time
+
+MB = 1048576
+
+
+class NvmlBackend:
+    """Accès NVML réel (pynvml). init() lève une exception sans GPU NVIDIA."""
+
+    def init(self):
+        import pynvml
+        self.nv = pynvml
+        pynvml.nvmlInit()
+        self.handles = [pynvml.nvmlDeviceGetHandleByIndex(i) for i in range(pynvml.nvmlDeviceGetCount())]
+
+    def count(self):
+        return len(self.handles)
+
+    def name(self, i):
+        n = self.nv.nvmlDeviceGetName(self.handles[i])
+        return n.decode() if isinstance(n, bytes) else n
+
+    def sample(self, i):
+        nv, h = self.nv, self.handles[i]
+
+        def read(fn):
+            try: return fn()
+            except nv.NVMLError: return None  # champ non supporté par cette carte
+
+        mem = read(lambda: nv.nvmlDeviceGetMemoryInfo(h))
+        power = read(lambda: nv.nvmlDeviceGetPowerUsage(h))  # mW
+        return {
+            "util": read(lambda: nv.nvmlDeviceGetUtilizationRates(h).gpu),
+            "temp": read(lambda: nv.nvmlDeviceGetTemperature(h, nv.NVML_TEMPERATURE_GPU)),
+            "vram_used_mb": round(mem.used / MB) if mem else None,
+            "vram_total_mb": round(mem.total / MB) if mem else None,
+            "clock_mhz": read(lambda: nv.nvmlDeviceGetClockInfo(h, nv.NVML_CLOCK_GRAPHICS)),
+            "mem_clock_mhz": read(lambda: nv.nvmlDeviceGetClockInfo(h, nv.NVML_CLOCK_MEM)),
+            "power_w": round(power / 1000, 1) if power is not None else None,
+        }
+
+
+class FakeGpuBackend:
+    """GPU simulés : valeurs déterministes qui varient avec le temps."""
+
+    def __init__(self, n=2, clock=time.monotonic):
+        self.n = n
+        self.clock = clock
+        self.calls = 0
+
+    def init(self):
+        pass
+
+    def count(self):
+        return self.n
+
+    def name(self, i):
+        return f"Fake GPU {i}"
+
+    def sample(self, i):
+        self.calls += 1
+        t = self.clock()
+        util = round(50 + 45 * math.sin(t / 5 + i))
+        return {
+            "util": util,
+            "temp": 40 + util // 2,
+            "vram_used_mb": 2048 + 512 * i + util * 10,
+            "vram_total_mb": 8192,
+            "clock_mhz": 300 + util * 15,
+            "mem_clock_mhz": 7000,
+            "power_w": round(20 + util * 2.5, 1),
+        }
+
+
+class GpuSampler:
+    def __init__(self, backend, interval_s=1.0):
+        self.backend = backend
+        self.interval_s = interval_s
+        self.lock = threading.Lock()
+        self.devices = []  # [{"index", "name"}], figé après start()
+        self.cache = []    # dernier sample par carte
+        self.ts = 0.0
+        self.ok = False
+
+    def start(self, thread=False):
+        try:
+            self.backend.init()
+            self.devices = [{"index": i, "name": self.backend.name(i)} for i in range(self.backend.count())]
+            self.ok = bool(self.devices)
+        except Exception:
+            self.ok = False
+        if self.ok and thread:
+            threading.Thread(target=self.loop, daemon=True).start()
+        return self
+
+    def sample(self):
+        """Lit toutes les cartes d'un coup puis remplace le cache."""
+        if not self.ok: return
+        rows = []
+        for d in self.devices:
+            try: rows.append({**d, **self.backend.sample(d["index"])})
+            except Exception: rows.append({**d, "error": True})
+        with self.lock:
+            self.cache = rows
+            self.ts = time.time()
+
+    def loop(self):
+        while True:
+            self.sample()
+            time.sleep(self.interval_s)
+
+    def snapshot(self):
+        with self.lock: return self.cache
+
+    def first(self, key, default=0):
+        """Valeur de la carte 0 (champs historiques "gpu" / "temp_gpu" de /metrics)."""
+        with self.lock:
+            v = self.cache[0].get(key) if self.cache else None
+        return default if v is None else v
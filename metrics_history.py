@@ -0,0 +1,141 @@
+"""Historique des métriques sur disque (SQLite) pour pi_serveur.py.
+
+- une ligne par sample dans "raw" : clé = seconde unix, une colonne entière
+  par mesure de metrics_wire.FIELDS (mêmes échelles que /metrics, NULL = n/a) ;
+- agrégats pré-calculés "m1" (minute) et "h1" (heure) : moyenne et max par
+  mesure, recalculés à chaque écriture pour les seuls seaux touchés ;
+- rétention par table (purge + incremental_vacuum, voir compact()) ;
+- range() lit la table la plus grossière compatible avec le pas demandé :
+  une nuit entière = quelques centaines de lignes agrégées, jamais un scan de raw.
+
+Un seul thread écrit (loop, par lots toutes les flush_s secondes) ; les
+lectures ouvrent leur propre connexion (WAL : pas de blocage de l'écrivain).
+"""
+import math, os, sqlite3, threading, time
+
+from metrics_wire import FIELDS, MISSING, to_wire
+
+NAMES = [f[0] for f in FIELDS if f[2] is not None]  # cfg_v n'est pas une mesure
+SCALE = {f[0]: f[2] for f in FIELDS}
+LEVELS = (("raw", 1), ("m1", 60), ("h1", 3600))  # table, résolution (s)
+ROLLUP_SRC = {"m1": "raw", "h1": "m1"}
+DEFAULT_RETENTION = {"raw": 2 * 86400, "m1": 30 * 86400, "h1": 365 * 86400}
+MAX_POINTS = 2000
+MAX_PENDING = 3600  # samples gardés en mémoire si l'écrivain ne tourne pas
+COMPACT_EVERY_S = 3600
+
+
+def agg_cols(src):
+    """Colonnes agrégées (n, moyennes, max) d'un GROUP BY sur src. Les moyennes
+    d'agrégats sont pondérées par leur nombre de samples, NULL exclus."""
+    w = "1" if src == "raw" else "n"
+    mx = "" if src == "raw" else "_max"
+    avg = [f"SUM({k} * {w}) * 1.0 / SUM(CASE WHEN {k} IS NULL THEN 0 ELSE {w} END)" for k in NAMES]
+    return f"SUM({w})", avg, [f"MAX({k}{mx})" for k in NAMES]
+
+
+class MetricsHistory:
+    def __init__(self, path, retention=dict, flush_s=10.0, clock=time.time):
+        self.path = path
+        self.retention = retention  # callable -> {table: secondes}, relu à chaque compactage
+        self.flush_s = flush_s
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.pending = []  # (ts, valeurs) pas encore écrits
+        self.db = None
+        self.last_compact = 0.0
+        self.ok = False
+
+    def start(self, thread=False):
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self.db = self.connect()
+            self.db.execute("PRAGMA auto_vacuum = INCREMENTAL")  # avant la 1re table seulement
+            self.db.execute("PRAGMA journal_mode = WAL")
+            self.db.execute("PRAGMA synchronous = NORMAL")
+            cols = ", ".join(f"{k} INTEGER" for k in NAMES)
+            maxs = ", ".join(f"{k}_max INTEGER" for k in NAMES)
+            with self.db:
+                self.db.execute(f"CREATE TABLE IF NOT EXISTS raw (ts INTEGER PRIMARY KEY, {cols})")
+                for t in ROLLUP_SRC:
+                    self.db.execute(f"CREATE TABLE IF NOT EXISTS {t} (ts INTEGER PRIMARY KEY, n INTEGER, {cols}, {maxs})")
+            self.ok = True
+        except (OSError, sqlite3.Error) as e:
+            print(f"[HISTORY] Désactivé ({e})")
+            self.ok = False
+        if self.ok and thread:
+            threading.Thread(target=self.loop, daemon=True).start()
+        return self
+
+    def connect(self):
+        return sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+
+    def append(self, values, ts=None):
+        """Appelé par le thread de mesure : ne touche pas au disque."""
+        ints = tuple(None if x == MISSING else x for x in (to_wire(k, values.get(k)) for k in NAMES))
+        ts = int(self.clock() if ts is None else ts)
+        with self.lock:
+            if len(self.pending) < MAX_PENDING: self.pending.append((ts, ints))
+
+    def flush(self):
+        with self.lock: rows, self.pending = self.pending, []
+        if not rows or not self.ok: return 0
+        lo, hi = min(r[0] for r in rows), max(r[0] for r in rows)
+        marks = ", ".join("?" * (len(NAMES) + 1))
+        with self.db:
+            self.db.executemany(f"INSERT OR REPLACE INTO raw VALUES ({marks})", [(ts, *v) for ts, v in rows])
+            for table, res in LEVELS[1:]:
+                self.rollup(table, res, lo // res * res, hi // res * res + res - 1)
+        return len(rows)
+
+    def rollup(self, table, res, lo, hi):
+        n, avg, mx = agg_cols(ROLLUP_SRC[table])
+        avg = [f"CAST(ROUND({a}) AS INTEGER)" for a in avg]
+        self.db.execute(f"INSERT OR REPLACE INTO {table} SELECT ts / {res} * {res}, {n}, {', '.join(avg + mx)} "
+                        f"FROM {ROLLUP_SRC[table]} WHERE ts BETWEEN ? AND ? GROUP BY ts / {res}", (lo, hi))
+
+    def compact(self, force=False):
+        """Purge ce qui dépasse la rétention de chaque table puis rend la place au disque."""
+        now = self.clock()
+        if not self.ok or (not force and now - self.last_compact < COMPACT_EVERY_S): return 0
+        self.last_compact = now
+        keep = {**DEFAULT_RETENTION, **self.retention()}
+        keep["raw"] = max(keep["raw"], 7200)  # h1 se recalcule depuis m1, m1 depuis raw
+        deleted = 0
+        with self.db:
+            for table, _ in LEVELS:
+                deleted += self.db.execute(f"DELETE FROM {table} WHERE ts < ?", (int(now - keep[table]),)).rowcount
+        self.db.execute("PRAGMA incremental_vacuum")
+        return deleted
+
+    def loop(self):
+        while True:
+            time.sleep(self.flush_s)
+            try:
+                self.flush()
+                self.compact()
+            except sqlite3.Error as e:
+                print(f"[HISTORY] {e}")
+
+    def range(self, frm, to, step):
+        """Séries agrégées par pas de step secondes (au moins (to-frm)/MAX_POINTS),
+        en colonnes : {"ts": [...], "avg": {mesure: [...]}, "max": {...}}."""
+        frm, to = int(frm), int(to)
+        step = max(1, int(step), math.ceil((to - frm) / MAX_POINTS))
+        table = next(t for t, res in reversed(LEVELS) if res <= step)
+        n, avg, mx = agg_cols(table)
+        db = self.connect()
+        try:
+            rows = db.execute(f"SELECT ts / {step} * {step} AS b, {n}, {', '.join(avg + mx)} FROM {table} "
+                              f"WHERE ts BETWEEN ? AND ? GROUP BY b ORDER BY b", (frm, to)).fetchall()
+        finally:
+            db.close()
+        k = len(NAMES)
+
+        def col(i, name):
+            sc = SCALE[name]
+            return [None if r[i] is None else round(r[i] / sc, 2) for r in rows]
+        return {"from": frm, "to": to, "step": step, "table": table,
+                "ts": [r[0] for r in rows], "n": [r[1] for r in rows],
+                "avg": {name: col(2 + i, name) for i, name in enumerate(NAMES)},
+                "max": {name: col(2 + k + i, name) for i, name in enumerate(NAMES)}}
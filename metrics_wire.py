@@ -0,0 +1,138 @@
+"""Encodage compact de /metrics, partagé par pi_serveur.py et pi_panel.py.
+
+Négocié par "Accept: application/x-pi-metrics". Chaque sample est un
+enregistrement d'entiers à disposition fixe (FIELDS) ; le client renvoie le
+dernier numéro de séquence reçu (?epoch=&since=) et le serveur ne transmet
+alors que les champs modifiés.
+
+    en-tête  "<2sBHI" : b"PM", type (0 = complet, 1 = delta), epoch, seq
+    complet  : tous les champs, dans l'ordre de FIELDS
+    delta    : masque uint16 des champs modifiés, puis leurs valeurs
+"""
+import random, struct, threading
+from collections import deque
+
+CONTENT_TYPE = "application/x-pi-metrics"
+MAGIC = b"PM"
+FULL, DELTA = 0, 1
+MISSING = -2**31  # valeur absente ("n/a")
+
+# (nom, format struct, échelle) : valeur transmise = round(v * échelle) ;
+# échelle None = version de config (8 caractères hexa)
+FIELDS = (
+    ("cpu", "i", 10),
+    ("gpu", "i", 1),
+    ("temp_cpu", "i", 10),
+    ("temp_gpu", "i", 1),
+    ("net_rx", "i", 100),
+    ("net_tx", "i", 100),
+    ("disk_r", "i", 100),
+    ("disk_w", "i", 100),
+    ("cfg_v", "I", None),
+)
+INDEX = {f[0]: i for i, f in enumerate(FIELDS)}
+SCALES = tuple(f[2] for f in FIELDS)
+HEADER = struct.Struct("<2sBHI")
+BODY = struct.Struct("<" + "".join(f[1] for f in FIELDS))
+MASK = struct.Struct("<H")
+ONE = [struct.Struct("<" + f[1]) for f in FIELDS]
+
+
+def to_wire(name, v):
+    scale = FIELDS[INDEX[name]][2]
+    if scale is None:
+        try: return int(str(v)[:8], 16)
+        except ValueError: return 0
+    try: return int(round(float(v) * scale))
+    except (TypeError, ValueError): return MISSING
+
+
+class MetricsRecord(tuple):
+    """Un sample décodé : un tuple (pas de dict par champ), lu comme un dict via get()."""
+    __slots__ = ()
+
+    def get(self, key, default=None):
+        i = INDEX.get(key)
+        if i is None: return default
+        v = self[i]
+        return default if v is None else v
+
+    def items(self):
+        return ((f[0], v) for f, v in zip(FIELDS, self) if v is not None)
+
+    @classmethod
+    def from_wire(cls, ints):
+        return cls([None if x == MISSING else x if sc == 1 else x / sc if sc else f"{x:08x}"
+                    for sc, x in zip(SCALES, ints)])
+
+    @classmethod
+    def from_dict(cls, d):
+        """Réponse JSON (ancien helper) ou snapshot : on ne garde que les champs de FIELDS."""
+        return cls.from_wire([to_wire(f[0], d.get(f[0])) for f in FIELDS])
+
+
+class MetricsEncoder:
+    """Côté serveur : publish() à chaque sample, encode() par requête (pas de calcul de mesure)."""
+
+    def __init__(self, keep=64):
+        self.lock = threading.Lock()
+        self.epoch = random.randrange(1 << 16)  # change à chaque démarrage du serveur
+        self.seq = 0
+        self.ring = deque(maxlen=keep)  # (seq, valeurs entières)
+        self.full_cache = None
+
+    def publish(self, values):
+        ints = tuple(to_wire(f[0], values.get(f[0])) for f in FIELDS)
+        with self.lock:
+            if self.ring and self.ring[-1][1] == ints: return  # rien de neuf : même seq
+            self.seq += 1
+            self.ring.append((self.seq, ints))
+            self.full_cache = None
+
+    def encode(self, epoch=None, since=None):
+        with self.lock:
+            if not self.ring: return HEADER.pack(MAGIC, FULL, self.epoch, 0) + BODY.pack(*[MISSING] * (len(FIELDS) - 1), 0)
+            seq, cur = self.ring[-1]
+            base = None
+            if epoch == self.epoch and since is not None:
+                for s, ints in self.ring:
+                    if s == since: base = ints; break
+            if base is None:
+                if self.full_cache is None:
+                    self.full_cache = HEADER.pack(MAGIC, FULL, self.epoch, seq) + BODY.pack(*cur)
+                return self.full_cache
+        mask, parts = 0, []
+        for i, (a, b) in enumerate(zip(base, cur)):
+            if a != b:
+                mask |= 1 << i
+                parts.append(ONE[i].pack(b))
+        return HEADER.pack(MAGIC, DELTA, self.epoch, seq) + MASK.pack(mask) + b"".join(parts)
+
+
+class MetricsDecoder:
+    """Côté panel : garde les derniers entiers reçus et applique les deltas."""
+
+    def __init__(self):
+        self.epoch = None
+        self.seq = None
+        self.ints = [MISSING] * len(FIELDS)
+
+    def params(self):
+        return {"epoch": self.epoch, "since": self.seq} if self.seq is not None else None
+
+    def decode(self, buf):
+        magic, kind, epoch, seq = HEADER.unpack_from(buf, 0)
+        if magic != MAGIC: raise ValueError("trame /metrics invalide")
+        off = HEADER.size
+        if kind == FULL:
+            self.ints[:] = BODY.unpack_from(buf, off)
+        else:
+            if epoch != self.epoch: raise ValueError("delta d'un autre démarrage du serveur")
+            (mask,) = MASK.unpack_from(buf, off)
+            off += MASK.size
+            for i, st in enumerate(ONE):
+                if mask >> i & 1:
+                    (self.ints[i],) = st.unpack_from(buf, off)
+                    off += st.size
+        self.epoch, self.seq = epoch, seq
+        return MetricsRecord.from_wire(self.ints)
@@ -0,0 +1,128 @@
+"""Helpers PC (pi_serveur.py) suivis par le panel.
+
+- hôtes listés dans la config ("PC_HELPERS") ou découverts par la balise UDP
+  que chaque helper diffuse sur BEACON_PORT ;
+- chaque hôte garde son décodeur /metrics, ses derniers samples et l'état de
+  ses alertes : passer d'un PC actif à l'autre ne perd rien ;
+- aggregate() résume les hôtes en ligne pour la vue "PCs" de STATS.
+"""
+import json, socket, threading, time
+from collections import deque
+
+from metrics_wire import MetricsDecoder
+
+BEACON_MAGIC = b"PI_HELPER_SERVER_HERE"
+BEACON_PORT = 5006
+DEFAULT_PORT = 5005
+BEACON_EXPIRE_S = 120  # hôte découvert muet depuis ce délai : retiré (sauf s'il est actif)
+
+
+class Host:
+    def __init__(self, name, base, source, alerts=None, keep=60):
+        self.name = name
+        self.base = base.rstrip("/")
+        self.source = source  # "config", "beacon" ou "cli"
+        self.dec = MetricsDecoder()
+        self.alerts = alerts
+        self.metrics = None
+        self.history = deque(maxlen=keep)
+        self.ok = False
+        self.last_ok = None
+        self.seen = time.time()  # dernière balise (ou création)
+
+
+class HostRegistry:
+    def __init__(self, make_alerts=None, keep=60):
+        self.lock = threading.Lock()
+        self.hosts = {}  # base -> Host, ordre d'ajout (config d'abord)
+        self.active_base = None
+        self.make_alerts = make_alerts
+        self.keep = keep
+
+    def add(self, base, name=None, source="config"):
+        """Ajoute l'hôte ou rafraîchit sa balise. Renvoie (hôte, nouveau ?)."""
+        base = base.rstrip("/")
+        with self.lock:
+            h = self.hosts.get(base)
+            if h is not None:
+                h.seen = time.time()
+                if name and h.source == "beacon": h.name = name  # un nom de config l'emporte
+                return h, False
+            h = Host(name or base.split("//")[-1], base, source,
+                     self.make_alerts() if self.make_alerts else None, self.keep)
+            self.hosts[base] = h
+            if self.active_base is None: self.active_base = base
+            return h, True
+
+    def expire(self, now=None):
+        now = time.time() if now is None else now
+        with self.lock:
+            gone = [b for b, h in self.hosts.items()
+                    if h.source == "beacon" and b != self.active_base and now - h.seen > BEACON_EXPIRE_S]
+            for b in gone: del self.hosts[b]
+        return gone
+
+    def list(self):
+        with self.lock: return list(self.hosts.values())
+
+    def active(self):
+        with self.lock: return self.hosts.get(self.active_base)
+
+    def set_active(self, base):
+        with self.lock:
+            if base not in self.hosts or base == self.active_base: return False
+            self.active_base = base
+            return True
+
+    def __len__(self):
+        with self.lock: return len(self.hosts)
+
+
+def parse_beacon(data, ip):
+    """b"PI_HELPER_SERVER_HERE" [+ " " + JSON {"port", "name"}] -> (base, nom) ou None."""
+    if not data.startswith(BEACON_MAGIC): return None
+    info = {}
+    rest = data[len(BEACON_MAGIC):].strip()
+    if rest:
+        try: info = json.loads(rest.decode("utf-8"))
+        except ValueError: pass
+    port = info.get("port") if isinstance(info.get("port"), int) else DEFAULT_PORT
+    name = info.get("name") if isinstance(info.get("name"), str) else None
+    return f"http://{ip}:{port}", name
+
+
+def listen_beacons(registry, port=BEACON_PORT, on_new=None):
+    """Thread : écoute les balises des helpers et enregistre les nouveaux hôtes."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(("", port))
+    while True:
+        try: data, (ip, _) = sock.recvfrom(512)
+        except OSError: continue
+        found = parse_beacon(data, ip)
+        if found is None: continue
+        host, new = registry.add(found[0], found[1], "beacon")
+        if new:
+            print(f"[HOSTS] Helper découvert : {host.name} ({host.base})")
+            if on_new: on_new(host)
+
+
+def aggregate(cards):
+    """Vue d'ensemble des hôtes en ligne : moyennes de charge, maxima de température,
+    sommes des débits. cards : [{"ok", "m"}] (m = MetricsRecord)."""
+    online = [c["m"] for c in cards if c["ok"] and c["m"] is not None]
+    if not online: return {"online": 0, "total": len(cards)}
+
+    def vals(key):
+        return [v for v in (m.get(key) for m in online) if isinstance(v, (int, float))]
+
+    def avg(key):
+        v = vals(key)
+        return round(sum(v) / len(v), 1) if v else None
+    return {
+        "online": len(online), "total": len(cards),
+        "cpu": avg("cpu"), "gpu": avg("gpu"),
+        "temp_cpu": max(vals("temp_cpu"), default=None), "temp_gpu": max(vals("temp_gpu"), default=None),
+        "net": round(sum(vals("net_rx")) + sum(vals("net_tx")), 2),
+        "disk": round(sum(vals("disk_r")) + sum(vals("disk_w")), 2),
+    }
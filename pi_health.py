@@ -0,0 +1,107 @@
+"""Santé du Raspberry Pi qui fait tourner le panel.
+
+HealthSampler.sample() lit en une passe la température SoC, les drapeaux de
+`vcgencmd get_throttled`, la charge (loadavg + CPU système), la mémoire et la
+consommation du process panel (RSS, temps CPU tous threads confondus).
+Appelé par un thread de fond (pi_panel.loop_pi_health) : les écrans ne lisent
+que le dernier sample publié dans state, jamais /sys ni /proc.
+
+Hors Pi (debug sous Windows/PC) les valeurs absentes valent None.
+"""
+import os, subprocess, time
+
+# get_throttled : bit -> libellé ; le même bit + 16 = "s'est produit depuis le boot"
+THROTTLE_BITS = ((0, "Sous-tension"), (1, "Fréq. bridée"), (2, "Throttling"), (3, "Limite temp."))
+THROTTLE_EVERY = 5  # vcgencmd = un fork : 1 sample sur 5 (drapeaux "passés" collants de toute façon)
+
+
+def decode_throttled(v):
+    """0x50005 -> (["Sous-tension", "Throttling"], ["Sous-tension", "Throttling"]) : (maintenant, depuis le boot)."""
+    if v is None: return [], []
+    return ([lbl for b, lbl in THROTTLE_BITS if v >> b & 1],
+            [lbl for b, lbl in THROTTLE_BITS if v >> (b + 16) & 1])
+
+
+class HealthSampler:
+    def __init__(self, root="/", vcgencmd=("vcgencmd", "get_throttled"), clock=time.monotonic,
+                 cpu_time=time.process_time):
+        self.root = root  # préfixe de /proc et /sys (tests)
+        self.vcgencmd = list(vcgencmd) if vcgencmd else None
+        self.clock = clock
+        self.cpu_time = cpu_time
+        self.page = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+        self.n = 0
+        self.throttled = None
+        self.prev_stat = None  # (busy, total) de /proc/stat
+        self.prev_proc = None  # (horloge, temps CPU du process)
+
+    def read(self, path):
+        try:
+            with open(os.path.join(self.root, path), "r") as f: return f.read()
+        except OSError: return None
+
+    def temp(self):
+        raw = self.read("sys/class/thermal/thermal_zone0/temp")
+        try: return round(int(raw) / 1000, 1)
+        except (TypeError, ValueError): return None
+
+    def get_throttled(self):
+        if self.vcgencmd is None: return None
+        try:
+            out = subprocess.run(self.vcgencmd, capture_output=True, text=True, timeout=2).stdout
+            return int(out.strip().split("=")[1], 16)  # "throttled=0x50005"
+        except OSError:
+            self.vcgencmd = None  # pas de vcgencmd (hors Pi) : on n'essaie plus
+        except (subprocess.SubprocessError, IndexError, ValueError): pass
+        return None
+
+    def load(self):
+        raw = self.read("proc/loadavg")
+        try: return tuple(float(x) for x in raw.split()[:3])
+        except (AttributeError, ValueError): return None
+
+    def cpu(self):
+        """CPU système (%) depuis le sample précédent, None au premier appel."""
+        raw = self.read("proc/stat")
+        try: f = [int(x) for x in raw.split("\n", 1)[0].split()[1:]]
+        except (AttributeError, ValueError): return None
+        total, busy = sum(f[:8]), sum(f[:8]) - f[3] - f[4]  # idle + iowait
+        prev, self.prev_stat = self.prev_stat, (busy, total)
+        if prev is None or total <= prev[1]: return None
+        return round((busy - prev[0]) / (total - prev[1]) * 100, 1)
+
+    def mem(self):
+        raw = self.read("proc/meminfo")
+        if raw is None: return None, None
+        info = {}
+        for line in raw.splitlines():
+            k, _, v = line.partition(":")
+            if k in ("MemTotal", "MemAvailable"): info[k] = int(v.split()[0]) / 1024
+        if len(info) < 2: return None, None
+        return round(info["MemTotal"] - info["MemAvailable"]), round(info["MemTotal"])
+
+    def rss(self):
+        raw = self.read("proc/self/statm")
+        try: return round(int(raw.split()[1]) * self.page / 1048576, 1)
+        except (AttributeError, IndexError, ValueError): return None
+
+    def proc_cpu(self):
+        """CPU du panel en % d'un cœur depuis le sample précédent."""
+        now, used = self.clock(), self.cpu_time()
+        prev, self.prev_proc = self.prev_proc, (now, used)
+        if prev is None or now <= prev[0]: return None
+        return round((used - prev[1]) / (now - prev[0]) * 100, 1)
+
+    def sample(self):
+        if self.n % THROTTLE_EVERY == 0: self.throttled = self.get_throttled()
+        self.n += 1
+        mem_used, mem_total = self.mem()
+        now, past = decode_throttled(self.throttled)
+        return {
+            "ts": time.time(),
+            "temp": self.temp(),
+            "throttled": self.throttled, "throttle_now": now, "throttle_past": past,
+            "load": self.load(), "cpu": self.cpu(), "cores": os.cpu_count() or 1,
+            "mem_used": mem_used, "mem_total": mem_total,
+            "rss_mb": self.rss(), "proc_cpu": self.proc_cpu(),
+        }
@@ -1,21 +1,56 @@
 #!/usr/bin/env python3
-import os, io, time, threading, requests, sys, json, argparse, subprocess
+import time
+T_START = time.perf_counter()
+import os, io, threading, sys, json, argparse, subprocess, gc, tracemalloc, hashlib, gzip, random, importlib
+from urllib.parse import urlparse, quote
+import logging, logging.handlers
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import pygame
 from pathlib import Path
-from PIL import Image
-from spotipy import Spotify
-from spotipy.oauth2 import SpotifyOAuth
+from metrics_wire import MetricsRecord, CONTENT_TYPE as METRICS_BINARY
+from alerts import AlertEngine, parse_rules, DEFAULT_RULES
+from pc_hosts import HostRegistry, listen_beacons, aggregate, BEACON_PORT
+from pi_health import HealthSampler, decode_throttled
+# requests, PIL et spotipy sont importés à la demande (démarrage rapide)
+
+# Lancé en script, ce module est __main__ : l'alias permet à ui_render / ui_modes
+# de faire "from pi_panel import ..." sans le réexécuter.
+sys.modules.setdefault("pi_panel", sys.modules[__name__])
 
 # ================== ARGUMENTS ==================
 parser = argparse.ArgumentParser()
 parser.add_argument("--debug", action="store_true", help="Active le mode debug (clavier, pas de GPIO ni framebuffer)")
+parser.add_argument("--bench", nargs="?", const="bench_baseline.json", metavar="OUT",
+                    help="Benchmark headless des render_*_ui (driver SDL dummy), résultats en JSON")
+parser.add_argument("--bench-frames", type=int, default=300, help="Nombre de frames par scénario de bench")
+parser.add_argument("--bench-compare", metavar="BASELINE", help="Compare le bench (ou le replay) à un JSON de référence")
+parser.add_argument("--record", metavar="TRACE", help="Enregistre réponses Spotify/PC et entrées dans une trace (.jsonl ou .jsonl.gz)")
+parser.add_argument("--replay", metavar="TRACE", help="Rejoue une trace avec des backends factices (pas de réseau ni GPIO)")
+parser.add_argument("--replay-fast", action="store_true", help="Rejoue aussi vite que possible (horloge virtuelle, sans affichage)")
+parser.add_argument("--replay-out", metavar="OUT", help="Ecrit le rapport de replay en JSON")
+parser.add_argument("--sim-gpio", type=int, metavar="N", help="GPIO simulé : N appuis synthétiques puis sortie")
+parser.add_argument("--latency-out", metavar="OUT", help="Ecrit les latences entrée -> ack serveur en JSON")
+parser.add_argument("--helper", metavar="URL", help="Remplace PC_HELPER_BASE (ex: serveur loopback)")
+parser.add_argument("--state-dir", metavar="DIR", default=os.environ.get("PIPANEL_STATE_DIR"),
+                    help="Dossier des fichiers d'état (snapshot, frame de boot, perf.log...) ; défaut : à côté du script")
 args = parser.parse_args()
-DEBUG = args.debug
+BENCH = args.bench
+REPLAY = args.replay
+SIM_GPIO = args.sim_gpio
+DEBUG = args.debug or bool(BENCH) or bool(REPLAY) or bool(SIM_GPIO)
+if BENCH or (REPLAY and args.replay_fast): os.environ["SDL_VIDEODRIVER"] = "dummy"
 
 # ================== CONFIGURATION ==================
 CONFIG_PATH = Path(__file__).resolve().parent / "spotify_keys.json"
+STATE_DIR = Path(args.state_dir).resolve() if args.state_dir else Path(__file__).resolve().parent
 def load_config(path):
     if not path.exists():
+        if BENCH or REPLAY or SIM_GPIO:
+            # Outils hors-ligne : pas de clés Spotify nécessaires
+            return {"SPOTIFY_CLIENT_ID": "bench", "SPOTIFY_CLIENT_SECRET": "bench",
+                    "SPOTIFY_REDIRECT_URI": "http://127.0.0.1:8888/callback",
+                    "SPOTIFY_SCOPE": "", "PC_HELPER_BASE": "http://127.0.0.1:5005", "_fallback": True}
         sys.exit(f"[ERROR] Fichier de configuration introuvable : {path}")
     with open(path, "r", encoding="utf-8") as f:
         cfg = json.load(f)
@@ -29,11 +64,26 @@ def load_config(path):
     return cfg
 
 cfg = load_config(CONFIG_PATH)
-PC_HELPER_BASE = cfg["PC_HELPER_BASE"]
+PC_HELPER_BASE = args.helper or cfg["PC_HELPER_BASE"]
+# Plusieurs PC : PC_HELPERS = [{"name": "Bureau", "url": "http://..."}, ...] (ou simples URL),
+# sinon PC_HELPER_BASE seul ; d'autres helpers sont découverts par leur balise UDP
+# (PC_DISCOVERY, port PC_BEACON_PORT). Le premier de la liste est le PC actif au démarrage.
+PC_HELPERS = [PC_HELPER_BASE] if args.helper else (cfg.get("PC_HELPERS") or [PC_HELPER_BASE])
+PC_DISCOVERY = not args.helper and cfg.get("PC_DISCOVERY", True)
+PC_BEACON_PORT = cfg.get("PC_BEACON_PORT", BEACON_PORT)
 SPOTIFY_CLIENT_ID = cfg["SPOTIFY_CLIENT_ID"]
 SPOTIFY_CLIENT_SECRET = cfg["SPOTIFY_CLIENT_SECRET"]
 SPOTIFY_REDIRECT_URI = cfg["SPOTIFY_REDIRECT_URI"]
 SPOTIFY_SCOPE = cfg["SPOTIFY_SCOPE"]
+SPOTIFY_API_BASE = cfg.get("SPOTIFY_API_BASE")  # ex: faux serveur local (test_file/Fake_spotify.py)
+
+# Alertes métriques : règles "ALERTS" du fichier de config (voir alerts.py)
+ALERT_SPECS = cfg.get("ALERTS", DEFAULT_RULES)
+for e in parse_rules(ALERT_SPECS)[1]: print(f"[ALERT] Règle ignorée : {e}")
+
+def make_alert_engine():
+    return AlertEngine(parse_rules(ALERT_SPECS)[0])  # un état d'alerte par PC
+ALERT_BANNER_S = 20
 
 # ================== HARDWARE PINS ==================
 BTN_PINS = {17:"B1_PREV", 27:"B2_PLAY", 22:"B3_NEXT", 5:"B4_MODE"}
@@ -42,6 +92,7 @@ ENC_A, ENC_B, ENC_SW = 6, 13, 19
 # UI CONSTANTS
 W, H = 480, 800
 FPS = 10
+FPS_ANIM = 20  # cadence quand un texte défile (marquee) à l'écran
 ICONS_PATH = str(Path(__file__).resolve().parent / "icons")
 ROTATE_SCREEN = True
 
@@ -50,23 +101,55 @@ HTTP_TIMEOUT_S = 0.5
 ART_TIMEOUT_S  = 1.5
 SPOTIFY_POLL_S = 1.0
 METRICS_POLL_S = 2.0 
+SLEEP_METRICS_POLL_S = 10.0  # en veille : Spotify et mixer suspendus, métriques espacées
+PI_HEALTH_POLL_S = 2.0  # santé du Pi lui-même (pi_health), SLEEP_METRICS_POLL_S en veille
+
+# ================== CACHE DE DEMARRAGE ==================
+# Driver SDL, police et dernière frame retenus d'un boot à l'autre
+BOOT_CACHE_PATH = STATE_DIR / ".boot_cache.json"
+BOOT_FRAME_PATH = STATE_DIR / ".last_frame.jpg"  # ~50 Ko (un BMP 800x480 fait 1,1 Mo)
+BOOT_FRAME_EVERY_S = 300  # sur changement de piste/mode ; sinon à la mise en veille et à l'arrêt
+
+def load_boot_cache():
+    try:
+        with open(BOOT_CACHE_PATH, "r", encoding="utf-8") as f: return json.load(f)
+    except: return {}
+
+def save_boot_cache(**kw):
+    data = load_boot_cache()
+    if all(data.get(k) == v for k, v in kw.items()): return
+    data.update(kw)
+    try:
+        tmp = BOOT_CACHE_PATH.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f: json.dump(data, f)
+        os.replace(tmp, BOOT_CACHE_PATH)
+    except: pass
+
+boot_cache = load_boot_cache()
 
 # ================== PYGAME INIT ==================
 if not DEBUG:
     os.environ["SDL_FBDEV"] = "/dev/fb0"
     os.environ["SDL_MOUSEDRV"] = "TSLIB"
     os.environ["SDL_MOUSEDEV"] = "/dev/input/touchscreen"
-    for driver in ["fbcon", "directfb", "kmsdrm", "x11"]:
+    drivers = ["fbcon", "directfb", "kmsdrm", "x11"]
+    if boot_cache.get("sdl_driver") in drivers:
+        drivers.remove(boot_cache["sdl_driver"])
+        drivers.insert(0, boot_cache["sdl_driver"])
+    for driver in drivers:
         try:
             os.environ["SDL_VIDEODRIVER"] = driver
             import pygame as _pg_test
             _pg_test.display.init()
             print(f"Driver SDL utilisé : {driver}")
+            save_boot_cache(sdl_driver=driver)
             break
         except Exception:
             print(f"Driver SDL non disponible : {driver}")
     else:
         sys.exit("Aucun driver vidéo compatible trouvé. Essaie avec 'startx'.")
+elif BENCH:
+    print("[BENCH] Driver SDL dummy, aucun thread réseau ni GPIO")
 else:
     print("[DEBUG] Mode debug activé — pas de framebuffer, pas de GPIO")
 
@@ -80,36 +163,84 @@ else:
     pygame.mouse.set_visible(False)
     pygame.display.set_caption("PiPanel")
 
-# Fonts
+def present(surf):
+    if ROTATE_SCREEN and not DEBUG:
+        rot = pygame.transform.rotate(surf, -90)
+        screen.blit(rot, rot.get_rect(center=screen.get_rect().center))
+    else: screen.blit(surf, (0,0))
+    pygame.display.flip()
+
+# Première frame immédiate : la dernière image affichée au boot précédent
+boot_times = {}
+if not BENCH:
+    try:
+        present(pygame.image.load(str(BOOT_FRAME_PATH)))
+        boot_times["cached_frame_ms"] = (time.perf_counter() - T_START) * 1000
+        print(f"[INFO] Frame en cache affichée en {boot_times['cached_frame_ms']:.0f} ms")
+    except: pass
+
+# Fonts (chemin résolu une fois : SysFont lance fc-list, très lent sur le Pi)
+def make_font(path, size, bold=False):
+    f = pygame.font.Font(path or None, size)
+    if bold: f.set_bold(True)
+    return f
+
 try:
-    FONT_S = pygame.font.SysFont("Inter", 20)
-    FONT_M = pygame.font.SysFont("Inter", 26)
-    FONT_L = pygame.font.SysFont("Inter", 36, bold=True)
-    FONT_XL = pygame.font.SysFont("Inter", 48, bold=True)
+    if "font_path" not in boot_cache:
+        save_boot_cache(font_path=pygame.font.match_font("Inter") or "",
+                        font_bold_path=pygame.font.match_font("Inter", bold=True) or "")
+        boot_cache = load_boot_cache()
+    font_path, font_bold = boot_cache.get("font_path"), boot_cache.get("font_bold_path")
+    FONT_S = make_font(font_path, 20)
+    FONT_M = make_font(font_path, 26)
+    # Comme SysFont : fichier gras si trouvé, sinon gras simulé
+    FONT_L = make_font(font_bold or font_path, 36, bold=not font_bold)
+    FONT_XL = make_font(font_bold or font_path, 48, bold=not font_bold)
 except:
     FONT_S = pygame.font.Font(None, 24)
     FONT_M = pygame.font.Font(None, 30)
     FONT_L = pygame.font.Font(None, 40)
     FONT_XL = pygame.font.Font(None, 50)
 
-frame = pygame.Surface((W, H))
-clock = pygame.time.Clock()
-
 # ================== ASSETS ==================
+# Toute surface créée est convertie au format de l'écran : un blit sans
+# conversion par pixel. Les écrans sont dessinés en 480x800 fixes (W, H).
+ICON_NAMES = ["prev", "next", "play", "pause", "mode"]
+
+def to_display(surf, alpha=False):
+    try: return surf.convert_alpha() if alpha else surf.convert()
+    except pygame.error: return surf  # pas encore d'écran
+
 def load_icon(name):
     path = os.path.join(ICONS_PATH, name)
-    try: return pygame.image.load(path).convert_alpha()
+    try: im = pygame.image.load(path)
     except:
-        s = pygame.Surface((48,48), pygame.SRCALPHA)
-        pygame.draw.circle(s, (100,100,100), (24,24), 20)
-        return s
+        im = pygame.Surface((48,48), pygame.SRCALPHA)
+        pygame.draw.circle(im, (100,100,100), (24,24), 20)
+    return im
+
+def build_icon_atlas(names):
+    """Charge les icônes dans une seule surface et renvoie {nom: sous-surface}."""
+    imgs = [(n, load_icon(n + ".png")) for n in names]
+    atlas = pygame.Surface((sum(im.get_width() for _, im in imgs) + 2*len(imgs),
+                            max(im.get_height() for _, im in imgs)), pygame.SRCALPHA)
+    rects, x = {}, 0
+    for n, im in imgs:
+        atlas.blit(im, (x, 0))
+        rects[n] = pygame.Rect(x, 0, *im.get_size())
+        x += im.get_width() + 2
+    atlas = to_display(atlas, alpha=True)
+    return {n: atlas.subsurface(r) for n, r in rects.items()}
+
+frame = to_display(pygame.Surface((W, H)))
+clock = pygame.time.Clock()
 
-icon_prev = load_icon("prev.png")
-icon_next = load_icon("next.png")
-icon_play = load_icon("play.png")
-icon_pause = load_icon("pause.png")
-icon_mode = load_icon("mode.png")
-icon_chart = load_icon("mode.png") 
+ICONS = build_icon_atlas(ICON_NAMES)
+icon_prev = ICONS["prev"]
+icon_next = ICONS["next"]
+icon_play = ICONS["play"]
+icon_pause = ICONS["pause"]
+icon_mode = ICONS["mode"]
 
 # ================== ETAT GLOBAL ==================
 state_lock = threading.Lock()
@@ -126,15 +257,34 @@ state = {
     "art_surf": None,
     "bg_surf": None,
     "track_id": None,
+    "art_key": None,
+    "art_avg": None,
     "text_col": (255,255,255),
     
     # Metrics
     "metrics": {},
-    "stats_view": "GAUGES", 
+    "stats_view": "GAUGES",  # GAUGES, GRAPHS, HISTORY, HOSTS, PI
+    "stats_range_idx": 1,    # HISTORY_RANGES
+    "stats_range": None,     # dernière réponse /metrics/range
     "stats_history": [],    
+    "alert_banner": None,  # (message, expiration alert_clock()), dessinée par-dessus tous les modes
+    "hosts": [],           # cartes des PC (publish_host_cards) : {"name", "base", "ok", "active", "m"}
+    "hosts_agg": {},       # pc_hosts.aggregate
+    "pi_health": {},       # dernier HealthSampler.sample() (loop_pi_health)
+    "pi_history": [],
+
+    # Processus (/processes/top)
+    "proc_top": [],
+    "proc_total": 0,
+    "proc_sort": "cpu",
     
     # Launcher (NOUVEAU)
-    "launcher_apps": ["Chargement..."],
+    "launcher_apps": ["Chargement..."],  # apps puis macros (préfixe MACRO_PREFIX)
+    "launcher_app_names": [],
+    "launcher_macros": [],
+    "apps_cfg_v": None,      # version de la config PC de la liste affichée
+    "apps_fetching": False,
+    "launcher_running": {},  # /launch/status : app -> {"running", "state", "up_ms"}
     "launcher_idx": 0,
     "launcher_status": "",
 
@@ -147,9 +297,11 @@ state = {
     "menu_msg": "",
     "sleep_enabled": True,
     "is_sleeping": False,
+    "perf_overlay": False,
     "menu_items": [
         {"lbl": "Retour Spotify", "act": "BACK"},
         {"lbl": "Veille Auto: ON", "act": "TOGGLE_SLEEP"},
+        {"lbl": "Overlay Perf: OFF", "act": "TOGGLE_PERF"},
         {"lbl": "Afficher IP",    "act": "SHOW_IP"},
         {"lbl": "Scan Wi-Fi",     "act": "WIFI"},
         {"lbl": "Update Git", "act": "UPDATE"},
@@ -160,186 +312,1076 @@ state = {
 
 MAX_HISTORY = 60 
 
+# ================== PERF / TELEMETRIE ==================
+PERF_LOG_PATH = STATE_DIR / "perf.log"
+PERF_LOG_EVERY_S = 10
+TEXT_CACHE_MAX = 256
+MARQUEE_CACHE_MAX = 32
+MARQUEE_SPEED = 40     # px/s
+MARQUEE_GAP = 80       # px entre deux passages du texte
+MARQUEE_PAUSE_S = 1.5  # pause en début de cycle
+
+perf_lock = threading.Lock()
+perf = {
+    "frame_ms": deque(maxlen=120),  # temps de travail par frame (rendu + blit + flip)
+    "frame_ts": deque(maxlen=120),  # horodatage des flips -> FPS réel
+    "render_ms": {},                # render_*_ui -> dernière durée (ms)
+    "pollers": {},                  # nom -> {"last_ok", "lat_ms", "errors"}
+}
+text_cache = OrderedDict()
+text_cache_stats = {"hit": 0, "miss": 0}
+marquee_cache = OrderedDict()  # (police, texte, couleur) -> [bande, largeur texte, t0]
+marquee_active = False         # un texte a défilé pendant la frame courante
+
+perf_log = logging.getLogger("pipanel.perf")
+perf_log.propagate = False
+
+def perf_poll(name, t0, ok):
+    """Enregistre la latence (depuis t0 = perf_counter) et le résultat d'un poller."""
+    lat = (time.perf_counter() - t0) * 1000
+    with perf_lock:
+        p = perf["pollers"].setdefault(name, {"last_ok": 0, "lat_ms": 0, "errors": 0})
+        p["lat_ms"] = lat
+        if ok: p["last_ok"] = time.time()
+        else: p["errors"] += 1
+
+def perf_frame(fn_name, render_ms, frame_ms):
+    with perf_lock:
+        perf["render_ms"][fn_name] = render_ms
+        perf["frame_ms"].append(frame_ms)
+        perf["frame_ts"].append(time.perf_counter())
+
+def get_rss_mb():
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1048576
+    except:
+        try:
+            import resource
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        except: return 0
+
+def perf_snapshot():
+    now = time.time()
+    with state_lock: pi_rss = state["pi_health"].get("rss_mb")  # lu par loop_pi_health
+    with perf_lock:
+        ts = list(perf["frame_ts"])
+        fms = sorted(perf["frame_ms"])
+        render = dict(perf["render_ms"])
+        pollers = {k: dict(v) for k, v in perf["pollers"].items()}
+    fps = (len(ts)-1) / (ts[-1]-ts[0]) if len(ts) > 1 and ts[-1] > ts[0] else 0
+    p95 = fms[min(len(fms)-1, int(len(fms)*0.95))] if fms else 0
+    hits, miss = text_cache_stats["hit"], text_cache_stats["miss"]
+    return {
+        "fps": round(fps, 1),
+        "p95_ms": round(p95, 1),
+        "render_ms": {k: round(v, 2) for k, v in render.items()},
+        "pollers": {k: {"age_s": round(now - v["last_ok"], 1) if v["last_ok"] else None,
+                        "lat_ms": round(v["lat_ms"]), "errors": v["errors"]} for k, v in pollers.items()},
+        "text_cache_hit": round(hits / (hits+miss) * 100, 1) if hits+miss else 0,
+        "rss_mb": pi_rss if pi_rss is not None else round(get_rss_mb(), 1),
+        "boot_ms": {k: round(v) for k, v in boot_times.items()},
+        "spotify_api": sp.snapshot() if sp is not None else None,
+    }
+
+def loop_perf_log():
+    h = logging.handlers.RotatingFileHandler(PERF_LOG_PATH, maxBytes=512*1024, backupCount=3, encoding="utf-8")
+    h.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+    perf_log.addHandler(h)
+    perf_log.setLevel(logging.INFO)
+    while True:
+        time.sleep(PERF_LOG_EVERY_S)
+        if not awake_evt.is_set():
+            awake_evt.wait()  # veille : aucune ligne sur la carte SD jusqu'au réveil
+            continue
+        with state_lock: mode = state["mode"]
+        snap = perf_snapshot()
+        snap["mode"] = mode
+        with state_lock: pi = state["pi_health"]
+        snap["pi"] = {k: pi.get(k) for k in ("temp", "throttled", "load", "cpu", "proc_cpu")}
+        perf_log.info(json.dumps(snap, separators=(",", ":")))
+        if args.latency_out: dump_latency(args.latency_out)
+
+def loop_pi_health():
+    """Echantillonne le Pi (pi_health) : les écrans lisent state["pi_health"],
+    jamais /sys ni /proc pendant une frame."""
+    sampler = HealthSampler()
+    while True:
+        t0 = time.perf_counter()
+        h = sampler.sample()
+        perf_poll("Pi", t0, h["temp"] is not None or h["load"] is not None)
+        snap = perf_snapshot()
+        h["fps"], h["p95_ms"] = snap["fps"], snap["p95_ms"]  # le panel est-il lui-même le goulot ?
+        with state_lock:
+            state["pi_health"] = h
+            state["pi_history"].append(h)
+            if len(state["pi_history"]) > MAX_HISTORY:
+                state["pi_history"].pop(0)
+        if awake_evt.is_set(): time.sleep(PI_HEALTH_POLL_S)
+        else: awake_evt.wait(SLEEP_METRICS_POLL_S)  # réveil : sample tout de suite
+
 # ================== FONCTIONS SYSTEME & API ==================
-sp = Spotify(auth_manager=SpotifyOAuth(
-    client_id=SPOTIFY_CLIENT_ID, client_secret=SPOTIFY_CLIENT_SECRET,
-    redirect_uri=SPOTIFY_REDIRECT_URI, scope=SPOTIFY_SCOPE,
-    open_browser=False, cache_path=str(Path(__file__).parent/".cache")
-))
+sp = None  # client Spotify, construit en parallèle par init_spotify()
+_http = None
+_http_lock = threading.Lock()
+HTTP_POOL_HOSTS = 16  # helpers PC gardés en keep-alive
+HTTP_POOL_SIZE = 4    # connexions par helper (poll + commandes + icônes en parallèle)
+
+# --- Helpers PC ---
+# hosts.active() reçoit les commandes (media, mixer, launcher) et alimente les vues
+# détaillées ; tous les hôtes sont pollés pour les cartes STATS > PCs.
+hosts = HostRegistry(make_alert_engine, keep=MAX_HISTORY)
+for h in PC_HELPERS:
+    if isinstance(h, str): hosts.add(h, source="cli" if args.helper else "config")
+    else: hosts.add(h["url"], h.get("name"), "config")
+
+def pc_base():
+    h = hosts.active()
+    return h.base if h else PC_HELPER_BASE
+
+def init_spotify():
+    global sp
+    t0 = time.perf_counter()
+    import requests
+    from spotipy import Spotify
+    from spotipy.oauth2 import SpotifyOAuth
+    from spotify_client import SpotifyClient
+    # Session sans Retry urllib3 : les 429 remontent (avec Retry-After) au lieu de
+    # bloquer le thread dans les retries internes de spotipy
+    raw = Spotify(auth_manager=SpotifyOAuth(
+        client_id=SPOTIFY_CLIENT_ID, client_secret=SPOTIFY_CLIENT_SECRET,
+        redirect_uri=SPOTIFY_REDIRECT_URI, scope=SPOTIFY_SCOPE,
+        open_browser=False, cache_path=str(Path(__file__).parent/".cache")
+    ), requests_session=requests.Session(), requests_timeout=3)
+    if SPOTIFY_API_BASE: raw.prefix = SPOTIFY_API_BASE
+    sp = SpotifyClient(raw).start()
+    boot_times["spotify_init_ms"] = (time.perf_counter() - t0) * 1000
+
+def http():
+    """Session requests partagée (keep-alive), importée au premier appel."""
+    global _http
+    if _http is None:
+        with _http_lock:
+            if _http is None:
+                import requests
+                _http = requests.Session()
+                # un pool keep-alive par helper, partagé par tous les threads de poll
+                adapter = requests.adapters.HTTPAdapter(pool_connections=HTTP_POOL_HOSTS, pool_maxsize=HTTP_POOL_SIZE)
+                _http.mount("http://", adapter)
+    return _http
+
+def pc_post(path, payload, timeout):
+    """POST vers le helper PC ; si une entrée est en cours, mesure appui -> ack."""
+    t_edge = getattr(input_ctx, "t_edge", None)
+    t_send = time.perf_counter()
+    r = http().post(f"{pc_base()}{path}", json=payload, timeout=timeout)
+    if t_edge is not None:
+        record_latency(path, t_edge, t_send, time.perf_counter(), r.headers.get("Server-Timing"))
+    return r
 
 def pc_cmd(cmd):
-    try: requests.post(f"{PC_HELPER_BASE}/media", json={"cmd": cmd}, timeout=HTTP_TIMEOUT_S)
+    try: pc_post("/media", {"cmd": cmd}, HTTP_TIMEOUT_S)
     except: pass
 
 # --- NOUVELLES FONCTIONS LAUNCHER ---
+MACRO_PREFIX = "» "
+MACRO_TIMEOUT_S = 30.0
+
 def launch_app_cmd(app_name):
+    if app_name.startswith(MACRO_PREFIX): return run_macro_cmd(app_name[len(MACRO_PREFIX):])
     try: 
-        r = requests.post(f"{PC_HELPER_BASE}/launch", json={"name": app_name}, timeout=1.0)
-        return r.json().get("msg", "Erreur")
+        r = pc_post("/launch", {"name": app_name}, 1.0)
+        msg = r.json().get("msg", "Erreur")
+        refresh_launch_status()
+        return msg
+    except: return "Erreur Connexion"
+
+def run_macro_cmd(name):
+    """Une macro = un seul appel : le serveur enchaîne launch/mixer/media/wait localement."""
+    with state_lock: state["launcher_status"] = f"Macro {name}..."
+    try:
+        r = pc_post("/macro", {"name": name}, MACRO_TIMEOUT_S)
+        msg = r.json().get("msg", "Erreur")
+        refresh_launch_status()
+        return msg
     except: return "Erreur Connexion"
 
+# --- Icônes du launcher ---
+# Surfaces décodées et converties gardées ici : défiler dans le launcher ne coûte
+# ni réseau ni décodage. Après un changement de config, revalidation par ETag (304).
+LAUNCHER_ICON_PX = 48
+APP_ICON_RETRY_S = 30
+app_icon_lock = threading.Lock()
+app_icon_cache = {}      # (helper, nom) -> {"surf", "etag", "next"} (next : prochaine vérification)
+app_icon_pending = set()
+
+def app_icon(name):
+    """Icône déjà décodée (ou None). Appelé au rendu : lance au besoin un fetch en tâche de fond."""
+    key = (pc_base(), name)
+    with app_icon_lock:
+        e = app_icon_cache.get(key)
+        if (e and time.time() < e["next"]) or key in app_icon_pending:
+            return e["surf"] if e else None
+        app_icon_pending.add(key)
+    threading.Thread(target=fetch_app_icon, args=(key, e), daemon=True).start()
+    return e["surf"] if e else None
+
+def fetch_app_icon(key, old):
+    base, name = key
+    headers = {"If-None-Match": old["etag"]} if old and old["etag"] else {}
+    new = {"surf": old["surf"] if old else None, "etag": old["etag"] if old else None, "next": float("inf")}
+    try:
+        r = http().get(f"{base}/apps/{quote(name, safe='')}/icon",
+                       params={"size": LAUNCHER_ICON_PX}, headers=headers, timeout=2.0)
+        if r.status_code == 200:
+            new["surf"] = to_display(pygame.image.load(io.BytesIO(r.content), "icon.png"), alpha=True)
+            new["etag"] = r.headers.get("ETag")
+        elif r.status_code != 304:
+            new["surf"] = new["etag"] = None  # pas d'icône pour cette app
+    except:
+        new["next"] = time.time() + APP_ICON_RETRY_S
+    with app_icon_lock:
+        app_icon_cache[key] = new
+        app_icon_pending.discard(key)
+
+def revalidate_app_icons():
+    with app_icon_lock:
+        for e in app_icon_cache.values(): e["next"] = 0
+
+def refresh_launch_status():
+    try: apply_launch_status(pc_get("/launch/status", 1.0))
+    except: pass
+
 def refresh_apps_list():
     try:
-        r = requests.get(f"{PC_HELPER_BASE}/apps_list", timeout=2.0)
-        apps = r.json()
-        with state_lock:
-            state["launcher_apps"] = apps if apps else ["Aucune App Config"]
+        apply_apps(pc_get("/apps_list", 2.0))
+        try: apply_macros(pc_get("/macros_list", 2.0))
+        except: pass  # helper sans macros
+        refresh_launch_status()
     except: 
         with state_lock: state["launcher_apps"] = ["Erreur Connexion PC"]
+    finally:
+        with state_lock: state["apps_fetching"] = False
+
+def apps_list_stale():
+    # appelé sous state_lock ; sans "cfg_v" (ancien helper) on recharge à chaque fois
+    v = state["metrics"].get("cfg_v")
+    return v is None or v != state["apps_cfg_v"]
+
+def refresh_launcher():
+    """Entrée en LAUNCHER : la liste n'est re-téléchargée que si la config PC a changé."""
+    with state_lock:
+        fetch = apps_list_stale() and not state["apps_fetching"]
+        if fetch: state["apps_fetching"] = True
+    if fetch: refresh_apps_list()
+    else: refresh_launch_status()
 # ------------------------------------
 
 def get_ip():
-    try: return subprocess.check_output(["hostname", "-I"], text=True).split()[0]
+    try: return subprocess.check_output(["hostname", "-I"], text=True, timeout=5).split()[0]
     except: return "Pas d'IP"
 
+# --- Gestion d'énergie ---
+# Chaque sous-système s'abonne avec on_power_change(cb) (cb(on) appelé hors lock
+# à chaque transition) ; awake_evt permet d'attendre le réveil sans boucler.
+awake_evt = threading.Event()
+awake_evt.set()
+power_listeners = []
+WAKE_EVENT = pygame.USEREVENT + 1
+
+def on_power_change(cb):
+    power_listeners.append(cb)
+
 def set_screen_power(on):
-    state["is_sleeping"] = not on
+    with state_lock:
+        changed = state["is_sleeping"] == on
+        state["is_sleeping"] = not on
+    if on: awake_evt.set()
+    else: awake_evt.clear()
     try:
         cmd = "1" if on else "0"
         subprocess.run(["vcgencmd", "display_power", cmd], stdout=subprocess.DEVNULL)
     except:
         pass 
+    if changed:
+        for cb in list(power_listeners):
+            try: cb(on)
+            except Exception as e: print(f"[POWER] {cb.__name__}: {e}")
+
+def wake_from_input():
+    global last_interaction
+    last_interaction = time.time()
+    if not awake_evt.is_set(): set_screen_power(True)
+
+replay_vt = None  # horloge virtuelle de run_replay (s depuis le début de la trace)
+
+def alert_clock():
+    """Horloge des règles d'alerte et de la bannière : monotone en direct,
+    virtuelle en replay (mêmes alertes quelle que soit la vitesse de rejeu)."""
+    return replay_vt if replay_vt is not None else time.monotonic()
+
+def raise_alert(msgs):
+    """Alerte métrique : bannière + réveil de l'écran, quel que soit le mode."""
+    print(f"[ALERT] {' | '.join(msgs)}")
+    with state_lock: state["alert_banner"] = ("\n".join(msgs), alert_clock() + ALERT_BANNER_S)
+    wake_from_input()  # reste ensuite allumé SLEEP_TIMEOUT comme après un appui
 
 def get_wifi_list():
     try:
-        out = subprocess.check_output("nmcli -f SSID dev wifi | tail -n +2", shell=True, text=True)
-        return [line.strip() for line in out.split("\n") if line.strip()][:5]
+        out = subprocess.check_output(["nmcli", "-t", "-f", "SSID", "dev", "wifi"], text=True, timeout=20)
+        nets = []
+        for line in out.split("\n"):
+            ssid = line.strip().replace("\\:", ":")  # -t échappe les ':'
+            if ssid and ssid not in nets: nets.append(ssid)
+        return nets[:5]
     except: return ["Erreur nmcli", "Install NetworkMgr"]
 
-def menu_action(act):
-    with state_lock:
-        if act == "BACK":
-            state["mode"] = "SPOTIFY"
-            state["menu_msg"] = ""
-        elif act == "TOGGLE_SLEEP":
-            state["sleep_enabled"] = not state["sleep_enabled"]
-            status = "ON" if state["sleep_enabled"] else "OFF"
-            for item in state["menu_items"]:
-                if "Veille Auto" in item["lbl"]:
-                    item["lbl"] = f"Veille Auto: {status}"
-                    break
-        elif act == "SHOW_IP":
-            state["menu_msg"] = f"IP: {get_ip()}"
-        elif act == "WIFI":
-            state["menu_msg"] = "Scan en cours..."
-            threading.Thread(target=async_wifi_scan).start()
-        elif act == "REBOOT":
-            state["menu_msg"] = "Redémarrage..."
-            subprocess.run(["sudo", "reboot"])
-        elif act == "SHUTDOWN":
-            state["menu_msg"] = "Arrêt en cours..."
-            subprocess.run(["sudo", "shutdown", "now"])
-        elif act == "UPDATE":
-            state["menu_msg"] = "Mise à jour Git..."
-            def t_update():
-                try:
-                    path = Path(__file__).parent
-                    out = subprocess.check_output(["git", "pull", "origin", "master"], cwd=path, stderr=subprocess.STDOUT, text=True)
-                    if "Already up to date" in out:
-                        with state_lock: state["menu_msg"] = "Déjà à jour."
-                        time.sleep(2)
-                        with state_lock: state["menu_msg"] = ""
-                    else:
-                        with state_lock: state["menu_msg"] = f"Maj OK: {out.strip()[-15:]}"
-                        time.sleep(2)
-                        with state_lock: state["menu_msg"] = "Relancement..."
-                        time.sleep(1)
-                        os.execv(sys.executable, [sys.executable] + sys.argv)
-                except Exception as e:
-                    with state_lock: state["menu_msg"] = f"Err: {e}"
-            threading.Thread(target=t_update).start()
-
-def async_wifi_scan():
-    nets = get_wifi_list()
-    with state_lock:
-        state["menu_msg"] = "\n".join(nets) if nets else "Aucun réseau"
+def get_git_status():
+    path = Path(__file__).parent
+    try:
+        head = subprocess.check_output(["git", "log", "-1", "--format=%h %cr"], cwd=path, text=True, timeout=5).strip()
+        dirty = subprocess.check_output(["git", "status", "--porcelain"], cwd=path, text=True, timeout=5)
+        n = len([l for l in dirty.split("\n") if l.strip()])
+        return f"{head}" + (f", {n} modif." if n else "")
+    except: return "Git indisponible"
+
+# ================== ACTIONS SYSTÈME ==================
+# Tout ce qui lance un process (IP, nmcli, git, reboot...) passe par un pool borné :
+# jamais de subprocess sous state_lock, la progression est publiée dans menu_msg.
+SYS_WORKERS = 2
+SYS_PENDING_MAX = 4
+SYS_TTL_S = {"ip": 30, "wifi": 20, "git": 60}
+sys_pool = ThreadPoolExecutor(max_workers=SYS_WORKERS, thread_name_prefix="sys")
+sys_lock = threading.Lock()
+sys_pending = set()  # actions en attente ou en cours (un 2e clic ne relance pas nmcli)
+sys_cache = {}       # clé -> (t, valeur)
+
+def sys_cached(key, fn):
+    with sys_lock: hit = sys_cache.get(key)
+    if hit and time.time() - hit[0] < SYS_TTL_S[key]: return hit[1]
+    val = fn()
+    with sys_lock: sys_cache[key] = (time.time(), val)
+    return val
+
+def sys_invalidate(key):
+    with sys_lock: sys_cache.pop(key, None)
+
+def menu_msg(msg):
+    with state_lock: state["menu_msg"] = msg
+
+def submit_sys(name, fn):
+    with sys_lock:
+        if name in sys_pending or len(sys_pending) >= SYS_PENDING_MAX: return False
+        sys_pending.add(name)
+    def run():
+        try: fn()
+        except Exception as e: menu_msg(f"Err: {e}")
+        finally:
+            with sys_lock: sys_pending.discard(name)
+    sys_pool.submit(run)
+    return True
+
+def act_show_ip():
+    menu_msg("Lecture IP...")
+    ip = sys_cached("ip", get_ip)
+    menu_msg(f"IP: {ip}\nGit: {sys_cached('git', get_git_status)}")
+
+def act_wifi():
+    menu_msg("Scan en cours...")
+    nets = sys_cached("wifi", get_wifi_list)
+    menu_msg("\n".join(nets) if nets else "Aucun réseau")
+
+def act_reboot():
+    menu_msg("Redémarrage...")
+    subprocess.run(["sudo", "reboot"])
+
+def act_shutdown():
+    menu_msg("Arrêt en cours...")
+    subprocess.run(["sudo", "shutdown", "now"])
+
+# Fichiers rechargeables à chaud ; un changement ailleurs côté panel impose un redémarrage.
+# Les fichiers du PC (pi_serveur.py, gpu_monitor.py...) et test_file/ sont ignorés.
+UI_MODULES = ("ui_render", "ui_modes")
+CORE_FILES = ("pi_panel.py", "spotify_client.py", "metrics_wire.py", "alerts.py", "pc_hosts.py", "pi_health.py")
+CORE_DIRS = ("icons/",)
+
+def git_head(path):
+    return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=path, text=True, timeout=5).strip()
+
+def reload_ui():
+    """Recharge ui_render puis ui_modes dans le process courant. Chaque source est
+    compilée avant : une erreur de syntaxe laisse l'ancienne version en place."""
+    for name in UI_MODULES:
+        mod = sys.modules[name]
+        with open(mod.__file__, "r", encoding="utf-8") as f: compile(f.read(), mod.__file__, "exec")
+    for name in UI_MODULES: importlib.reload(sys.modules[name])
+
+def restart():
+    save_snapshot()
+    os.execv(sys.executable, [sys.executable] + sys.argv)
 
-def fetch_art(url):
+def act_update():
+    menu_msg(f"Mise à jour Git...\n{sys_cached('git', get_git_status)}")
+    path = Path(__file__).parent
+    old = git_head(path)
+    out = subprocess.check_output(["git", "pull", "origin", "master"], cwd=path, stderr=subprocess.STDOUT, text=True, timeout=120)
+    sys_invalidate("git")
+    new = git_head(path)
+    if new == old:
+        menu_msg("Déjà à jour.")
+        time.sleep(2)
+        menu_msg("")
+        return
+    changed = subprocess.check_output(["git", "diff", "--name-only", old, new], cwd=path, text=True, timeout=5).split()
+    if any(f in CORE_FILES or f.startswith(CORE_DIRS) for f in changed):
+        menu_msg(f"Maj OK: {out.strip()[-15:]}\nRelancement...")
+        time.sleep(1)
+        restart()
+    elif any(f in [m + ".py" for m in UI_MODULES] for f in changed):
+        t0 = time.perf_counter()
+        try: reload_ui()
+        except Exception as e:
+            menu_msg(f"Rechargement impossible: {e}\nRelancement...")
+            time.sleep(2)
+            restart()
+        menu_msg(f"Maj OK: interface rechargée ({(time.perf_counter() - t0) * 1000:.0f} ms)")
+    else:
+        menu_msg(f"Maj OK: {new[:7]} (rien à recharger)")
+
+SYS_ACTIONS = {"SHOW_IP": act_show_ip, "WIFI": act_wifi, "UPDATE": act_update,
+               "REBOOT": act_reboot, "SHUTDOWN": act_shutdown}
+REPLAY_SKIP_ACTS = tuple(SYS_ACTIONS)
+
+def make_gradient(avg):
+    """Fond dégradé : une colonne de H pixels étirée en largeur (au lieu de H draw.line)."""
+    col = pygame.Surface((1, H))
+    for y in range(H):
+        r = y/H
+        col.set_at((0, y), tuple(int(x*(1-r*0.8)) for x in avg))
+    return pygame.transform.scale(col, (W, H))
+
+def decode_art(data):
+    from PIL import Image
+    im = Image.open(io.BytesIO(data)).convert("RGB").resize((320, 320))
+    s_art = to_display(pygame.image.fromstring(im.tobytes(), im.size, im.mode))
+    avg = im.resize((1,1)).getpixel((0,0))
+    return s_art, avg
+
+def fetch_art(url, tid=None):
     try:
-        d = requests.get(url, timeout=ART_TIMEOUT_S).content
-        im = Image.open(io.BytesIO(d)).convert("RGB").resize((320,320))
-        s_art = pygame.image.fromstring(im.tobytes(), im.size, im.mode)
-        avg = im.resize((1,1)).getpixel((0,0))
-        s_bg = pygame.Surface((W,H))
-        for y in range(H):
-            r = y/H
-            c = tuple(int(x*(1-r*0.8)) for x in avg)
-            pygame.draw.line(s_bg, c, (0,y), (W,y))
+        # Pochettes gardées sur disque : restauration au boot et pas de re-téléchargement
+        key = hashlib.sha1(url.encode()).hexdigest()[:16]
+        path = ART_CACHE_DIR / f"{key}.jpg"
+        if path.exists():
+            d = path.read_bytes()
+        else:
+            d = http().get(url, timeout=ART_TIMEOUT_S).content
+            write_atomic(path, d)
+            prune_art_cache()
+        s_art, avg = decode_art(d)
+        s_bg = to_display(make_gradient(avg))
         lum = sum(avg)/3
         col = (255,255,255) if lum < 150 else (20,20,20)
         with state_lock:
+            if tid is not None and state["track_id"] != tid: return  # piste déjà changée
             state["art_surf"] = s_art
             state["bg_surf"] = s_bg
             state["text_col"] = col
+            state["art_key"] = key
+            state["art_avg"] = avg
+        mark_snapshot_dirty()
     except: pass
 
+# ================== SNAPSHOT (restauration instantanée) ==================
+SNAPSHOT_PATH = STATE_DIR / ".panel_snapshot.json"
+ART_CACHE_DIR = STATE_DIR / ".art_cache"
+ART_CACHE_MAX = 64
+SNAPSHOT_DEBOUNCE_S = 5       # regroupe les changements rapprochés
+SNAPSHOT_MIN_INTERVAL_S = 30  # ménage la carte SD
+SNAPSHOT_HISTORY_S = 600      # samples métriques seuls : pas de dirty, écrits au plus toutes les 10 min
+SNAPSHOT_KEYS = ["track_id", "title", "artist", "playing", "duration", "progress",
+                 "art_key", "art_avg", "text_col", "stats_history"]
+snapshot_dirty = threading.Event()
+history_changed = False  # stats_history modifié depuis la dernière écriture (apply_metrics)
+
+def write_atomic(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+def save_boot_frame(surf):
+    # pygame choisit le format d'après l'extension et ferme les fichiers qu'on lui passe :
+    # on écrit à côté en .tmp.jpg puis on renomme, comme write_atomic
+    tmp = BOOT_FRAME_PATH.with_name(BOOT_FRAME_PATH.stem + ".tmp.jpg")
+    try:
+        BOOT_FRAME_PATH.parent.mkdir(parents=True, exist_ok=True)
+        pygame.image.save(surf, str(tmp))
+        with open(tmp, "rb+") as f: os.fsync(f.fileno())
+        os.replace(tmp, BOOT_FRAME_PATH)
+        BOOT_FRAME_PATH.with_suffix(".bmp").unlink(missing_ok=True)  # ancien format, 1,1 Mo
+    except Exception as e: print(f"[BOOT] Frame non sauvegardée: {e}")
+
+def prune_art_cache():
+    try:
+        files = sorted(ART_CACHE_DIR.glob("*.jpg"), key=lambda p: p.stat().st_mtime)
+        for p in files[:-ART_CACHE_MAX]: p.unlink()
+    except: pass
+
+def mark_snapshot_dirty():
+    snapshot_dirty.set()
+
+def save_snapshot():
+    global history_changed
+    history_changed = False
+    with state_lock:
+        snap = {k: state[k] for k in SNAPSHOT_KEYS}
+        snap["stats_history"] = [dict(d.items()) for d in snap["stats_history"]]
+    snap["stats_host"] = pc_base()  # à qui appartient stats_history
+    snap["saved_at"] = time.time()
+    try: write_atomic(SNAPSHOT_PATH, json.dumps(snap, separators=(",", ":")).encode("utf-8"))
+    except Exception as e: print(f"[SNAPSHOT] Ecriture impossible: {e}")
+
+def loop_snapshot():
+    """Spotify / UI : écriture regroupée (5 s, 30 s mini entre deux). Métriques
+    seules : toutes les SNAPSHOT_HISTORY_S éveillé, à la mise en veille et à
+    l'arrêt ; rien pendant la veille."""
+    last_write = 0
+
+    def on_power(on):
+        if not on and (history_changed or snapshot_dirty.is_set()): save_snapshot()
+    on_power_change(on_power)
+
+    while True:
+        if not snapshot_dirty.wait(SNAPSHOT_HISTORY_S):
+            if history_changed and awake_evt.is_set() and time.time() - last_write >= SNAPSHOT_HISTORY_S:
+                save_snapshot()
+                last_write = time.time()
+            continue
+        time.sleep(max(SNAPSHOT_DEBOUNCE_S, last_write + SNAPSHOT_MIN_INTERVAL_S - time.time()))
+        snapshot_dirty.clear()
+        save_snapshot()
+        last_write = time.time()
+
+def restore_snapshot():
+    """Recharge le dernier état connu (appelé avant la première frame)."""
+    try:
+        with open(SNAPSHOT_PATH, "r", encoding="utf-8") as f: snap = json.load(f)
+    except: return
+    art = bg = None
+    if snap.get("art_key") and snap.get("art_avg"):
+        try:
+            art, _ = decode_art((ART_CACHE_DIR / f"{snap['art_key']}.jpg").read_bytes())
+            bg = to_display(make_gradient(snap["art_avg"]))
+        except: snap["art_key"] = None
+    if snap.get("playing"):
+        # Ancre de progression : on avance du temps écoulé depuis l'écriture
+        elapsed = (time.time() - snap.get("saved_at", time.time())) * 1000
+        snap["progress"] = int(min(snap.get("progress", 0) + elapsed, snap.get("duration", 1)))
+    with state_lock:
+        for k in SNAPSHOT_KEYS:
+            if k in snap: state[k] = snap[k]
+        state["text_col"] = tuple(state["text_col"])
+        restored = [MetricsRecord.from_dict(d) for d in state["stats_history"][-MAX_HISTORY:]]
+        # L'historique appartient au PC actif à l'écriture : il suit l'hôte (cycle_active_host
+        # repart de Host.history), et reste hors de l'écran si un autre PC est actif au boot
+        h = hosts.hosts.get(snap.get("stats_host")) if "stats_host" in snap else hosts.active()
+        if h is not None and not h.history:
+            h.history.extend(restored)
+            if restored: h.metrics = restored[-1]
+        if h is not None and h is not hosts.active(): restored = []
+        state["stats_history"] = restored
+        if restored: state["metrics"] = restored[-1]
+        state["art_surf"], state["bg_surf"] = art, bg
+
+# ================== TRACE (record / replay) ==================
+# Format : une ligne JSON par évènement [t_s, type, payload], en ajout seul
+# (.gz : gzip). Types : "sp" lecture Spotify, "sp_err", "pc" réponse du helper
+# PC {"p": chemin, "d": données}, "in" entrée [kind, arg].
+trace_file = None
+trace_lock = threading.Lock()
+trace_t0 = 0.0
+
+def trace_open(path, mode):
+    if str(path).endswith(".gz"): return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8", buffering=1 if mode == "a" else -1)
+
+def start_trace(path):
+    global trace_file, trace_t0
+    trace_file = trace_open(path, "a")
+    trace_t0 = time.perf_counter()
+    trace_event("#", {"v": 1, "start": time.time(), "size": [W, H], "fps": FPS})
+    print(f"[TRACE] Enregistrement dans {path}")
+
+def stop_trace():
+    global trace_file
+    with trace_lock:
+        if trace_file is not None: trace_file.close()
+        trace_file = None
+
+def trace_event(kind, payload):
+    if trace_file is None: return
+    line = json.dumps([round(time.perf_counter() - trace_t0, 4), kind, payload],
+                      separators=(",", ":"), ensure_ascii=False)
+    with trace_lock:
+        if trace_file is not None: trace_file.write(line + "\n")
+
+def load_trace(path):
+    events = []
+    try:
+        with trace_open(path, "r") as f:
+            for line in f:
+                try: events.append(json.loads(line))
+                except ValueError: break  # dernière ligne tronquée (crash pendant l'enregistrement)
+    except EOFError: pass  # gzip tronqué
+    return [e for e in events if e[1] != "#"]
+
+class ReplayResponse:
+    def __init__(self, data, status=200):
+        self.data, self.status_code, self.content, self.headers = data, status, b"", {}
+    def json(self): return self.data
+
+class ReplayHttp:
+    """Remplace la session requests pendant un replay : GET = dernière réponse
+    rejouée pour ce chemin, POST = acquittement immédiat. Aucun accès réseau."""
+    def __init__(self):
+        self.last = {}
+    def get(self, url, **kw):
+        path = urlparse(url).path
+        return ReplayResponse(self.last[path]) if path in self.last else ReplayResponse(None, 404)
+    def post(self, url, **kw):
+        return ReplayResponse({"ok": True, "msg": "Replay"})
+
 # ================== LOGIQUE THREADS ==================
 def loop_spotify():
+    # Seul ce thread parle à Spotify : un 429 ou un backoff ne retarde plus
+    # les métriques ni le mixer (loop_metrics)
     last_t = 0
-    last_m = 0
-    last_mix = 0
+
+    def on_power(on):
+        nonlocal last_t
+        if on: last_t = 0  # rafraîchir dès le réveil
+    on_power_change(on_power)
     
     while True:
+        if not awake_evt.is_set():
+            awake_evt.wait()  # suspendu en veille
+            continue
         now = time.time()
         
-        # --- 1. SPOTIFY (1s) ---
-        if now - last_t > SPOTIFY_POLL_S:
+        # --- SPOTIFY (1s, sauf backoff) ---
+        if sp is not None and sp.ready() and now - last_t > SPOTIFY_POLL_S:
+            t0 = time.perf_counter()
             try:
-                pb = sp.current_playback()
-                if pb and pb.get("item"):
-                    item = pb["item"]
-                    tid = item["id"]
-                    with state_lock:
-                        if tid != state["track_id"]:
-                            state["track_id"] = tid
-                            state["art_surf"] = None
-                            imgs = item["album"]["images"]
-                            if imgs: threading.Thread(target=fetch_art, args=(imgs[0]["url"],)).start()
-                        state["title"] = item["name"]
-                        state["artist"] = item["artists"][0]["name"]
-                        state["playing"] = pb["is_playing"]
-                        state["duration"] = item["duration_ms"]
-                        state["progress"] = pb["progress_ms"]
-            except: pass
+                pb = slim_playback(sp.current_playback())
+                perf_poll("Spotify", t0, True)
+                trace_event("sp", pb)
+                apply_playback(pb)
+            except Exception as e:
+                perf_poll("Spotify", t0, False)
+                trace_event("sp_err", getattr(e, "http_status", None))
             last_t = now
+
+        tick_progress(200)  # Fluidité
+        time.sleep(0.2)
+
+def slim_playback(pb):
+    """Garde uniquement ce que le panel utilise (traces compactes)."""
+    if not pb or not pb.get("item"): return None
+    item = pb["item"]
+    return {"is_playing": pb["is_playing"], "progress_ms": pb["progress_ms"],
+            "item": {"id": item["id"], "name": item["name"], "duration_ms": item["duration_ms"],
+                     "artists": [{"name": item["artists"][0]["name"]}],
+                     "album": {"images": item["album"]["images"][:1]}}}
+
+def apply_playback(pb):
+    if not pb: return
+    item = pb["item"]
+    tid = item["id"]
+    with state_lock:
+        if tid != state["track_id"] or pb["is_playing"] != state["playing"]:
+            mark_snapshot_dirty()
+        if tid != state["track_id"]:
+            state["track_id"] = tid
+            state["art_surf"] = None
+            imgs = item["album"]["images"]
+            if imgs: threading.Thread(target=fetch_art, args=(imgs[0]["url"], tid)).start()
+        state["title"] = item["name"]
+        state["artist"] = item["artists"][0]["name"]
+        state["playing"] = pb["is_playing"]
+        state["duration"] = item["duration_ms"]
+        state["progress"] = pb["progress_ms"]
+
+def tick_progress(ms):
+    with state_lock:
+        if state["playing"]:
+            state["progress"] = min(state["progress"] + ms, state["duration"])
+
+def apply_metrics(data, host=None):
+    global history_changed
+    # Historique = enregistrements compacts (tuples), jamais la réponse JSON complète
+    if not isinstance(data, MetricsRecord): data = MetricsRecord.from_dict(data)
+    active = hosts.active()
+    host = host or active
+    fired = []
+    if host is not None:
+        host.metrics = data
+        host.history.append(data)
+        fired = host.alerts.update(data, alert_clock())  # O(1) par sample, même en veille (poll espacé)
+    if fired: raise_alert([f"{host.name} : {m}" for m in fired] if len(hosts) > 1 else fired)
+    if host is not active: return  # autre PC : sa carte suffit (publish_host_cards)
+    with state_lock: 
+        state["metrics"] = data
+        state["stats_history"].append(data)
+        if len(state["stats_history"]) > MAX_HISTORY:
+            state["stats_history"].pop(0)
+        # Config PC modifiée (APPS/MACROS) : on recharge la liste une seule fois
+        reload_apps = (data.get("cfg_v") and state["apps_cfg_v"] is not None
+                       and apps_list_stale() and not state["apps_fetching"])
+        if reload_apps: state["apps_fetching"] = True
+    if reload_apps: spawn(refresh_apps_list)
+    history_changed = True  # pas de mark_snapshot_dirty : écrit par loop_snapshot toutes les 10 min
+
+def apply_mixer(sessions):
+    with state_lock:
+        old_idx = state["mixer_idx"]
+        # copie : les réglages optimistes de ui_modes ne doivent pas modifier
+        # la réponse gardée par pc_get (réutilisée telle quelle sur 304)
+        state["mixer_sessions"] = [dict(s) for s in sessions]
+        if sessions:
+            state["mixer_idx"] = min(old_idx, len(sessions)-1)
+
+def apply_processes(data):
+    with state_lock:
+        state["proc_top"] = data.get("procs", [])
+        state["proc_total"] = data.get("total", 0)
+
+PROC_ROWS = 10
+
+def refresh_processes():
+    with state_lock: by = state["proc_sort"]
+    try: apply_processes(pc_get("/processes/top", 1.0, {"by": by, "n": PROC_ROWS}))
+    except: pass
+
+# Vue HISTORIQUE : une requête /metrics/range par plage, agrégée côté PC
+HISTORY_RANGES = (("1 h", 3600), ("12 h", 43200), ("24 h", 86400), ("7 j", 604800))
+HISTORY_POINTS = 120
+HISTORY_POLL_S = 60
+
+def history_series(data):
+    """Réponse /metrics/range -> séries sur une grille fixe, préparées une fois
+    (None = pas de mesure, ex : PC éteint) ; le rendu ne fait que les tracer."""
+    step = data["step"]
+    base = data["from"] // step * step
+    n = (data["to"] // step * step - base) // step + 1
+    slots = [(ts - base) // step for ts in data["ts"]]
+
+    def grid(vals):
+        out = [None] * n
+        for i, v in zip(slots, vals):
+            if 0 <= i < n: out[i] = v
+        return out
+    avg = {k: grid(v) for k, v in data["avg"].items()}
+    avg["disk"] = [None if r is None and w is None else round((r or 0) + (w or 0), 2)
+                   for r, w in zip(avg["disk_r"], avg["disk_w"])]
+    peak = {k: max((v for v in vals if v is not None), default=None) for k, vals in data["max"].items()}
+    peak["disk"] = max((v for v in avg["disk"] if v is not None), default=None)
+    return {"step": step, "n": n, "avg": avg, "peak": peak}
+
+def apply_history(data):
+    rng = history_series(data) if data and data.get("ok") else None
+    with state_lock: state["stats_range"] = rng
+
+def refresh_history():
+    with state_lock: _, span = HISTORY_RANGES[state["stats_range_idx"]]
+    try:
+        apply_history(pc_get("/metrics/range", 3.0, {"from": -span, "step": span // HISTORY_POINTS}))
+        return True
+    except: return False
+
+def apply_apps(data):
+    # {"version", "apps"} ; liste simple pour un ancien helper ou une vieille trace
+    apps = data.get("apps", []) if isinstance(data, dict) else data
+    version = data.get("version") if isinstance(data, dict) else None
+    with state_lock:
+        changed = version != state["apps_cfg_v"]
+        state["launcher_app_names"] = apps or []
+        state["apps_cfg_v"] = version
+        update_launcher_list()
+    if changed: revalidate_app_icons()
+
+def apply_macros(macros):
+    with state_lock:
+        state["launcher_macros"] = macros or []
+        update_launcher_list()
+
+def apply_launch_status(status):
+    with state_lock: state["launcher_running"] = status or {}
+
+def update_launcher_list():
+    # appelé sous state_lock
+    items = state["launcher_app_names"] + [MACRO_PREFIX + m for m in state["launcher_macros"]]
+    state["launcher_apps"] = items if items else ["Aucune App Config"]
+    state["launcher_idx"] = min(state["launcher_idx"], len(state["launcher_apps"])-1)
+
+PC_APPLY = {"/metrics": apply_metrics, "/mixer/list": apply_mixer, "/apps_list": apply_apps,
+            "/macros_list": apply_macros, "/launch/status": apply_launch_status,
+            "/processes/top": apply_processes, "/metrics/range": apply_history}
+
+METRICS_ACCEPT = f"{METRICS_BINARY}, application/json"
+
+def pc_get_metrics(timeout, host=None):
+    """/metrics en encodage compact (deltas depuis le dernier seq reçu de cet hôte) ;
+    JSON si le helper est ancien. Seul le PC actif est tracé (--record)."""
+    host = host or hosts.active()
+    dec = host.dec
+    r = http().get(f"{host.base}/metrics", params=dec.params(),
+                   headers={"Accept": METRICS_ACCEPT}, timeout=timeout)
+    if r.headers.get("Content-Type", "").startswith(METRICS_BINARY):
+        try: data = dec.decode(r.content)
+        except ValueError:
+            dec.seq = None  # trame incohérente : prochain appel en complet
+            raise
+    else:
+        data = MetricsRecord.from_dict(r.json())
+    if trace_file is not None and host is hosts.active():
+        trace_event("pc", {"p": "/metrics", "d": dict(data.items())})
+    return data
+
+pc_validators = {}  # (helper, chemin, params) -> (ETag, réponse décodée)
+
+def pc_get(path, timeout, params=None):
+    """GET sur le helper PC avec If-None-Match : sur 304, la copie déjà décodée
+    est réutilisée. Réponse tracée (--record) puis renvoyée décodée."""
+    base = pc_base()
+    key = (base, path, tuple(sorted(params.items())) if params else ())
+    cached = pc_validators.get(key)
+    r = http().get(f"{base}{path}", params=params, timeout=timeout,
+                   headers={"If-None-Match": cached[0]} if cached else None)
+    if r.status_code == 304 and cached:
+        data = cached[1]
+    else:
+        data = r.json()
+        etag = r.headers.get("ETag")
+        if etag: pc_validators[key] = (etag, data)
+        else: pc_validators.pop(key, None)
+    trace_event("pc", {"p": path, "d": data})
+    return data
+
+# --- Plusieurs PC ---
+# Un tour de /metrics interroge tous les helpers en parallèle (pool partagé) : un PC
+# éteint coûte son timeout une seule fois par tour, pas une fois par hôte suivant.
+POLL_WORKERS = 8
+poll_pool = ThreadPoolExecutor(max_workers=POLL_WORKERS, thread_name_prefix="poll")
+
+def poll_host(host, timeout):
+    t0 = time.perf_counter()
+    try:
+        rec = pc_get_metrics(timeout, host)
+        host.ok, host.last_ok = True, time.time()
+    except Exception:
+        rec, host.ok = None, False
+    return host, rec, t0
+
+def poll_hosts(timeout):
+    """Résultats appliqués ici, dans l'ordre des hôtes (apply_* restent mono-thread)."""
+    active = hosts.active()
+    for f in [poll_pool.submit(poll_host, h, timeout) for h in hosts.list()]:
+        host, rec, t0 = f.result()
+        perf_poll("Metrics" if host is active else f"Metrics {host.name}", t0, rec is not None)
+        if rec is not None: apply_metrics(rec, host)
+    publish_host_cards()
+
+def publish_host_cards():
+    active = hosts.active()
+    cards = [{"name": h.name, "base": h.base, "ok": h.ok, "active": h is active, "m": h.metrics}
+             for h in hosts.list()]
+    agg = aggregate(cards)
+    with state_lock:
+        state["hosts"] = cards
+        state["hosts_agg"] = agg
+
+def set_active_host(base):
+    """Change le PC qui reçoit media / mixer / launcher et alimente les vues détaillées."""
+    if not hosts.set_active(base): return
+    h = hosts.active()
+    with state_lock:
+        state["metrics"] = h.metrics or {}
+        state["stats_history"] = list(h.history)
+        state["stats_range"] = None
+        state["apps_cfg_v"] = None
+        state["launcher_app_names"], state["launcher_macros"], state["launcher_running"] = [], [], {}
+        state["launcher_apps"], state["launcher_idx"], state["launcher_status"] = ["Chargement..."], 0, ""
+        state["mixer_sessions"], state["mixer_idx"] = [], 0
+        state["proc_top"], state["proc_total"] = [], 0
+        mode, view = state["mode"], state["stats_view"]
+    print(f"[HOSTS] PC actif : {h.name} ({h.base})")
+    publish_host_cards()
+    if mode == "LAUNCHER": spawn(refresh_launcher)
+    elif mode == "PROCESSES": spawn(refresh_processes)
+    elif mode == "STATS" and view == "HISTORY": spawn(refresh_history)
+
+def cycle_active_host(step):
+    hs = hosts.list()
+    if len(hs) < 2: return
+    cur = hosts.active()
+    i = hs.index(cur) if cur in hs else 0
+    set_active_host(hs[(i + step) % len(hs)].base)
+
+def loop_discovery():
+    try: listen_beacons(hosts, PC_BEACON_PORT, lambda h: publish_host_cards())
+    except OSError as e: print(f"[HOSTS] Découverte désactivée (port {PC_BEACON_PORT}: {e})")
+
+def loop_metrics():
+    last_m = 0
+    last_mix = 0
+    last_launch = 0
+    last_proc = 0
+    last_hist = 0
+
+    def on_power(on):
+        nonlocal last_m, last_mix, last_launch, last_proc, last_hist
+        if on: last_m = last_mix = last_launch = last_proc = last_hist = 0
+    on_power_change(on_power)
+
+    while True:
+        now = time.time()
+        awake = awake_evt.is_set()
             
-        # --- 2. METRICS (2s) ---
-        if now - last_m > METRICS_POLL_S:
-            try:
-                r = requests.get(f"{PC_HELPER_BASE}/metrics", timeout=0.5)
-                data = r.json()
-                with state_lock: 
-                    state["metrics"] = data
-                    state["stats_history"].append(data)
-                    if len(state["stats_history"]) > MAX_HISTORY:
-                        state["stats_history"].pop(0)
-            except: pass
+        # --- METRICS, tous les PC en parallèle (2s, 10s en veille) ---
+        if now - last_m > (METRICS_POLL_S if awake else SLEEP_METRICS_POLL_S):
+            poll_hosts(0.5)
+            if hosts.expire(): publish_host_cards()
             last_m = now
 
-        # --- 3. MIXER (2s) ---
-        if now - last_mix > 2.0:
+        # --- MIXER (2s, suspendu en veille) ---
+        if awake and now - last_mix > 2.0:
             should_poll = False
             with state_lock:
                 if state["mode"] == "MIXER": should_poll = True
             
             if should_poll:
+                t0 = time.perf_counter()
                 try:
-                    r = requests.get(f"{PC_HELPER_BASE}/mixer/list", timeout=1.0)
-                    sessions = r.json()
-                    with state_lock:
-                        old_idx = state["mixer_idx"]
-                        state["mixer_sessions"] = sessions
-                        if sessions:
-                            state["mixer_idx"] = min(old_idx, len(sessions)-1)
-                except: pass
+                    sessions = pc_get("/mixer/list", 1.0)
+                    perf_poll("Mixer", t0, True)
+                    apply_mixer(sessions)
+                except: perf_poll("Mixer", t0, False)
             last_mix = now
+
+        # --- APPS LANCÉES (2s, seulement en LAUNCHER) ---
+        if awake and now - last_launch > 2.0:
+            with state_lock: in_launcher = state["mode"] == "LAUNCHER"
+            if in_launcher:
+                t0 = time.perf_counter()
+                try:
+                    status = pc_get("/launch/status", 1.0)
+                    perf_poll("Launch", t0, True)
+                    apply_launch_status(status)
+                except: perf_poll("Launch", t0, False)
+            last_launch = now
+
+        # --- PROCESSUS (2s, seulement en PROCESSES) ---
+        if awake and now - last_proc > 2.0:
+            with state_lock: in_proc = state["mode"] == "PROCESSES"
+            if in_proc:
+                t0 = time.perf_counter()
+                try:
+                    with state_lock: by = state["proc_sort"]
+                    data = pc_get("/processes/top", 1.0, {"by": by, "n": PROC_ROWS})
+                    perf_poll("Processes", t0, True)
+                    apply_processes(data)
+                except: perf_poll("Processes", t0, False)
+            last_proc = now
+
+        # --- HISTORIQUE (60s, seulement en STATS > HISTORY ; entrée et plage : refresh_history) ---
+        if awake and now - last_hist > HISTORY_POLL_S:
+            with state_lock: in_hist = state["mode"] == "STATS" and state["stats_view"] == "HISTORY"
+            if in_hist:
+                t0 = time.perf_counter()
+                perf_poll("History", t0, refresh_history())
+            last_hist = now
         
-        # Fluidité
-        with state_lock:
-            if state["playing"]:
-                state["progress"] = min(state["progress"] + 200, state["duration"])
-        
-        time.sleep(0.2)
+        if not awake:
+            # Veille : on dort jusqu'au prochain poll métriques ou jusqu'au réveil
+            awake_evt.wait(SLEEP_METRICS_POLL_S)
+        else:
+            time.sleep(0.2)
+
+# ================== DISPATCH DES ENTREES ==================
+# GPIO, clavier (--debug) et replay passent tous par dispatch_input()
+KEYMAP = {
+    pygame.K_LEFT: ("btn", "B1_PREV"), pygame.K_SPACE: ("btn", "B2_PLAY"),
+    pygame.K_RIGHT: ("btn", "B3_NEXT"), pygame.K_m: ("btn", "B4_MODE"),
+    pygame.K_UP: ("rot", -1), pygame.K_DOWN: ("rot", 1), pygame.K_RETURN: ("click", None),
+}
+
+def dispatch_input(kind, arg=None, t_edge=None):
+    """t_edge : perf_counter() du front (lecture GPIO), pour la mesure de latence."""
+    trace_event("in", [kind, arg])
+    input_ctx.t_edge = t_edge if t_edge is not None else time.perf_counter()
+    try:
+        if kind == "rot": ui_modes.input_rotate(arg)
+        elif kind == "click": ui_modes.input_click()
+        elif kind == "btn": ui_modes.input_button(arg)
+    finally:
+        input_ctx.t_edge = None
+
+# --- Latence appui -> ack serveur ---
+# input_ctx.t_edge suit l'entrée en cours dans le thread qui la traite ; spawn()
+# la transmet aux threads lancés pour les requêtes (mixer, launch).
+input_ctx = threading.local()
+latency_lock = threading.Lock()
+latency = {}  # route -> deque de [appui->envoi, envoi->ack, serveur, total] (ms)
+LATENCY_MAX = 2000
+
+def spawn(fn):
+    t_edge = getattr(input_ctx, "t_edge", None)
+    def run():
+        input_ctx.t_edge = t_edge
+        fn()
+    threading.Thread(target=run, daemon=True).start()
+
+def record_latency(route, t_edge, t_send, t_ack, server_timing=None):
+    srv = None
+    try:  # "app;dur=1.23"
+        srv = float(server_timing.split("dur=")[1].split(",")[0].split(";")[0])
+    except: pass
+    row = [round((t_send - t_edge)*1000, 3), round((t_ack - t_send)*1000, 3),
+           srv, round((t_ack - t_edge)*1000, 3)]
+    with latency_lock:
+        latency.setdefault(route, deque(maxlen=LATENCY_MAX)).append(row)
+
+def dump_latency(path):
+    with latency_lock:
+        data = {"fields": ["edge_to_send_ms", "send_to_ack_ms", "server_ms", "total_ms"],
+                "helper": pc_base(), "sim": bool(SIM_GPIO),
+                "routes": {k: list(v) for k, v in latency.items()}}
+    try: write_atomic(Path(path), json.dumps(data).encode("utf-8"))
+    except Exception as e: print(f"[LATENCE] Ecriture impossible: {e}")
+
+def loop_sim_gpio(n):
+    """GPIO simulé : parcourt les modes et envoie des appuis couvrant /media,
+    /mixer/set et /launch (jamais de clic dans MENU), puis quitte."""
+    rnd = random.Random(42)
+    script = {
+        "SPOTIFY": [("btn", "B1_PREV"), ("btn", "B2_PLAY"), ("btn", "B3_NEXT"), ("rot", 1), ("rot", -1)],
+        "MIXER": [("btn", "B1_PREV"), ("btn", "B3_NEXT")],
+        "LAUNCHER": [("btn", "B2_PLAY"), ("rot", 1)],
+    }
+    time.sleep(1.0)  # laisse arriver la liste d'apps et les métriques
+    for i in range(n):
+        with state_lock: mode = state["mode"]
+        if mode not in script or i % 25 == 24: ev = ("btn", "B4_MODE")
+        else: ev = rnd.choice(script[mode])
+        dispatch_input(*ev, t_edge=time.perf_counter())
+        time.sleep(rnd.uniform(0.05, 0.25))
+    time.sleep(1.5)  # derniers acks
+    print(f"[SIM] {n} appuis simulés terminés")
+    pygame.event.post(pygame.event.Event(pygame.QUIT))
 
 # ================== GPIO INPUT ==================
 def loop_gpio():
@@ -357,34 +1399,30 @@ def loop_gpio():
     last_btn = {p:1 for p in BTN_PINS}
     last_sw = 1
     last_clk = GPIO.input(ENC_A)
+    wake_pins = list(BTN_PINS) + [ENC_A, ENC_SW]
     
     while True:
+        if not awake_evt.is_set():
+            # Veille : plus de polling, interruptions sur front descendant
+            for p in wake_pins:
+                GPIO.add_event_detect(p, GPIO.FALLING, callback=lambda ch: wake_from_input(), bouncetime=50)
+            awake_evt.wait()
+            for p in wake_pins: GPIO.remove_event_detect(p)
+            # L'appui qui réveille ne déclenche pas d'action
+            last_btn = {p: GPIO.input(p) for p in BTN_PINS}
+            last_sw = GPIO.input(ENC_SW)
+            last_clk = GPIO.input(ENC_A)
+            continue
+
         any_activity = False
         
         # --- ENCODEUR ---
         clk = GPIO.input(ENC_A)
         if clk != last_clk:
+            t_edge = time.perf_counter()
             any_activity = True
             dt = GPIO.input(ENC_B)
-            direction = 1 if dt != clk else -1
-            
-            with state_lock: curr_mode = state["mode"]
-            
-            if curr_mode == "MENU":
-                with state_lock:
-                    idx = state["menu_idx"] + direction
-                    state["menu_idx"] = max(0, min(idx, len(state["menu_items"])-1))
-            elif curr_mode == "LAUNCHER":
-                with state_lock:
-                    idx = state["launcher_idx"] + direction
-                    state["launcher_idx"] = max(0, min(idx, len(state["launcher_apps"])-1))
-            elif curr_mode == "SPOTIFY":
-                if direction > 0: pc_cmd("vol_up")
-                else: pc_cmd("vol_down")
-            
-            # (Note : J'ai retiré le contrôle Mixer par molette ici pour privilégier les boutons ci-dessous, 
-            # mais tu pourras le remettre quand ta molette sera réparée)
-
+            dispatch_input("rot", 1 if dt != clk else -1, t_edge)
             last_clk = clk
             time.sleep(0.002)
 
@@ -392,25 +1430,7 @@ def loop_gpio():
         sw = GPIO.input(ENC_SW)
         if sw == 0 and last_sw == 1:
             any_activity = True
-            action_to_do = None
-            launch_app = None
-            
-            with state_lock: 
-                curr_mode = state["mode"]
-                if curr_mode == "MENU":
-                    action_to_do = state["menu_items"][state["menu_idx"]]["act"]
-                elif curr_mode == "LAUNCHER":
-                    launch_app = state["launcher_apps"][state["launcher_idx"]]
-
-            if action_to_do: menu_action(action_to_do)
-            elif launch_app:
-                def t_launch():
-                    msg = launch_app_cmd(launch_app)
-                    with state_lock: state["launcher_status"] = msg
-                threading.Thread(target=t_launch).start()
-            elif curr_mode == "SPOTIFY": 
-                pc_cmd("mute_toggle")
-            
+            dispatch_input("click", t_edge=time.perf_counter())
             time.sleep(0.3)
         last_sw = sw
         
@@ -419,86 +1439,7 @@ def loop_gpio():
             val = GPIO.input(pin)
             if val == 0 and last_btn[pin] == 1:
                 any_activity = True
-                
-                # Variables d'action (pour exécuter hors du lock)
-                cmd_pc = None
-                action_menu = None
-                launch_btn_app = None
-                change_mode = False
-                toggle_stats = False
-                mixer_action = None # (change, app_name)
-                
-                with state_lock: 
-                    curr_mode = state["mode"]
-                    
-                    if name == "B4_MODE":
-                        change_mode = True
-                    
-                    elif curr_mode == "MENU":
-                        if name == "B1_PREV": state["menu_idx"] = max(0, state["menu_idx"] - 1)
-                        elif name == "B3_NEXT": state["menu_idx"] = min(len(state["menu_items"])-1, state["menu_idx"] + 1)
-                        elif name == "B2_PLAY": action_menu = state["menu_items"][state["menu_idx"]]["act"]
-                    
-                    elif curr_mode == "MIXER":
-                        sessions = state.get("mixer_sessions", [])
-                        if sessions:
-                            idx = state["mixer_idx"]
-                            # B2 (PLAY) -> Changer d'App
-                            if name == "B2_PLAY":
-                                state["mixer_idx"] = (idx + 1) % len(sessions)
-                            # B1 (PREV) -> Volume -
-                            elif name == "B1_PREV":
-                                app = sessions[idx]
-                                app["vol"] = max(0, app["vol"] - 10)
-                                mixer_action = (-10, app["name"])
-                            # B3 (NEXT) -> Volume +
-                            elif name == "B3_NEXT":
-                                app = sessions[idx]
-                                app["vol"] = min(100, app["vol"] + 10)
-                                mixer_action = (10, app["name"])
-
-                    elif curr_mode == "STATS":
-                        if name == "B2_PLAY": toggle_stats = True
-                    
-                    elif curr_mode == "LAUNCHER":
-                        if name == "B1_PREV": state["launcher_idx"] = max(0, state["launcher_idx"]-1)
-                        elif name == "B3_NEXT": state["launcher_idx"] = min(len(state["launcher_apps"])-1, state["launcher_idx"]+1)
-                        elif name == "B2_PLAY": launch_btn_app = state["launcher_apps"][state["launcher_idx"]]
-                        
-                    else: # Mode SPOTIFY
-                        if name == "B1_PREV": cmd_pc = "prev"
-                        elif name == "B2_PLAY": cmd_pc = "playpause"
-                        elif name == "B3_NEXT": cmd_pc = "next"
-
-                # --- EXÉCUTION DES ACTIONS (Hors Lock) ---
-                if change_mode:
-                    with state_lock:
-                        if state["mode"] == "SPOTIFY": state["mode"] = "STATS"
-                        elif state["mode"] == "STATS": state["mode"] = "MIXER"
-                        elif state["mode"] == "MIXER": state["mode"] = "LAUNCHER"
-                        elif state["mode"] == "LAUNCHER": state["mode"] = "MENU"
-                        else: state["mode"] = "SPOTIFY"
-                        if state["mode"] == "LAUNCHER": threading.Thread(target=refresh_apps_list).start()
-                        state["menu_msg"] = "" 
-                
-                if toggle_stats:
-                    with state_lock:
-                        state["stats_view"] = "GRAPHS" if state["stats_view"] == "GAUGES" else "GAUGES"
-
-                if mixer_action:
-                    change, appname = mixer_action
-                    def t_mix():
-                        try: requests.post(f"{PC_HELPER_BASE}/mixer/set", json={"name": appname, "change": change}, timeout=0.2)
-                        except: pass
-                    threading.Thread(target=t_mix).start()
-
-                if action_menu: menu_action(action_menu)
-                if cmd_pc: pc_cmd(cmd_pc)
-                if launch_btn_app:
-                    def t_launch_btn():
-                        msg = launch_app_cmd(launch_btn_app)
-                        with state_lock: state["launcher_status"] = msg
-                    threading.Thread(target=t_launch_btn).start()
+                dispatch_input("btn", name, time.perf_counter())
 
             if any_activity:
                 last_interaction = time.time()
@@ -512,270 +1453,306 @@ def loop_gpio():
         time.sleep(0.005)
 
 # ================== RENDU GRAPHIQUE ==================
+def text_surf(font, text, col):
+    """font.render avec cache LRU : les libellés fixes ne sont rasterisés qu'une fois."""
+    key = (id(font), text, tuple(col))
+    surf = text_cache.get(key)
+    if surf is not None:
+        text_cache.move_to_end(key)
+        text_cache_stats["hit"] += 1
+        return surf
+    text_cache_stats["miss"] += 1
+    surf = to_display(font.render(text, True, col), alpha=True)
+    text_cache[key] = surf
+    if len(text_cache) > TEXT_CACHE_MAX: text_cache.popitem(last=False)
+    return surf
+
 def render_text_centered(s, text, font, col, y):
-    surf = font.render(text, True, col)
+    surf = text_surf(font, text, col)
     rect = surf.get_rect(center=(W//2, y))
     s.blit(surf, rect)
 
-def render_spotify_ui(s):
-    with state_lock:
-        bg, art = state["bg_surf"], state["art_surf"]
-        tit, art_name = state["title"], state["artist"]
-        col = state["text_col"]
-        prog, dur, playing = state["progress"], state["duration"], state["playing"]
-    
-    if bg: s.blit(bg, (0,0))
-    else: s.fill((20,20,20))
-    
-    if art: 
-        r = art.get_rect(center=(W//2, 250))
-        s.blit(art, r)
-        pygame.draw.rect(s, (255,255,255), r, 2)
-    
-    render_text_centered(s, tit, FONT_L, col, 450)
-    render_text_centered(s, art_name, FONT_M, col, 500)
-    
-    bar_w, bar_h = 360, 8
-    bar_x = (W - bar_w)//2
-    ratio = max(0, min(1, prog/dur))
-    pygame.draw.rect(s, (80,80,80), (bar_x, 540, bar_w, bar_h), border_radius=4)
-    pygame.draw.rect(s, col, (bar_x, 540, int(bar_w*ratio), bar_h), border_radius=4)
-    
-    t1 = FONT_S.render(ms_str(prog), True, (200,200,200))
-    t2 = FONT_S.render(ms_str(dur), True, (200,200,200))
-    s.blit(t1, (bar_x, 555))
-    s.blit(t2, (bar_x + bar_w - t2.get_width(), 555))
-
-    btn_y = 620
-    s.blit(icon_prev, (W//2 - 140, btn_y))
-    s.blit(icon_pause if playing else icon_play, (W//2 - 32, btn_y))
-    s.blit(icon_next, (W//2 + 76, btn_y))
-    s.blit(icon_mode, (W//2 - 24, 720))
-
-def draw_chart(s, x, y, w, h, data_points, color, label, max_val=100):
-    pygame.draw.rect(s, (20,20,30), (x, y, w, h))
-    pygame.draw.rect(s, (60,60,70), (x, y, w, h), 1)
-    
-    lbl = FONT_S.render(label, True, color)
-    s.blit(lbl, (x + 5, y + 5))
-    
-    if len(data_points) < 2: return
-    
-    points = []
-    step_x = w / (MAX_HISTORY - 1)
-    
-    for i, val in enumerate(data_points):
-        try: v = float(val)
-        except: v = 0
-        px = x + (i * step_x)
-        py = y + h - ((v / max_val) * h)
-        points.append((px, py))
-    
-    if len(points) > 1:
-        pygame.draw.lines(s, color, False, points, 2)
-        pygame.draw.circle(s, color, (int(points[-1][0]), int(points[-1][1])), 4)
-        curr_val = FONT_M.render(f"{data_points[-1]}", True, (255,255,255))
-        s.blit(curr_val, (x + w - 45, y + 5))
+def marquee_strip(font, text, col):
+    """Bande 'texte + espace + texte' rasterisée une fois : le défilement ne fait qu'un blit décalé."""
+    key = (id(font), text, tuple(col))
+    m = marquee_cache.get(key)
+    if m is not None:
+        marquee_cache.move_to_end(key)
+        return m
+    txt = font.render(text, True, col)
+    tw, th = txt.get_size()
+    strip = pygame.Surface((tw*2 + MARQUEE_GAP, th), pygame.SRCALPHA)
+    strip.blit(txt, (0,0))
+    strip.blit(txt, (tw + MARQUEE_GAP, 0))
+    strip = to_display(strip, alpha=True)
+    m = marquee_cache[key] = [strip, tw, time.time()]
+    if len(marquee_cache) > MARQUEE_CACHE_MAX: marquee_cache.popitem(last=False)
+    return m
 
-def get_rpi_temp():
-    try:
-        with open("/sys/class/thermal/thermal_zone0/temp", "r") as f:
-            return round(int(f.read()) / 1000, 1)
-    except: return 0
+def render_text_marquee(s, text, font, col, y, max_w, x=None, scroll=True):
+    """Texte centré sur y (x=None) ou calé à gauche en (x, y haut). Au-delà de max_w,
+    il défile (scroll=True) ou est simplement coupé."""
+    global marquee_active
+    surf = text_surf(font, text, col)
+    tw, th = surf.get_size()
+    if tw <= max_w:
+        if x is None: s.blit(surf, surf.get_rect(center=(W//2, y)))
+        else: s.blit(surf, (x, y))
+        return
+    x0 = W//2 - max_w//2 if x is None else x
+    y0 = y - th//2 if x is None else y
+    if not scroll:
+        s.blit(surf, (x0, y0), area=pygame.Rect(0, 0, max_w, th))
+        return
+    strip, tw, t0 = marquee_strip(font, text, col)
+    period = tw + MARQUEE_GAP
+    phase = (time.time() - t0) % (MARQUEE_PAUSE_S + period / MARQUEE_SPEED)
+    offset = int(max(0, phase - MARQUEE_PAUSE_S) * MARQUEE_SPEED)
+    s.blit(strip, (x0, y0), area=pygame.Rect(offset, 0, max_w, th))
+    marquee_active = True
 
-def ms_str(ms):
-    s = int(ms / 1000)
-    return f"{s//60}:{s%60:02d}"
+# Ecrans et logique des modes : modules rechargeables à chaud (reload_ui)
+import ui_render, ui_modes
 
-def render_stats_ui(s):
-    s.fill((10,10,15))
-    render_text_centered(s, "PC MONITOR", FONT_XL, (0,255,200), 40)
-    
-    with state_lock: 
-        view = state["stats_view"]
-        mets = state["metrics"]
-        hist = list(state["stats_history"])
-    
-    if view == "GAUGES":
-        # --- VUE JAUGES ---
-        y = 130
-        for label, key, unit in [("CPU Load", "cpu", "%"), ("CPU Temp", "temp_cpu", "°C"),
-                                 ("GPU Load", "gpu", "%"), ("GPU Temp", "temp_gpu", "°C")]:
-            val = mets.get(key, "--")
-            pygame.draw.rect(s, (30,30,40), (40, y+35, 400, 20), border_radius=10)
-            try:
-                v_float = float(val)
-                col_bar = (50, 255, 50)
-                if v_float > 60: col_bar = (255, 200, 0)
-                if v_float > 80: col_bar = (255, 50, 50)
-                w_bar = int((v_float/100)*400)
-                pygame.draw.rect(s, col_bar, (40, y+35, w_bar, 20), border_radius=10)
-            except: pass
-            
-            lbl_surf = FONT_L.render(label, True, (220,220,220))
-            val_surf = FONT_L.render(f"{val}{unit}", True, (255,255,255))
-            s.blit(lbl_surf, (40, y))
-            s.blit(val_surf, (W - 40 - val_surf.get_width(), y))
-            y += 100
-            
-        hint = FONT_S.render("[PLAY] -> Voir Graphiques", True, (100,100,100))
-        s.blit(hint, (W//2 - hint.get_width()//2, 600))
-        
-    else:
-        # --- VUE GRAPHIQUES ---
-        cpu_loads = [d.get("cpu",0) for d in hist]
-        gpu_loads = [d.get("gpu",0) for d in hist]
-        cpu_temps = [d.get("temp_cpu",0) for d in hist]
-        gpu_temps = [d.get("temp_gpu",0) for d in hist]
-                
-        # Zone 1 : CPU
-        draw_chart(s, 20, 100, W-40, 180, cpu_loads, (0, 200, 255), "CPU Load (%)")
-        
-        # Zone 2 : GPU
-        draw_chart(s, 20, 300, W-40, 180, gpu_loads, (0, 255, 100), "GPU Load (%)")
-        
-        # Zone 3 : Températures
-        draw_chart(s, 20, 500, (W-50)//2, 150, cpu_temps, (255, 100, 100), "CPU Temp", 100)
-        draw_chart(s, W//2 + 5, 500, (W-50)//2, 150, gpu_temps, (255, 180, 50), "GPU Temp", 100)
-        
-        hint = FONT_S.render("[PLAY] -> Voir Jauges", True, (100,100,100))
-        s.blit(hint, (W//2 - hint.get_width()//2, 680))
+# ================== BENCHMARK ==================
+def bench_scenarios():
+    """Etats synthétiques (pire cas réaliste) pour chaque render_*_ui."""
+    art = to_display(pygame.Surface((320,320)))
+    art.fill((180,60,60))
+    bg = to_display(make_gradient((120,60,40)))
+    hist = [{"cpu": (i*7)%100, "gpu": (i*13)%100, "temp_cpu": 40+i%30, "temp_gpu": 50+(i*3)%35,
+             "net_rx": round((i*17)%90 / 3, 2), "net_tx": 0.12, "disk_r": (i*11)%200, "disk_w": 1.5}
+            for i in range(MAX_HISTORY)]
+    cards = [{"name": f"PC de jeu numéro {i} (salon)", "base": f"http://10.0.0.{i}:5005", "ok": i != 3,
+              "active": i == 1, "m": MetricsRecord.from_dict(hist[i*7]) if i != 3 else None} for i in range(5)]
+    now_f, past_f = decode_throttled(0xF000F)
+    pi_hist = [{"temp": 60 + i%25, "throttled": 0xF000F, "throttle_now": now_f, "throttle_past": past_f,
+                "load": (3.52, 2.4, 1.9), "cpu": (i*7)%100, "cores": 4, "mem_used": 612, "mem_total": 3792,
+                "rss_mb": 88.4, "proc_cpu": (i*13)%100, "fps": 9.8, "p95_ms": 14.2} for i in range(MAX_HISTORY)]
+    return [
+        ("render_spotify_ui", ui_render.render_spotify_ui, {
+            "mode": "SPOTIFY", "title": "Un titre vraiment très long pour déborder de l'écran (Remastered 2011)",
+            "artist": "Un artiste avec un nom interminable feat. Quelqu'un d'autre", "playing": True,
+            "progress": 83000, "duration": 245000, "art_surf": art, "bg_surf": bg, "text_col": (255,255,255)}),
+        ("render_stats_ui[GAUGES]", ui_render.render_stats_ui, {
+            "mode": "STATS", "stats_view": "GAUGES", "metrics": hist[-1], "stats_history": hist}),
+        ("render_stats_ui[GRAPHS]", ui_render.render_stats_ui, {
+            "mode": "STATS", "stats_view": "GRAPHS", "metrics": hist[-1], "stats_history": hist}),
+        ("render_stats_ui[HISTORY]", ui_render.render_stats_ui, {
+            "mode": "STATS", "stats_view": "HISTORY", "stats_range_idx": 1, "stats_range": history_series({
+                "from": 0, "to": 43200, "step": 360, "ts": [i*360 for i in range(120) if not 40 <= i < 55],
+                "avg": {k: [h[k] for i, h in enumerate(hist*2) if not 40 <= i < 55] for k in hist[0]},
+                "max": {k: [h[k] for i, h in enumerate(hist*2) if not 40 <= i < 55] for k in hist[0]}})}),
+        ("render_stats_ui[HOSTS]", ui_render.render_stats_ui, {
+            "mode": "STATS", "stats_view": "HOSTS",
+            "hosts": cards, "hosts_agg": aggregate(cards)}),
+        ("render_stats_ui[PI]", ui_render.render_stats_ui, {
+            "mode": "STATS", "stats_view": "PI", "pi_health": pi_hist[-1], "pi_history": pi_hist}),
+        ("render_processes_ui", ui_render.render_processes_ui, {
+            "mode": "PROCESSES", "proc_sort": "cpu", "proc_total": 312,
+            "proc_top": [{"pid": 1000+i, "name": f"processus_avec_un_nom_long_{i:02d}.exe",
+                          "cpu": 90.0/(i+1), "mem_mb": 4000//(i+1)} for i in range(PROC_ROWS)]}),
+        ("render_mixer_ui", ui_render.render_mixer_ui, {
+            "mode": "MIXER", "mixer_idx": 10,
+            "mixer_sessions": [{"name": f"Application audio {i:02d}", "vol": (i*5)%101} for i in range(20)]}),
+        ("render_launcher_ui", ui_render.render_launcher_ui, {
+            "mode": "LAUNCHER", "launcher_idx": 25, "launcher_status": "Lancement Application 25",
+            "launcher_apps": [f"Application numéro {i:02d}" for i in range(50)]}),
+        ("render_menu_ui", ui_render.render_menu_ui, {
+            "mode": "MENU", "menu_idx": 3, "menu_msg": "Livebox-1234\nFreebox-ABCD\nSFR_WiFi\nVoisin 5G\nIoT"}),
+        ("render_alert_banner", ui_render.render_alert_banner, {
+            "alert_banner": ("GPU chaud : 91 (> 85)\nCPU saturé : 99.5 (> 95 depuis 30s)", float("inf"))}),
+    ]
 
-    rpi_t = get_rpi_temp()
-    pygame.draw.rect(s, (30,30,35), (0, H-40, W, 40))
-    t_msg = FONT_S.render(f"RPI Temp: {rpi_t}°C", True, (150,150,150))
-    s.blit(t_msg, (W//2 - t_msg.get_width()//2, H-30))
+def percentile(sorted_vals, p):
+    if not sorted_vals: return 0.0
+    k = min(len(sorted_vals)-1, int(round(p/100 * (len(sorted_vals)-1))))
+    return sorted_vals[k]
 
-    s.blit(icon_mode, (W//2 - 24, 720))
+def summarize_ms(times):
+    times = sorted(times)
+    return {
+        "frames": len(times),
+        "mean_ms": round(sum(times)/len(times), 3) if times else 0,
+        "p50_ms": round(percentile(times, 50), 3),
+        "p95_ms": round(percentile(times, 95), 3),
+        "p99_ms": round(percentile(times, 99), 3),
+        "max_ms": round(times[-1], 3) if times else 0,
+    }
 
-def render_launcher_ui(s):
-    s.fill((25, 20, 35)) # Fond violet sombre
-    render_text_centered(s, "APP LAUNCHER", FONT_XL, (255, 0, 150), 60)
-    pygame.draw.line(s, (255,0,150), (40, 90), (W-40, 90), 3)
-    
-    with state_lock:
-        apps = state["launcher_apps"]
-        idx = state["launcher_idx"]
-        status = state["launcher_status"]
-    
-    start_y = 150
-    # Affiche 5 items autour de la sélection
-    for i in range(idx-2, idx+3):
-        if 0 <= i < len(apps):
-            is_sel = (i == idx)
-            lbl = apps[i]
-            y_pos = start_y + (i - (idx-2)) * 80
-            
-            col = (255, 255, 255) if is_sel else (100, 100, 100)
-            font = FONT_L if is_sel else FONT_M
-            
-            if is_sel:
-                r = pygame.Rect(40, y_pos - 25, W-80, 60)
-                pygame.draw.rect(s, (255, 0, 150), r, border_radius=10)
-                pygame.draw.rect(s, (50, 0, 50), r.inflate(-4,-4), border_radius=10)
-            
-            render_text_centered(s, lbl, font, col, y_pos)
-    
-    hint = FONT_S.render("[PLAY] Lancer App", True, (150,150,150))
-    s.blit(hint, (W//2 - hint.get_width()//2, 750))
+def compare_report(results, compare_path):
+    with open(compare_path, "r", encoding="utf-8") as f:
+        base = json.load(f).get("results", {})
+    for name, r in results.items():
+        b = base.get(name)
+        if not b: continue
+        d50 = (r["p50_ms"] - b["p50_ms"]) / b["p50_ms"] * 100 if b["p50_ms"] else 0
+        d95 = (r["p95_ms"] - b["p95_ms"]) / b["p95_ms"] * 100 if b["p95_ms"] else 0
+        print(f"[BENCH] {name:26s} p50 {d50:+6.1f}%  p95 {d95:+6.1f}%  (vs {compare_path})")
 
-def render_menu_ui(s):
-    s.fill((30, 30, 35))
-    render_text_centered(s, "SYSTEM MENU", FONT_L, (255, 200, 0), 50)
-    pygame.draw.line(s, (255,200,0), (40, 80), (W-40, 80), 2)
-    
-    with state_lock:
-        items = state["menu_items"]
-        idx = state["menu_idx"]
-        msg = state["menu_msg"]
-    
-    y = 120
-    for i, item in enumerate(items):
-        is_sel = (i == idx)
-        col = (0, 0, 0) if is_sel else (200, 200, 200)
-        bg_col = (255, 200, 0) if is_sel else None
-        
-        txt = FONT_M.render(f"  {item['lbl']}  ", True, col)
-        if bg_col:
-            rect = txt.get_rect(center=(W//2, y))
-            pygame.draw.rect(s, bg_col, rect.inflate(20, 10), border_radius=5)
-        render_text_centered(s, item['lbl'], FONT_M, col, y)
-        y += 60
-        
-    if msg:
-        pygame.draw.rect(s, (10,10,10), (20, 500, W-40, 200), border_radius=8)
-        pygame.draw.rect(s, (100,100,100), (20, 500, W-40, 200), 2, border_radius=8)
-        lines = msg.split('\n')
-        my = 520
-        for l in lines:
-            ts = FONT_S.render(l, True, (200,255,200))
-            s.blit(ts, (40, my))
-            my += 25
-
-    inst = FONT_S.render("[PREV/NEXT] Naviguer  -  [PLAY] Valider", True, (100,100,100))
-    s.blit(inst, (W//2 - inst.get_width()//2, 760))
-
-def render_mixer_ui(s):
-    s.fill((20, 25, 30))
-    render_text_centered(s, "AUDIO MIXER", FONT_XL, (50, 150, 255), 60)
-    pygame.draw.line(s, (50,150,255), (40, 90), (W-40, 90), 3)
-        
-    with state_lock:
-        sessions = state.get("mixer_sessions", [])
-        idx = state.get("mixer_idx", 0)
-        
-    if not sessions:
-        render_text_centered(s, "Aucune application audio", FONT_M, (150,150,150), H//2)
-        return
+def run_bench(out_path, n_frames, compare_path=None):
+    results = {}
+    for name, fn, st in bench_scenarios():
+        with state_lock: state.update(st)
+        text_cache.clear()
+        text_cache_stats.update(hit=0, miss=0)
+        for _ in range(10): fn(frame)  # chauffe (caches de polices, etc.)
 
-    start_y = 150
-    # Affiche 5 items autour de la sélection
-    for i in range(idx-2, idx+3):
-        if 0 <= i < len(sessions):
-            item = sessions[i]
-            is_sel = (i == idx)
-                
-            y_pos = start_y + (i - (idx-2)) * 100
-            col = (255, 255, 255) if is_sel else (100, 100, 100)
-                
-            if is_sel:
-                pygame.draw.rect(s, (40, 40, 50), (30, y_pos-10, W-60, 90), border_radius=10)
-                pygame.draw.rect(s, (50, 150, 255), (30, y_pos-10, W-60, 90), 2, border_radius=10)
-
-            nm = FONT_L.render(item["name"], True, col)
-            s.blit(nm, (50, y_pos))
-
-            vol = item["vol"]
-            bar_w = 200
-            pygame.draw.rect(s, (50,50,50), (W-250, y_pos+15, bar_w, 15), border_radius=5)
-            
-            c_bar = (50, 255, 50)
-            if vol > 80: c_bar = (255, 50, 50)
-            elif vol > 60: c_bar = (255, 200, 0)
-            
-            pygame.draw.rect(s, c_bar, (W-250, y_pos+15, int(bar_w * (vol/100)), 15), border_radius=5)
-            
-            v_txt = FONT_M.render(f"{vol}%", True, col)
-            s.blit(v_txt, (W-250 + bar_w/2 - v_txt.get_width()/2, y_pos+40))
+        # 1. Temps de frame (sans tracemalloc qui fausserait les mesures)
+        times = []
+        for _ in range(n_frames):
+            t0 = time.perf_counter()
+            frame.fill((0,0,0))
+            fn(frame)
+            times.append((time.perf_counter() - t0) * 1000)
+        times.sort()
+
+        # 2. Allocations Python par frame
+        n_alloc = max(1, n_frames // 5)
+        gc.collect()
+        gc0 = gc.get_stats()[0]["collections"]
+        tracemalloc.start()
+        snap0 = tracemalloc.take_snapshot()
+        peak = 0
+        for _ in range(n_alloc):
+            base, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            frame.fill((0,0,0))
+            fn(frame)
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - base)
+        snap1 = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        blocks = sum(d.count_diff for d in snap1.compare_to(snap0, "filename") if d.count_diff > 0)
+
+        results[name] = {
+            **summarize_ms(times),
+            "alloc_peak_kib": round(peak/1024, 2),
+            "alloc_blocks_net": blocks,
+            "text_cache_hit": round(text_cache_stats["hit"] / max(1, sum(text_cache_stats.values())) * 100, 1),
+            "gc_gen0_per_100f": round((gc.get_stats()[0]["collections"] - gc0) * 100 / n_alloc, 2),
+        }
+        r = results[name]
+        print(f"[BENCH] {name:26s} p50 {r['p50_ms']:7.3f} ms  p95 {r['p95_ms']:7.3f} ms  "
+              f"p99 {r['p99_ms']:7.3f} ms  peak {r['alloc_peak_kib']:8.2f} KiB/f")
+
+    report = {
+        "meta": {"time": time.strftime("%Y-%m-%d %H:%M:%S"), "python": sys.version.split()[0],
+                 "pygame": pygame.version.ver, "sdl": ".".join(map(str, pygame.get_sdl_version())),
+                 "size": [W, H], "frames": n_frames},
+        "results": results,
+    }
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"[BENCH] Résultats écrits dans {out_path}")
+
+    if compare_path: compare_report(results, compare_path)
+
+# ================== REPLAY ==================
+def run_replay(path, fast=False, out_path=None, compare_path=None):
+    """Rejoue une trace sur une horloge virtuelle : les réponses passent par les
+    mêmes apply_*, les entrées par dispatch_input, et chaque frame est rendue
+    et chronométrée. fast=True : déterministe, sans attente ni affichage."""
+    global _http, replay_vt
+    events = load_trace(path)
+    if not events: sys.exit(f"[REPLAY] Trace vide ou illisible : {path}")
+    fake = _http = ReplayHttp()
+    times = {}
+    dt = 1.0 / FPS
+    vt, i, n_frames = 0.0, 0, 0
+    end = events[-1][0]
+    t_wall0 = time.perf_counter()
+    print(f"[REPLAY] {len(events)} évènements, {end:.0f}s de trace ({'rapide' if fast else 'temps réel'})")
 
-    hint = FONT_S.render("[Molette] Volume  -  [Haut/Bas] Choisir", True, (150,150,150))
-    s.blit(hint, (W//2 - hint.get_width()//2, 750))
+    while vt <= end + dt:
+        replay_vt = vt
+        while i < len(events) and events[i][0] <= vt:
+            _, kind, payload = events[i]
+            i += 1
+            if kind == "sp": apply_playback(payload)
+            elif kind == "pc":
+                fake.last[payload["p"]] = payload["d"]
+                if payload["p"] in PC_APPLY: PC_APPLY[payload["p"]](payload["d"])
+            elif kind == "in": dispatch_input(*payload)
+        tick_progress(dt * 1000)
+
+        with state_lock: m = state["mode"]
+        render = ui_render.RENDERERS.get(m)
+        t0 = time.perf_counter()
+        frame.fill((0,0,0))
+        if render: render(frame)
+        t1 = time.perf_counter()
+        ui_render.render_alert_banner(frame)
+        if render: times.setdefault(render.__name__, []).append((t1 - t0) * 1000)
+        n_frames += 1
+        if not fast:
+            pygame.event.pump()
+            present(frame)
+            delay = t_wall0 + vt - time.perf_counter()
+            if delay > 0: time.sleep(delay)
+        vt += dt
+
+    wall = time.perf_counter() - t_wall0
+    results = {k: summarize_ms(v) for k, v in times.items()}
+    all_ms = summarize_ms([t for v in times.values() for t in v])
+    for name, r in results.items():
+        print(f"[REPLAY] {name:26s} p50 {r['p50_ms']:7.3f} ms  p95 {r['p95_ms']:7.3f} ms  ({r['frames']} frames)")
+    print(f"[REPLAY] {n_frames} frames, {end:.0f}s rejouées en {wall:.1f}s (x{end/wall if wall else 0:.0f}), "
+          f"p95 global {all_ms['p95_ms']} ms")
+    if out_path:
+        report = {"meta": {"trace": str(path), "events": len(events), "trace_s": round(end, 1),
+                           "wall_s": round(wall, 2), "fast": fast, "frames": n_frames},
+                  "all": all_ms, "results": results}
+        with open(out_path, "w", encoding="utf-8") as f: json.dump(report, f, indent=2)
+        print(f"[REPLAY] Rapport écrit dans {out_path}")
+    if compare_path: compare_report(results, compare_path)
 
 # ================== MAIN LOOP ==================
 if __name__ == "__main__":
+    if BENCH:
+        run_bench(BENCH, args.bench_frames, args.bench_compare)
+        sys.exit()
+    if REPLAY:
+        run_replay(REPLAY, args.replay_fast, args.replay_out, args.bench_compare)
+        sys.exit()
+    if args.record: start_trace(args.record)
+
+    restore_snapshot()
+
+    # Init en parallèle : auth Spotify, liste d'apps et métriques (loop_metrics
+    # interroge le PC sans attendre que le client Spotify soit prêt)
+    if not cfg.get("_fallback") and not SIM_GPIO:  # GPIO simulé : jamais l'API Spotify réelle
+        threading.Thread(target=init_spotify, daemon=True).start()
+    threading.Thread(target=refresh_apps_list, daemon=True).start()
     threading.Thread(target=loop_spotify, daemon=True).start()
+    threading.Thread(target=loop_metrics, daemon=True).start()
+    if PC_DISCOVERY: threading.Thread(target=loop_discovery, daemon=True).start()
     threading.Thread(target=loop_gpio, daemon=True).start()
-    
-    threading.Thread(target=refresh_apps_list).start()
+    if SIM_GPIO: threading.Thread(target=loop_sim_gpio, args=(SIM_GPIO,), daemon=True).start()
+    threading.Thread(target=loop_perf_log, daemon=True).start()
+    threading.Thread(target=loop_pi_health, daemon=True).start()
+    threading.Thread(target=loop_snapshot, daemon=True).start()
 
     print("[INFO] Démarrage PiPanel avec Veille & Launcher...")
     set_screen_power(True)
 
+    def on_power(on):
+        if on: pygame.event.post(pygame.event.Event(WAKE_EVENT))  # débloque event.wait()
+    on_power_change(on_power)
+    last_boot_save, boot_key, boot_pending = 0, None, False
+
     while True:
+        marquee_active = False
         for e in pygame.event.get():
             if e.type == pygame.QUIT:
                 set_screen_power(True)
+                save_snapshot()
+                if boot_pending: save_boot_frame(frame)
+                stop_trace()
+                if args.latency_out: dump_latency(args.latency_out)
                 sys.exit()
+            elif e.type == pygame.KEYDOWN and DEBUG and e.key in KEYMAP:
+                wake_from_input()
+                dispatch_input(*KEYMAP[e.key])
         
         now = time.time()
         with state_lock:
@@ -784,25 +1761,45 @@ if __name__ == "__main__":
             
         if enabled and not sleeping and (now - last_interaction > SLEEP_TIMEOUT):
             print("[INFO] Mise en veille...")
+            if boot_pending: save_boot_frame(frame)  # frame encore intacte, l'écran est noirci juste après
+            boot_pending = False
             set_screen_power(False)
-            
-        if sleeping:
             screen.fill((0,0,0))
             pygame.display.flip()
-            time.sleep(0.5)
+            continue
+            
+        if sleeping:
+            # Aucun rendu en veille : on bloque sur la file SDL jusqu'au réveil
+            e = pygame.event.wait(5000)
+            if e.type == pygame.QUIT:
+                set_screen_power(True)
+                save_snapshot()
+                stop_trace()
+                sys.exit()
+            if e.type in (pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN):
+                wake_from_input()
         else:
-            with state_lock: m = state["mode"]
+            with state_lock: m, overlay = state["mode"], state["perf_overlay"]
+            t0 = time.perf_counter()
             frame.fill((0,0,0))
-            if m == "SPOTIFY": render_spotify_ui(frame)
-            elif m == "STATS": render_stats_ui(frame)
-            elif m == "MIXER": render_mixer_ui(frame)
-            elif m == "LAUNCHER": render_launcher_ui(frame)
-            elif m == "MENU": render_menu_ui(frame)
-            
-            if ROTATE_SCREEN and not DEBUG:
-                rot = pygame.transform.rotate(frame, -90)
-                screen.blit(rot, rot.get_rect(center=screen.get_rect().center))
-            else: screen.blit(frame, (0,0))
+            render = ui_render.RENDERERS.get(m)
+            if render: render(frame)
+            t_render = time.perf_counter()
+            if overlay: ui_render.render_perf_overlay(frame)
+            ui_render.render_alert_banner(frame)
             
-            pygame.display.flip()
-            clock.tick(FPS)
\ No newline at end of file
+            present(frame)
+            t1 = time.perf_counter()
+            if render: perf_frame(render.__name__, (t_render-t0)*1000, (t1-t0)*1000)
+            if "first_frame_ms" not in boot_times:
+                boot_times["first_frame_ms"] = (t1 - T_START) * 1000
+                print(f"[INFO] Première frame en {boot_times['first_frame_ms']:.0f} ms")
+
+            # Frame pour le prochain boot : sur changement de piste/mode, max 1x/5 min
+            # (le reste en attente part à la mise en veille ou à l'arrêt)
+            with state_lock: key = (m, state["track_id"], state["art_surf"] is not None)
+            if key != boot_key: boot_key, boot_pending = key, True
+            if boot_pending and now - last_boot_save > BOOT_FRAME_EVERY_S:
+                last_boot_save, boot_pending = now, False
+                threading.Thread(target=save_boot_frame, args=(frame.copy(),), daemon=True).start()
+            clock.tick(FPS_ANIM if marquee_active else FPS)
\ No newline at end of file
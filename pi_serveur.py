@@ -1,6 +1,10 @@
-from flask import Flask, jsonify, request
-import threading, time, psutil, platform, keyboard, subprocess, os
-import socket
+from flask import Flask, jsonify, request, g
+import threading, time, psutil, platform, keyboard, subprocess, os, sys, json, hashlib
+import socket, shlex, shutil, re, heapq, gzip
+from gpu_monitor import GpuSampler, NvmlBackend, FakeGpuBackend
+from app_icons import IconStore, FileIconBackend, ExeIconBackend
+from metrics_wire import MetricsEncoder, CONTENT_TYPE as METRICS_BINARY
+from metrics_history import MetricsHistory
 
 try: 
     from pycaw.pycaw import AudioUtilities, ISimpleAudioVolume
@@ -9,53 +13,193 @@ try:
 except:
     AUDIO_OK = False
 
-# ================== CONFIGURATION DES APPS ==================
+try:
+    import win32gui, win32process
+    WIN_OK = True
+except:
+    WIN_OK = False
+
+# ================== CONFIGURATION ==================
+# pi_serveur_config.json (à côté du script ou de l'exe) : APPS, APP_PROCESS, MACROS,
+# APP_ICONS (image imposée par app), intervalles des capteurs et ports. Surveillé et rechargé à chaud (config_thread).
+# L'exe embarque celui du dépôt (datas des .spec) et le recopie à côté de lui au premier lancement.
+# HISTORY : rétention de l'historique des métriques, en heures (raw_h) et jours (minute_d, hour_d).
 # Astuce: Pour jeux Steam, "steam://rungameid/ID_DU_JEU"
-APPS = {
-    "Steam": r"C:\Program Files (x86)\Steam\steam.exe",
-    "Gestionnaire Tâches": "taskmgr.exe",
-    "Discord": r"C:\Users\Giovanni\AppData\Local\Discord\app-1.0.9217\Discord.exe",
-    "Opera": r"C:\Users\Giovanni\AppData\Local\Programs\Opera GX\opera.exe",
-    "Spotify": "explorer.exe spotify:",
-    "VSCode": r"C:\Users\Giovanni\AppData\Local\Programs\Microsoft VS Code\Code.exe",
-    # Exemple : "Cyberpunk": r"D:\Games\Cyberpunk 2077\bin\x64\Cyberpunk2077.exe"
+# Etapes de MACROS, exécutées localement sur un seul appel /macro :
+#   {"launch": "App"}                       -> lance une app de APPS
+#   {"mixer": "App", "vol": 30}             -> volume absolu (%)
+#   {"mixer": "App", "change": -10}         -> volume relatif (%)
+#   {"media": "playpause"}                  -> touche média (voir MEDIA_KEYS)
+#   {"wait": 1.5}                           -> pause en secondes
+BASE_DIR = os.path.dirname(sys.executable if getattr(sys, "frozen", False) else os.path.abspath(__file__))
+CONFIG_PATH = os.path.join(BASE_DIR, "pi_serveur_config.json")
+BUNDLED_CONFIG = os.path.join(getattr(sys, "_MEIPASS", BASE_DIR), "pi_serveur_config.json")  # exe PyInstaller
+CONFIG_WATCH_S = 1.0
+DEFAULT_CONFIG = {
+    "PORT": 5005,
+    "BEACON_PORT": 5006,
+    "INTERVALS": {"cpu_s": 1.0, "temp_s": 2.0, "proc_s": 2.0, "beacon_s": 5.0},
+    "APPS": {},
+    "APP_PROCESS": {},
+    "APP_ICONS": {},
+    "MACROS": {},
+    "HISTORY": {"raw_h": 48, "minute_d": 30, "hour_d": 365},
 }
+MACRO_MAX_WAIT_S = 30
+VERSIONED_KEYS = ("APPS", "MACROS", "APP_ICONS")  # ce que le panel affiche : /apps_list, /macros_list, icônes
+
+def config_version(cfg):
+    # Empreinte du contenu : un simple "touch" ou un intervalle modifié ne fait pas recharger le panel
+    return hashlib.sha1(json.dumps({k: cfg[k] for k in VERSIONED_KEYS}, sort_keys=True).encode()).hexdigest()[:8]
+
+def load_server_config(path=CONFIG_PATH):
+    """Lit et valide le fichier ; lève une exception si invalide (l'ancienne config reste en place)."""
+    with open(path, "rb") as f: raw = f.read()
+    data = json.loads(raw.decode("utf-8"))
+    cfg = {**DEFAULT_CONFIG, **data, "INTERVALS": {**DEFAULT_CONFIG["INTERVALS"], **data.get("INTERVALS", {})},
+           "HISTORY": {**DEFAULT_CONFIG["HISTORY"], **data.get("HISTORY", {})}}
+    if not all(isinstance(k, str) and isinstance(v, str) for k, v in cfg["APPS"].items()):
+        raise ValueError("APPS doit associer des noms à des commandes (texte)")
+    for key in ("APP_PROCESS", "APP_ICONS"):  # lus tels quels par /launch/status et /apps/<nom>/icon
+        if not isinstance(cfg[key], dict) or not all(isinstance(k, str) and isinstance(v, str) for k, v in cfg[key].items()):
+            raise ValueError(f"{key} doit associer des noms d'app à du texte")
+    if not all(isinstance(v, list) for v in cfg["MACROS"].values()):
+        raise ValueError("chaque macro doit être une liste d'étapes")
+    for k, v in cfg["INTERVALS"].items():
+        if not isinstance(v, (int, float)) or v <= 0: raise ValueError(f"intervalle {k} invalide")
+    for k, v in cfg["HISTORY"].items():
+        if not isinstance(v, (int, float)) or v <= 0: raise ValueError(f"rétention {k} invalide")
+    cfg["VERSION"] = config_version(cfg)
+    return cfg
+
+def first_config():
+    """Config de démarrage. Fichier absent (exe fraîchement copié) : on recopie la config
+    embarquée à côté de l'exe pour qu'elle reste modifiable, sinon on la lit sur place."""
+    try: return load_server_config()
+    except FileNotFoundError: pass
+    if os.path.exists(BUNDLED_CONFIG) and os.path.abspath(BUNDLED_CONFIG) != os.path.abspath(CONFIG_PATH):
+        try:
+            shutil.copyfile(BUNDLED_CONFIG, CONFIG_PATH)
+            print(f"[CONFIG] {CONFIG_PATH} créé depuis la config embarquée")
+            return load_server_config()
+        except OSError as e:
+            print(f"[CONFIG] {CONFIG_PATH} non créé ({e}) : config embarquée utilisée")
+            return load_server_config(BUNDLED_CONFIG)
+    print(f"[CONFIG] {CONFIG_PATH} absent : config par défaut (aucune app)")
+    return {**DEFAULT_CONFIG, "VERSION": config_version(DEFAULT_CONFIG)}
+
+CFG = first_config()
+
+def config_thread():
+    """Remplace CFG d'un seul coup : une requête en cours garde l'ancienne référence,
+    les threads de mesure relisent leurs intervalles à chaque tour (pas de redémarrage)."""
+    global CFG
+    try: last = os.stat(CONFIG_PATH).st_mtime_ns
+    except OSError: last = None
+    while True:
+        time.sleep(CONFIG_WATCH_S)
+        try: mtime = os.stat(CONFIG_PATH).st_mtime_ns
+        except OSError: continue
+        if mtime == last: continue
+        last = mtime
+        try: new = load_server_config()
+        except Exception as e:
+            print(f"[CONFIG] Rechargement ignoré ({e}), config {CFG['VERSION']} conservée")
+            continue
+        if new == CFG: continue
+        if (new["PORT"], new["BEACON_PORT"]) != (CFG["PORT"], CFG["BEACON_PORT"]):
+            print("[CONFIG] PORT modifié : pris en compte au prochain démarrage")
+        old, CFG = CFG, new
+        print(f"[CONFIG] Rechargée (version {new['VERSION']}, {len(new['APPS'])} apps)")
+        launch_argv_cache.clear()  # cibles déplacées / installées depuis
+        if new["VERSION"] != old["VERSION"]:
+            icons.clear()  # les "pas d'icône" aussi (image ajoutée depuis) ; une image modifiée change déjà la clé
+            threading.Thread(target=warm_icons, daemon=True).start()
+
+# ================== ICONES DES APPS ==================
+# app_icons/<App>.png, APP_ICONS ou icône de l'exe ; extraites une fois, cache mémoire + disque
+ICON_SIZE = 48  # taille du launcher du panel (480x800)
+icons = IconStore([FileIconBackend(os.path.join(BASE_DIR, "app_icons"), lambda: CFG["APP_ICONS"]), ExeIconBackend()],
+                  os.path.join(BASE_DIR, ".icon_cache"))
+
+def warm_icons():
+    cfg = CFG
+    for name, target in cfg["APPS"].items():
+        icons.get(name, target, ICON_SIZE, cfg["APP_ICONS"].get(name, ""))
+
+# ================== HISTORIQUE ==================
+# metrics_history.db : chaque sample de performance_thread, agrégats minute/heure,
+# servi par /metrics/range (vue STATS > HISTORIQUE du panel)
+HISTORY_PATH = os.path.join(BASE_DIR, "metrics_history.db")
+
+def history_retention():
+    h = CFG["HISTORY"]
+    return {"raw": h["raw_h"] * 3600, "m1": h["minute_d"] * 86400, "h1": h["hour_d"] * 86400}
+
+history = MetricsHistory(HISTORY_PATH, history_retention)
 
 # ================== GLOBALES & INIT ==================
-gpu_ok = False
-nvml_handle = None
 cache_cpu_load = 0.0
-cache_gpu_load = 0
 cache_cpu_temp = "n/a"
+cache_io = {"net": {}, "disk": {}, "net_rx": 0.0, "net_tx": 0.0, "disk_r": 0.0, "disk_w": 0.0}
 
-def init_gpu():
-    global gpu_ok, nvml_handle
-    try:
-        import pynvml
-        pynvml.nvmlInit()
-        nvml_handle = pynvml.nvmlDeviceGetHandleByIndex(0)
-        gpu_ok = True
-    except: pass
+# PI_FAKE_GPU=N : N cartes simulées (tests sans GPU NVIDIA)
+gpu = GpuSampler(FakeGpuBackend(int(os.environ["PI_FAKE_GPU"])) if os.environ.get("PI_FAKE_GPU") else NvmlBackend())
 
 app = Flask(__name__)
 
 # ================== THREADS DE MONITORING (LISSAGE) ==================
 
+# Débits réseau / disque : compteurs bruts (nowrap=False), débordements gérés ici
+MB = 1048576
+io_prev = {"t": None, "net": {}, "disk": {}}
+
+def counter_delta(cur, prev):
+    if cur >= prev: return cur - prev
+    d = cur + 2**32 - prev if prev < 2**32 else 0  # compteur 32 bits qui a débordé
+    return d if 0 < d < 2**31 else cur             # sinon remis à zéro (carte réactivée...)
+
+def is_loopback(nic):
+    return nic == "lo" or nic.lower().startswith("loopback")
+
+def sample_io():
+    global cache_io
+    now = time.perf_counter()
+    net = {k: (v.bytes_recv, v.bytes_sent) for k, v in psutil.net_io_counters(pernic=True, nowrap=False).items()}
+    try: disks = psutil.disk_io_counters(perdisk=True, nowrap=False) or {}
+    except Exception: disks = {}  # pas de compteurs disque (conteneur, diskperf désactivé...)
+    disk = {k: (v.read_bytes, v.write_bytes) for k, v in disks.items()}
+    if io_prev["t"] is not None:
+        dt = now - io_prev["t"]
+        def rates(cur, prev, keys):
+            return {k: {keys[i]: round(counter_delta(cur[k][i], prev[k][i]) / dt / MB, 2) for i in (0, 1)}
+                    for k in cur if k in prev}
+        r_net = rates(net, io_prev["net"], ("rx", "tx"))
+        r_disk = rates(disk, io_prev["disk"], ("r", "w"))
+        cache_io = {
+            "net": r_net, "disk": r_disk,
+            "net_rx": round(sum(v["rx"] for k, v in r_net.items() if not is_loopback(k)), 2),
+            "net_tx": round(sum(v["tx"] for k, v in r_net.items() if not is_loopback(k)), 2),
+            "disk_r": round(sum(v["r"] for v in r_disk.values()), 2),
+            "disk_w": round(sum(v["w"] for v in r_disk.values()), 2),
+        }
+    io_prev.update(t=now, net=net, disk=disk)
+
 # 1. Thread "Rapide" : Calcule la charge CPU/GPU sur 1 seconde (Moyenne stable)
+#    + débits réseau/disque sur la même période
 def performance_thread():
-    global cache_cpu_load, cache_gpu_load
+    global cache_cpu_load
     
     while True:
         try:
-            cache_cpu_load = psutil.cpu_percent(interval=1.0)
-
-            # GPU : On lit juste après
-            if gpu_ok:
-                import pynvml
-                u = pynvml.nvmlDeviceGetUtilizationRates(nvml_handle)
-                cache_gpu_load = u.gpu
-            else:
-                cache_gpu_load = 0
+            cache_cpu_load = psutil.cpu_percent(interval=CFG["INTERVALS"]["cpu_s"])
+            sample_io()
+
+            # GPU : toutes les cartes lues juste après, en un seul passage
+            gpu.sample()
+            values = metrics_values()
+            metrics_enc.publish(values)
+            history.append(values)  # écrit par lots (history.loop)
                 
         except Exception:
             pass
@@ -81,62 +225,404 @@ def temp_thread():
             if not found: cache_cpu_temp = "n/a"
         except:
             cache_cpu_temp = "n/a"
-        time.sleep(2)
+        time.sleep(CFG["INTERVALS"]["temp_s"])
 
 
 def broadcast_presence():
     server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
     server.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
     while True:
-        try: server.sendto(b"PI_HELPER_SERVER_HERE", ('<broadcast>', 5006))
+        # port et nom pour la découverte multi-PC du panel (pc_hosts.parse_beacon)
+        beacon = b"PI_HELPER_SERVER_HERE " + json.dumps({"port": CFG["PORT"], "name": platform.node()}).encode()
+        try: server.sendto(beacon, ('<broadcast>', CFG["BEACON_PORT"]))
         except: pass
-        time.sleep(5)
+        time.sleep(CFG["INTERVALS"]["beacon_s"])
 
-# ================== ROUTES API ==================
-@app.route("/metrics")
-def metrics():
-    temp_gpu = "n/a"
-    if gpu_ok:
+# 4. Table des process incrémentale : les objets Process sont gardés d'un sample à
+#    l'autre (cpu_percent = delta depuis le sample précédent), seuls les nouveaux PIDs
+#    sont créés. Le top N et l'index nom -> PIDs sont calculés ici, pas par requête.
+PROC_TOP_N = 20
+proc_table = {}   # pid -> psutil.Process (thread de sampling uniquement)
+proc_index = {}   # nom (minuscule) -> [pids]
+proc_top = {"cpu": [], "mem": [], "total": 0, "ts": 0}
+proc_lock = threading.Lock()
+N_CPU = psutil.cpu_count() or 1
+
+def sample_processes():
+    global proc_index, proc_top
+    pids = set(psutil.pids())
+    for pid in [p for p in proc_table if p not in pids]: del proc_table[pid]
+    idx, rows = {}, []
+    for pid in pids:
+        p = proc_table.get(pid)
         try:
-            import pynvml
-            temp_gpu = pynvml.nvmlDeviceGetTemperature(nvml_handle, pynvml.NVML_TEMPERATURE_GPU)
+            if p is None:
+                p = proc_table[pid] = psutil.Process(pid)
+                p.cpu_percent(None)  # 1er appel : référence, renvoie 0
+            with p.oneshot():
+                if p.status() == psutil.STATUS_ZOMBIE: continue  # terminé, pas encore récolté
+                name = p.name()
+                cpu = p.cpu_percent(None) / N_CPU
+                rss = p.memory_info().rss
+        except psutil.Error:
+            proc_table.pop(pid, None)
+            continue
+        idx.setdefault(name.lower(), []).append(pid)
+        if pid: rows.append((cpu, rss, pid, name))  # PID 0 = "System Idle Process"
+    top_cpu = heapq.nlargest(PROC_TOP_N, rows, key=lambda r: r[0])
+    top_mem = heapq.nlargest(PROC_TOP_N, rows, key=lambda r: r[1])
+    fmt = lambda r: {"pid": r[2], "name": r[3], "cpu": round(r[0], 1), "mem_mb": round(r[1] / 1048576)}
+    top = {"cpu": [fmt(r) for r in top_cpu], "mem": [fmt(r) for r in top_mem],
+           "total": len(rows), "ts": time.time()}
+    with proc_lock:
+        proc_index = idx
+        proc_top = top
+
+def proc_thread():
+    while True:
+        try: sample_processes()
         except: pass
-        
-    return jsonify({
+        time.sleep(CFG["INTERVALS"]["proc_s"])
+
+def running_pids(proc_name):
+    with proc_lock: return list(proc_index.get(proc_name, ()))
+
+def find_new_pids(proc_name):
+    """Scan léger pour le suivi de lancement : seuls les PIDs absents de la table sont interrogés."""
+    found = []
+    for pid in psutil.pids():
+        if pid in proc_table: continue
+        try:
+            if psutil.Process(pid).name().lower() == proc_name: found.append(pid)
+        except psutil.Error: pass
+    return found
+
+# ================== ROUTES API ==================
+# Temps de traitement renvoyé au panel (mesure de latence appui -> ack)
+@app.before_request
+def start_timer():
+    g.t0 = time.perf_counter()
+
+@app.after_request
+def server_timing(resp):
+    if "t0" in g:
+        resp.headers["Server-Timing"] = f"app;dur={(time.perf_counter() - g.t0) * 1000:.2f}"
+    return resp
+
+# Réponses conditionnelles et compression : les routes liste gardent leur
+# dernier corps JSON (et sa version gzip) par clé de contenu ; un client à
+# jour (If-None-Match) reçoit un 304 sans re-sérialisation
+GZIP_MIN_BYTES = 1024
+GZIP_LEVEL = 5
+json_cache = {}  # route -> [clé, corps, etag, corps gzip ou None]
+json_cache_lock = threading.Lock()
+
+def accepts_gzip():
+    return "gzip" in request.headers.get("Accept-Encoding", "")
+
+def cached_json(route, key, build):
+    """Réponse JSON avec ETag. key décrit le contenu (comparable par ==) ;
+    build() n'est appelé, et le JSON sérialisé, que si elle a changé."""
+    with json_cache_lock: ent = json_cache.get(route)
+    if ent is None or ent[0] != key:
+        body = json.dumps(build(), separators=(",", ":")).encode()
+        ent = [key, body, '"%s"' % hashlib.sha1(body).hexdigest()[:16], None]
+        with json_cache_lock: json_cache[route] = ent
+    etag = ent[2]
+    if etag in request.headers.get("If-None-Match", ""): return "", 304, {"ETag": etag}
+    headers = {"Content-Type": "application/json", "ETag": etag, "Vary": "Accept-Encoding"}
+    if len(ent[1]) >= GZIP_MIN_BYTES and accepts_gzip():
+        if ent[3] is None: ent[3] = gzip.compress(ent[1], GZIP_LEVEL)
+        return ent[3], 200, {**headers, "Content-Encoding": "gzip"}
+    return ent[1], 200, headers
+
+@app.after_request
+def compress(resp):
+    # Les autres gros JSON (processus, historique...) sont gzippés à la volée
+    if (resp.status_code == 200 and resp.mimetype == "application/json" and not resp.direct_passthrough
+            and "Content-Encoding" not in resp.headers and accepts_gzip()):
+        data = resp.get_data()
+        if len(data) >= GZIP_MIN_BYTES:
+            resp.set_data(gzip.compress(data, GZIP_LEVEL))
+            resp.headers["Content-Encoding"] = "gzip"
+            resp.headers["Vary"] = "Accept-Encoding"
+    return resp
+
+# Encodage compact (metrics_wire) : un enregistrement publié par sample,
+# /metrics n'envoie ensuite que les champs modifiés depuis le seq du client
+metrics_enc = MetricsEncoder()
+
+def metrics_values():
+    return {
         "cpu": cache_cpu_load, 
         "temp_cpu": cache_cpu_temp,
-        "gpu": cache_gpu_load, 
-        "temp_gpu": temp_gpu
+        "gpu": gpu.first("util", 0), 
+        "temp_gpu": gpu.first("temp", "n/a"),
+        "cfg_v": CFG["VERSION"],  # le panel ne recharge /apps_list que si elle change
+        **cache_io,  # Mo/s, calculés par performance_thread
+    }
+
+@app.route("/metrics")
+def metrics():
+    if METRICS_BINARY in request.headers.get("Accept", ""):
+        try: epoch, since = int(request.args["epoch"]), int(request.args["since"])
+        except (KeyError, ValueError): epoch = since = None
+        return metrics_enc.encode(epoch, since), 200, {"Content-Type": METRICS_BINARY}
+    return jsonify({
+        **metrics_values(),
+        "gpus": gpu.snapshot(),  # toutes les cartes, échantillonnées par performance_thread
     })
 
+# ================== ACTIONS (routes & macros) ==================
+MEDIA_KEYS = {
+    "playpause": "play/pause media",
+    "next": "next track",
+    "prev": "previous track",
+    "vol_up": "volume up",
+    "vol_down": "volume down",
+    "mute_toggle": "volume mute",
+}
+
+def do_media(cmd):
+    key = MEDIA_KEYS.get(cmd.lower())
+    if key: keyboard.send(key)
+    return True
+
+# --- Registre de lancement ---
+LAUNCH_UP_TIMEOUT_S = 30
+LAUNCH_POLL_S = 0.25
+URI_RE = re.compile(r"^[a-z][a-z0-9+.-]+:", re.I)  # steam://..., spotify: (pas "C:\")
+launch_lock = threading.Lock()
+launches = {}  # app -> {"pid", "t0", "t_up", "up_ms", "exited", "state": starting | up | exited | timeout | error}
+LAUNCH_INDEX_LAG_S = 5  # "up" sans process fils suivi (URI) : compté lancé le temps que proc_index le voie
+
+LAUNCH_ARGV_MISS_TTL_S = 30  # cible pas (encore) installée : on re-cherche au bout de ce délai
+launch_argv_cache = {}  # cible -> (argv ou None, expiration monotonic) ; vidé au rechargement de config
+
+def launch_argv(target):
+    """Commande sans shell si possible, None sinon (mis en cache : /launch/status l'appelle
+    souvent ; un exe introuvable n'est gardé que LAUNCH_ARGV_MISS_TTL_S)."""
+    hit = launch_argv_cache.get(target)
+    now = time.monotonic()
+    if hit and now < hit[1]: return hit[0]
+    ttl = float("inf")
+    if os.path.isfile(target): argv = (target,)
+    elif any(ch in target for ch in "|&<>;"): argv = None  # vraie ligne de shell
+    else:
+        try: argv = shlex.split(target, posix=(os.name != "nt"))
+        except ValueError: argv = []
+        if argv and shutil.which(argv[0]): argv = tuple(argv)
+        else: argv, ttl = None, LAUNCH_ARGV_MISS_TTL_S
+    if len(launch_argv_cache) >= 128: launch_argv_cache.clear()
+    launch_argv_cache[target] = (argv, now + ttl)
+    return argv
+
+def app_proc_name(app_name):
+    cfg = CFG
+    if app_name in cfg["APP_PROCESS"]: return cfg["APP_PROCESS"][app_name].lower()
+    argv = launch_argv(cfg["APPS"][app_name])
+    if not argv: return None
+    exe = os.path.basename(argv[0]).lower()
+    return None if exe == "explorer.exe" else exe
+
+def spawn_app(target):
+    """Renvoie le Popen lancé (None pour une URI ouverte par le système)."""
+    argv = launch_argv(target)
+    if argv:
+        return subprocess.Popen(list(argv), cwd=os.path.dirname(argv[0]) or None)
+    if URI_RE.match(target) and hasattr(os, "startfile"):
+        os.startfile(target)
+        return None
+    return subprocess.Popen(target, shell=True)  # dernier recours
+
+def entry_running(e):
+    """Lancement suivi encore en vie : notre fils tant qu'il n'est pas sorti, sinon
+    (URI, pas de fils) un "up" récent, le temps que proc_index le rattrape."""
+    if e.get("state") != "up": return False
+    if e.get("exited") is not None: return not e["exited"]
+    return time.time() - e.get("t_up", 0) < LAUNCH_INDEX_LAG_S
+
+def has_window(pids):
+    """Fenêtre principale visible (Windows). Sans pywin32, le process suffit."""
+    if not WIN_OK: return True
+    found = []
+    def cb(hwnd, _):
+        if win32gui.IsWindowVisible(hwnd) and win32gui.GetWindowText(hwnd):
+            if win32process.GetWindowThreadProcessId(hwnd)[1] in pids: found.append(hwnd)
+    win32gui.EnumWindows(cb, None)
+    return bool(found)
+
+def watch_launch(entry, proc, child=None, via_launcher=False):
+    """via_launcher : APP_PROCESS impose un autre process que le fils (lanceur qui rend la main)."""
+    t0 = time.perf_counter()
+    state = "timeout"
+    while time.perf_counter() - t0 < LAUNCH_UP_TIMEOUT_S:
+        time.sleep(LAUNCH_POLL_S)
+        alive = child is None or child.poll() is None  # poll() récolte le fils (pas de zombie)
+        pids = set()
+        if proc:
+            pids.update(running_pids(proc))
+            pids.update(find_new_pids(proc))
+        elif entry["pid"] and alive and psutil.pid_exists(entry["pid"]):
+            pids.add(entry["pid"])
+        if not pids and not alive and not via_launcher:
+            state = "exited"  # sortie avant fenêtre : un relancement n'attend pas le timeout
+            break
+        if pids and has_window(pids):
+            with launch_lock:
+                entry["up_ms"] = round((time.perf_counter() - t0) * 1000)
+                entry["t_up"] = time.time()
+            state = "up"
+            break
+    with launch_lock: entry["state"] = state
+    if child is not None:
+        child.wait()  # jusqu'à la fermeture de l'app : récolte le process, "running" retombe
+        with launch_lock: entry["exited"] = True
+
+def do_launch(app_name):
+    apps = CFG["APPS"]
+    if app_name not in apps: return False, "Inconnu"
+    proc = app_proc_name(app_name)
+    with launch_lock:
+        cur = launches.get(app_name)
+        if cur and cur["state"] == "starting": return True, f"{app_name} démarre..."
+        if proc and running_pids(proc): return True, f"{app_name} déjà lancé"
+        if cur and entry_running(cur): return True, f"{app_name} déjà lancé"
+        entry = {"pid": None, "t0": time.time(), "t_up": None, "up_ms": None, "exited": None, "state": "starting"}
+        launches[app_name] = entry
+    try:
+        child = spawn_app(apps[app_name])
+        with launch_lock:
+            if child is not None: entry["pid"], entry["exited"] = child.pid, False
+    except:
+        with launch_lock: entry["state"] = "error"
+        raise
+    threading.Thread(target=watch_launch, args=(entry, proc, child, app_name in CFG["APP_PROCESS"]), daemon=True).start()
+    return True, f"Lancement {app_name}"
+
+def do_mixer_set(target_name, change=0, vol=None):
+    """Volume relatif (change, en %) ou absolu (vol, en %). Renvoie le nouveau volume ou None."""
+    if not AUDIO_OK: return None
+    pythoncom.CoInitialize()
+    sessions = AudioUtilities.GetAllSessions()
+    for session in sessions:
+        if session.Process and session.Process.name().replace(".exe", "") == target_name:
+            cur = session.SimpleAudioVolume.GetMasterVolume()
+            new_vol = vol / 100.0 if vol is not None else cur + (change / 100.0)
+            new_vol = max(0.0, min(1.0, new_vol))
+            session.SimpleAudioVolume.SetMasterVolume(new_vol, None)
+            return int(new_vol*100)
+    return None
+
+def run_step(step):
+    if "launch" in step:
+        return do_launch(step["launch"])[0]
+    if "mixer" in step:
+        return do_mixer_set(step["mixer"], step.get("change", 0), step.get("vol")) is not None
+    if "media" in step:
+        return do_media(step["media"])
+    if "wait" in step:
+        time.sleep(min(float(step["wait"]), MACRO_MAX_WAIT_S))
+        return True
+    return False
+
+def step_label(step):
+    for k in ("launch", "mixer", "media", "wait"):
+        if k in step: return f"{k} {step[k]}"
+    return "?"
+
+# ================== ROUTES ==================
 @app.route("/media", methods=["POST"])
 def media():
     try:
         data = request.get_json(force=True) or {}
-        cmd = data.get("cmd", "").lower()
-        if cmd == "playpause": keyboard.send("play/pause media")
-        elif cmd == "next": keyboard.send("next track")
-        elif cmd == "prev": keyboard.send("previous track")
-        elif cmd == "vol_up": keyboard.send("volume up")
-        elif cmd == "vol_down": keyboard.send("volume down")
-        elif cmd == "mute_toggle": keyboard.send("volume mute")
-        return jsonify({"ok": True})
+        return jsonify({"ok": do_media(data.get("cmd", ""))})
     except: return jsonify({"ok": False})
 
 @app.route("/launch", methods=["POST"])
 def launch():
     try:
         data = request.get_json(force=True) or {}
-        app_name = data.get("name", "")
-        if app_name in APPS:
-            subprocess.Popen(APPS[app_name], shell=True)
-            return jsonify({"ok": True, "msg": f"Lancement {app_name}"})
-        return jsonify({"ok": False, "msg": "Inconnu"})
+        ok, msg = do_launch(data.get("name", ""))
+        return jsonify({"ok": ok, "msg": msg})
     except Exception as e: return jsonify({"ok": False, "msg": str(e)})
 
+@app.route("/launch/status")
+def launch_status():
+    with launch_lock: snap = {k: dict(v) for k, v in launches.items()}
+    out = {}
+    for name in CFG["APPS"]:
+        proc = app_proc_name(name)
+        pids = running_pids(proc) if proc else []
+        e = snap.get(name, {})
+        out[name] = {"running": bool(pids) or entry_running(e), "pids": pids,
+                     "state": e.get("state"), "up_ms": e.get("up_ms"), "launched_at": e.get("t0")}
+    return jsonify(out)
+
+@app.route("/processes/top")
+def processes_top():
+    by = request.args.get("by", "cpu")
+    if by not in ("cpu", "mem"): by = "cpu"
+    try: n = max(1, min(PROC_TOP_N, int(request.args.get("n", 10))))
+    except ValueError: n = 10
+    with proc_lock: top = proc_top
+    return jsonify({"by": by, "procs": top[by][:n], "total": top["total"], "ts": top["ts"]})
+
+@app.route("/macro", methods=["POST"])
+def macro():
+    data = request.get_json(force=True) or {}
+    name = data.get("name", "")
+    macros = CFG["MACROS"]
+    if name not in macros: return jsonify({"ok": False, "msg": "Macro inconnue", "steps": []})
+    t_start = time.perf_counter()
+    steps = []
+    for step in macros[name]:
+        t0 = time.perf_counter()
+        try: ok, err = run_step(step), None
+        except Exception as e: ok, err = False, str(e)
+        res = {"step": step_label(step), "ok": ok, "ms": round((time.perf_counter() - t0) * 1000, 1)}
+        if err: res["err"] = err
+        steps.append(res)
+    total = round((time.perf_counter() - t_start) * 1000, 1)
+    n_ok = sum(1 for r in steps if r["ok"])
+    return jsonify({"ok": n_ok == len(steps), "msg": f"{name}: {n_ok}/{len(steps)} OK en {total/1000:.1f}s",
+                    "steps": steps, "total_ms": total})
+
+@app.route("/apps/<name>/icon")
+def app_icon(name):
+    cfg = CFG
+    if name not in cfg["APPS"]: return jsonify({"ok": False}), 404
+    try: size = max(16, min(256, int(request.args.get("size", ICON_SIZE))))
+    except ValueError: size = ICON_SIZE
+    png, etag = icons.get(name, cfg["APPS"][name], size, cfg["APP_ICONS"].get(name, ""))
+    if png is None: return jsonify({"ok": False}), 404
+    if request.headers.get("If-None-Match") == etag: return "", 304, {"ETag": etag}
+    return png, 200, {"Content-Type": "image/png", "ETag": etag, "Cache-Control": "max-age=3600"}
+
+@app.route("/macros_list")
+def macros_list():
+    cfg = CFG
+    return cached_json("/macros_list", cfg["VERSION"], lambda: list(cfg["MACROS"].keys()))
+
+@app.route("/metrics/range")
+def metrics_range():
+    # from / to : secondes unix, ou relatives à maintenant si <= 0 (from=-43200 = 12 dernières heures)
+    now = time.time()
+    try:
+        to = float(request.args.get("to", 0))
+        frm = float(request.args.get("from", -3600))
+        step = float(request.args.get("step", 60))
+    except ValueError:
+        return jsonify({"ok": False, "msg": "from, to et step doivent être des nombres"}), 400
+    if to <= 0: to += now
+    if frm <= 0: frm += now
+    if not history.ok: return jsonify({"ok": False, "msg": "Historique indisponible"}), 503
+    if frm > to: return jsonify({"ok": False, "msg": "from > to"}), 400
+    return jsonify({"ok": True, **history.range(frm, to, step)})
+
 @app.route("/mixer/list")
 def mixer_list():
-    if not AUDIO_OK: return jsonify([])
+    if not AUDIO_OK: return cached_json("/mixer/list", [], list)
     sessions_list = []
     seen_names = set()
     
@@ -163,42 +649,38 @@ def mixer_list():
         print(f"[ERROR] Mixer: {e}")
     
     sessions_list.sort(key=lambda x: x["name"])
-    return jsonify(sessions_list)
+    return cached_json("/mixer/list", sessions_list, lambda: sessions_list)
 
 @app.route("/mixer/set", methods=["POST"])
 def mixer_set():
     if not AUDIO_OK: return jsonify({"ok": False})
     try:
         data = request.get_json(force=True)
-        target_name = data.get("name")
-        change = data.get("change", 0)
-        
-        pythoncom.CoInitialize()
-        sessions = AudioUtilities.GetAllSessions()
-        for session in sessions:
-            if session.Process and session.Process.name().replace(".exe", "") == target_name:
-                vol = session.SimpleAudioVolume.GetMasterVolume()
-                new_vol = max(0.0, min(1.0, vol + (change / 100.0)))
-                session.SimpleAudioVolume.SetMasterVolume(new_vol, None)
-                return jsonify({"ok": True, "new_vol": int(new_vol*100)})
+        new_vol = do_mixer_set(data.get("name"), data.get("change", 0), data.get("vol"))
+        if new_vol is not None: return jsonify({"ok": True, "new_vol": new_vol})
     except: pass
     return jsonify({"ok": False})
 
 @app.route("/apps_list")
 def apps_list():
-    return jsonify(list(APPS.keys()))
+    cfg = CFG
+    return cached_json("/apps_list", cfg["VERSION"], lambda: {"version": cfg["VERSION"], "apps": list(cfg["APPS"].keys())})
 
 # ================== MAIN ==================
 if __name__ == "__main__":
     import multiprocessing
     multiprocessing.freeze_support()  
-    init_gpu()
+    gpu.start()
+    history.start(thread=True)
     # Démarrage des lisseurs usage CPU/GPU et Température
     threading.Thread(target=broadcast_presence, daemon=True).start()
     threading.Thread(target=temp_thread, daemon=True).start()
     threading.Thread(target=performance_thread, daemon=True).start()
+    threading.Thread(target=proc_thread, daemon=True).start()
+    threading.Thread(target=config_thread, daemon=True).start()
+    threading.Thread(target=warm_icons, daemon=True).start()
 
     try:
-        app.run(host="0.0.0.0", port=5005, threaded=True, debug=False)
+        app.run(host="0.0.0.0", port=CFG["PORT"], threaded=True, debug=False)
     except Exception as e:
         print(f"Erreur: {e}")
\ No newline at end of file
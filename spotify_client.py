@@ -0,0 +1,102 @@
+"""Enveloppe du client spotipy pour le PiPanel.
+
+- respecte Retry-After sur les 429, backoff exponentiel avec jitter sinon ;
+- rafraîchit le token en tâche de fond avant expiration (jamais pendant un poll) ;
+- compte requêtes, erreurs et latence par endpoint.
+"""
+import random, threading, time
+
+
+class SpotifyClient:
+    def __init__(self, sp, base_backoff_s=1.0, max_backoff_s=60.0, refresh_margin_s=300):
+        self.sp = sp
+        self.base_backoff_s = base_backoff_s
+        self.max_backoff_s = max_backoff_s
+        self.refresh_margin_s = refresh_margin_s
+        self.lock = threading.Lock()
+        self.backoff_until = 0.0
+        self.failures = 0
+        self.stats = {}  # endpoint -> {"count", "errors", "throttled", "total_ms", "last_ms"}
+        self.refreshes = 0
+
+    # --- Appels ---
+    def ready(self):
+        """False tant qu'un backoff (429 ou erreurs) est en cours."""
+        return time.time() >= self.backoff_until
+
+    def backoff_remaining(self):
+        return max(0.0, self.backoff_until - time.time())
+
+    def call(self, endpoint, *args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            res = getattr(self.sp, endpoint)(*args, **kwargs)
+        except Exception as e:
+            self._record(endpoint, t0, e)
+            raise
+        self._record(endpoint, t0, None)
+        return res
+
+    def current_playback(self):
+        return self.call("current_playback")
+
+    def _record(self, endpoint, t0, err):
+        ms = (time.perf_counter() - t0) * 1000
+        status = getattr(err, "http_status", None)
+        with self.lock:
+            st = self.stats.setdefault(endpoint, {"count": 0, "errors": 0, "throttled": 0, "total_ms": 0.0, "last_ms": 0.0})
+            st["count"] += 1
+            st["total_ms"] += ms
+            st["last_ms"] = ms
+            if err is None:
+                self.failures = 0
+                return
+            st["errors"] += 1
+            if status == 429:
+                st["throttled"] += 1
+                headers = getattr(err, "headers", None) or {}
+                try: delay = float(headers.get("Retry-After", self.base_backoff_s))
+                except ValueError: delay = self.base_backoff_s
+                delay += random.uniform(0, 0.5)
+            else:
+                self.failures += 1
+                cap = min(self.max_backoff_s, self.base_backoff_s * 2 ** (self.failures - 1))
+                delay = random.uniform(cap / 2, cap)  # jitter : évite les rafales synchronisées
+            self.backoff_until = max(self.backoff_until, time.time() + delay)
+        if status == 401:
+            threading.Thread(target=self.refresh_token, kwargs={"force": True}, daemon=True).start()
+
+    # --- Token ---
+    def refresh_token(self, force=False):
+        auth = getattr(self.sp, "auth_manager", None)
+        handler = getattr(auth, "cache_handler", None)
+        if auth is None or handler is None or not hasattr(auth, "refresh_access_token"): return
+        token = handler.get_cached_token()
+        if not token or "refresh_token" not in token: return
+        if force or token.get("expires_at", 0) - time.time() < self.refresh_margin_s:
+            try:
+                auth.refresh_access_token(token["refresh_token"])
+                with self.lock: self.refreshes += 1
+            except Exception as e:
+                print(f"[SPOTIFY] Rafraîchissement du token impossible: {e}")
+
+    def loop_refresh(self, every_s=30):
+        while True:
+            self.refresh_token()
+            time.sleep(every_s)
+
+    def start(self):
+        threading.Thread(target=self.loop_refresh, daemon=True).start()
+        return self
+
+    # --- Stats ---
+    def snapshot(self):
+        with self.lock:
+            return {
+                "backoff_s": round(self.backoff_remaining(), 1),
+                "refreshes": self.refreshes,
+                "endpoints": {k: {"count": v["count"], "errors": v["errors"], "throttled": v["throttled"],
+                                  "avg_ms": round(v["total_ms"] / v["count"]) if v["count"] else 0,
+                                  "last_ms": round(v["last_ms"])}
+                              for k, v in self.stats.items()},
+            }
@@ -0,0 +1,93 @@
+import json, sys, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from spotipy import Spotify
+import requests
+from spotify_client import SpotifyClient
+
+# -------------------------------
+# Faux serveur Spotify local
+# -------------------------------
+# Toutes les 15 requêtes : un 429 avec Retry-After ; toutes les 40 : un 503.
+# Le serveur vérifie que le client ne revient pas avant la fin du Retry-After.
+PORT = 8899
+RETRY_AFTER_S = 2
+DURATION_S = 20
+
+calls = []            # horodatage des requêtes reçues
+blocked_until = [0.0]  # fin du dernier Retry-After envoyé
+violations = []
+
+PLAYBACK = {
+    "is_playing": True,
+    "progress_ms": 42000,
+    "item": {"id": "fake-track", "name": "Fake Track", "duration_ms": 180000,
+             "artists": [{"name": "Fake Artist"}], "album": {"images": []}},
+}
+
+class FakeSpotify(BaseHTTPRequestHandler):
+    def log_message(self, *a): pass
+
+    def do_GET(self):
+        now = time.time()
+        calls.append(now)
+        if now < blocked_until[0]:
+            violations.append(round(blocked_until[0] - now, 2))
+        n = len(calls)
+        if n % 15 == 0:
+            blocked_until[0] = now + RETRY_AFTER_S
+            self.reply(429, {"error": {"status": 429, "message": "API rate limit exceeded"}},
+                       {"Retry-After": str(RETRY_AFTER_S)})
+        elif n % 40 == 0:
+            self.reply(503, {"error": {"status": 503, "message": "Service unavailable"}})
+        elif self.path.startswith("/v1/me/player"):
+            self.reply(200, PLAYBACK)
+        else:
+            self.reply(404, {"error": {"status": 404, "message": "Not found"}})
+
+    def reply(self, code, body, headers=None):
+        data = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items(): self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+server = ThreadingHTTPServer(("127.0.0.1", PORT), FakeSpotify)
+threading.Thread(target=server.serve_forever, daemon=True).start()
+
+# -------------------------------
+# Client : même config que pi_panel.py
+# -------------------------------
+raw = Spotify(auth="fake-token", requests_session=requests.Session(), requests_timeout=2)
+raw.prefix = f"http://127.0.0.1:{PORT}/v1/"
+client = SpotifyClient(raw, base_backoff_s=0.5, max_backoff_s=5)
+
+print(f"=== Test du client Spotify contre le faux serveur ({DURATION_S}s) ===")
+ok = err = skipped = 0
+t_end = time.time() + DURATION_S
+try:
+    while time.time() < t_end:
+        if not client.ready():
+            skipped += 1
+        else:
+            try:
+                client.current_playback()
+                ok += 1
+            except Exception as e:
+                err += 1
+                print(f"Erreur {getattr(e, 'http_status', '?')} -> backoff {client.backoff_remaining():.1f}s")
+        time.sleep(0.1)
+except KeyboardInterrupt:
+    pass
+
+print(f"\nOK: {ok}  Erreurs: {err}  Polls sautés (backoff): {skipped}  Requêtes serveur: {len(calls)}")
+print(json.dumps(client.snapshot(), indent=2))
+if violations:
+    print(f"ECHEC : {len(violations)} requêtes envoyées pendant un Retry-After {violations}")
+    sys.exit(1)
+print("Retry-After respecté.")
+server.shutdown()
@@ -0,0 +1,99 @@
+import sys, time
+from pathlib import Path
+
+# -------------------------------
+# Moteur d'alertes sur horloge virtuelle
+# -------------------------------
+# Un sample toutes les 2 s (cadence METRICS_POLL_S) : seuil avec hystérésis,
+# CPU bloqué N secondes, montée en température trop rapide, trous dans le flux,
+# coût par sample indépendant de la taille de fenêtre (O(1)), puis un replay
+# --replay-fast qui doit déclencher (et faire expirer) au même instant virtuel.
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from alerts import AlertEngine, parse_rules, DEFAULT_RULES
+from metrics_wire import MetricsRecord
+
+DT = 2.0
+ok = True
+
+def run(specs, series, key):
+    """series : valeurs successives de key ; renvoie les index des samples qui déclenchent."""
+    rules, errors = parse_rules(specs)
+    assert not errors, errors
+    eng = AlertEngine(rules)
+    hits = []
+    for i, v in enumerate(series):
+        if eng.update({key: v}, t=i * DT): hits.append(i)
+    return hits
+
+def check(label, got, want):
+    global ok
+    print(f"  {label:38s} -> {got} {'OK' if got == want else f'ECHEC (attendu {want})'}")
+    ok &= got == want
+
+print("=== Règles ===")
+gpu = [70, 84, 86, 90, 83, 86, 79, 86]
+check("seuil GPU > 85, réarmé sous 80", run(DEFAULT_RULES[:1], gpu, "temp_gpu"), [2])
+check("idem sans cooldown", run([{**DEFAULT_RULES[0], "cooldown_s": 0}], gpu, "temp_gpu"), [2, 7])
+
+cpu = [50] + [99] * 20 + [40] + [99] * 10
+check("CPU > 95 pendant 30 s", run(DEFAULT_RULES[1:], cpu, "cpu"), [16])
+
+spike = [99] * 10 + [60] + [99] * 20
+check("CPU > 95 interrompu : la fenêtre repart", run(DEFAULT_RULES[1:], spike, "cpu"), [26])
+
+temp = [50, 50, 51, 51, 52, 58, 66, 70, 71, 71]
+rate = [{"name": "Chauffe", "metric": "temp_cpu", "type": "rate", "op": ">", "value": 1.5, "window_s": 6}]
+check("temp_cpu > 1.5 °C/s sur 6 s", run(rate, temp, "temp_cpu"), [6])
+
+holes = [99] * 8 + [None] + [99] * 16
+check("trou dans le flux (n/a)", run(DEFAULT_RULES[1:], holes, "cpu"), [23])
+
+low = [{"name": "Disque lent", "metric": "disk_r", "type": "sustained", "op": "<", "value": 1, "for_s": 10}]
+check("sustained '<'", run(low, [5, 0.5, 0.2, 0.1, 0.3, 0.4, 0.2, 9], "disk_r"), [6])
+
+_, errors = parse_rules([{"metric": "cpu"}, {"metric": "cpu", "value": 1, "type": "bof"},
+                         {"metric": "cpu", "value": 1, "type": "sustained"}])
+print(f"  règles invalides ignorées : {len(errors)}/3")
+ok &= len(errors) == 3
+
+print("\n=== Record /metrics ===")
+eng = AlertEngine(parse_rules(DEFAULT_RULES)[0])
+rec = MetricsRecord.from_dict({"cpu": 12.5, "temp_gpu": 91})
+msgs = eng.update(rec, t=0)
+print(f"  {msgs}")
+ok &= msgs == ["GPU chaud : 91 (> 85)"]
+
+print("\n=== Coût par sample ===")
+for window in (10, 600, 36000):
+    rules, _ = parse_rules([{"metric": "cpu", "type": "sustained", "value": 95, "for_s": window},
+                            {"metric": "cpu", "type": "rate", "value": 5, "window_s": window}])
+    eng = AlertEngine(rules)
+    n = 50000
+    t0 = time.perf_counter()
+    for i in range(n): eng.update({"cpu": 50 + (i * 37) % 50}, t=i * DT)
+    print(f"  fenêtre {window:6d} s : {(time.perf_counter() - t0) / n * 1e6:.2f} µs/sample")
+
+print("\n=== Replay rapide (horloge virtuelle) ===")
+import json, tempfile
+trace = Path(tempfile.mkdtemp()) / "trace.jsonl"
+with open(trace, "w") as f:
+    for i in range(31):  # 60 s de trace : CPU à 99 % pendant 40 s
+        f.write(json.dumps([i * DT, "pc", {"p": "/metrics", "d": {"cpu": 99 if i * DT < 40 else 50}}]) + "\n")
+sys.argv = ["pi_panel.py", "--replay", str(trace), "--replay-fast", "--helper", "http://127.0.0.1:9"]
+import pi_panel as p
+raised = []
+real_raise = p.raise_alert
+p.raise_alert = lambda msgs: raised.append((p.replay_vt, msgs)) or real_raise(msgs)
+p.run_replay(str(trace), fast=True)
+with p.state_lock: banner = p.state["alert_banner"]
+print(f"  alertes : {raised}   bannière en fin de trace : {banner}")
+eng = AlertEngine(parse_rules(DEFAULT_RULES)[0])
+want = [i * DT for i in range(31) if eng.update({"cpu": 99 if i * DT < 40 else 50}, t=i * DT)]
+print(f"  attendu (moteur seul, mêmes instants) : {want}")
+ok &= len(raised) == 1 and raised[0][1][0].startswith("CPU saturé") and round(raised[0][0], 3) == want[0]
+ok &= banner is None  # 20 s virtuelles après, avant la fin de la trace
+
+print("OK" if ok else "ECHEC")
+sys.exit(0 if ok else 1)
@@ -0,0 +1,64 @@
+import gzip, json, sys, time
+from pathlib import Path
+
+# -------------------------------
+# GET conditionnels et gzip
+# -------------------------------
+# /apps_list et /mixer/list : ETag stable, 304 sans re-sérialisation quand le
+# contenu n'a pas changé, gzip au-delà de GZIP_MIN_BYTES ; /processes/top
+# (JSON ordinaire) gzippé à la volée par compress().
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import pi_serveur as srv
+
+N = 500
+client = srv.app.test_client()
+apps = {f"Application {i:03d}": f"C:/Programmes/app_{i:03d}/app.exe" for i in range(150)}
+srv.CFG = {**srv.CFG, "APPS": apps, "VERSION": "aaaaaaaa"}
+
+builds = [0]
+orig = srv.cached_json
+def counting(route, key, build):
+    def b():
+        builds[0] += 1
+        return build()
+    return orig(route, key, b)
+srv.cached_json = counting
+
+print("=== /apps_list ===")
+r1 = client.get("/apps_list")
+etag = r1.headers["ETag"]
+t0 = time.perf_counter()
+for _ in range(N): r = client.get("/apps_list", headers={"If-None-Match": etag})
+dt304 = (time.perf_counter() - t0) / N * 1000
+rz = client.get("/apps_list", headers={"Accept-Encoding": "gzip"})
+plain = json.loads(r1.data)
+print(f"  200 : {len(r1.data)} o, gzip {len(rz.data)} o ({rz.headers.get('Content-Encoding')})")
+print(f"  304 : {r.status_code}, {len(r.data)} o, {dt304:.3f} ms/requête")
+print(f"  Sérialisations pour {N + 2} requêtes : {builds[0]}")
+ok = (r.status_code == 304 and builds[0] == 1 and rz.headers.get("Content-Encoding") == "gzip"
+      and json.loads(gzip.decompress(rz.data)) == plain and len(plain["apps"]) == len(apps))
+
+# Config rechargée : nouvelle version -> nouvel ETag, l'ancien ne vaut plus
+srv.CFG = {**srv.CFG, "APPS": {"Steam": "steam.exe"}, "VERSION": "bbbbbbbb"}
+r2 = client.get("/apps_list", headers={"If-None-Match": etag})
+print(f"  Après rechargement : {r2.status_code}, apps={r2.get_json()['apps']}")
+ok &= r2.status_code == 200 and r2.headers["ETag"] != etag
+
+print("\n=== /mixer/list ===")
+m1 = client.get("/mixer/list")
+m2 = client.get("/mixer/list", headers={"If-None-Match": m1.headers["ETag"]})
+print(f"  {m1.status_code} puis {m2.status_code} (audio {'dispo' if srv.AUDIO_OK else 'absent'})")
+ok &= m1.status_code == 200 and m2.status_code == 304
+
+print("\n=== /processes/top (gzip à la volée) ===")
+srv.sample_processes()
+p1 = client.get("/processes/top?n=50")
+p2 = client.get("/processes/top?n=50", headers={"Accept-Encoding": "gzip"})
+print(f"  {len(p1.data)} o -> {len(p2.data)} o ({p2.headers.get('Content-Encoding', 'non compressé')})")
+if len(p1.data) >= srv.GZIP_MIN_BYTES:
+    ok &= p2.headers.get("Content-Encoding") == "gzip" and json.loads(gzip.decompress(p2.data))["total"] == p1.get_json()["total"]
+
+print("OK" if ok else "ECHEC")
+sys.exit(0 if ok else 1)
@@ -0,0 +1,57 @@
+import os, sys, time
+from pathlib import Path
+
+# -------------------------------
+# Sampler GPU sans GPU
+# -------------------------------
+# Fait tourner pi_serveur.py avec FakeGpuBackend (PI_FAKE_GPU) et vérifie que
+# /metrics ne lit que le cache : le backend n'est appelé que par le sampler.
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.environ["PI_FAKE_GPU"] = "3"
+
+import pi_serveur
+from gpu_monitor import GpuSampler, FakeGpuBackend
+
+N_REQUESTS = 500
+DURATION_S = 3
+
+gpu = pi_serveur.gpu.start()
+backend = gpu.backend
+print(f"=== {len(gpu.devices)} GPU simulés : {[d['name'] for d in gpu.devices]} ===")
+
+# Sampler seul, à sa cadence, pendant que le client martèle /metrics
+gpu.interval_s = 0.1
+import threading
+threading.Thread(target=gpu.loop, daemon=True).start()
+time.sleep(0.3)
+
+client = pi_serveur.app.test_client()
+calls_before = backend.calls
+t0 = time.perf_counter()
+for _ in range(N_REQUESTS):
+    data = client.get("/metrics").get_json()
+dt_req = (time.perf_counter() - t0) / N_REQUESTS * 1000
+time.sleep(max(0, DURATION_S - (time.perf_counter() - t0)))
+calls = backend.calls - calls_before
+elapsed = time.perf_counter() - t0
+
+rate = calls / len(gpu.devices) / elapsed
+print(f"/metrics : {dt_req:.2f} ms/requête, {len(data['gpus'])} cartes dans la réponse")
+print(f"Lectures backend : {calls} en {elapsed:.1f}s -> {rate:.1f} samples/s/carte (attendu ~{1/gpu.interval_s:.0f})")
+for d in data["gpus"]:
+    print(f"  {d['name']}: {d['util']}%  {d['temp']}°C  {d['vram_used_mb']}/{d['vram_total_mb']} Mo  "
+          f"{d['clock_mhz']} MHz  {d['power_w']} W")
+
+# Horloge virtuelle : valeurs déterministes
+clock = [0.0]
+fake = GpuSampler(FakeGpuBackend(1, clock=lambda: clock[0])).start()
+fake.sample()
+u0 = fake.first("util")
+clock[0] = 5 * 3.1416 / 2
+fake.sample()
+print(f"Horloge virtuelle : util {u0}% -> {fake.first('util')}%")
+
+ok = calls <= (elapsed / gpu.interval_s + 2) * len(gpu.devices) and len(data["gpus"]) == 3 and u0 != fake.first("util")
+print("OK : /metrics sert le cache" if ok else "ECHEC")
+sys.exit(0 if ok else 1)
@@ -0,0 +1,85 @@
+import gzip, json, sys, tempfile, time
+from pathlib import Path
+
+# -------------------------------
+# Historique SQLite sur horloge virtuelle
+# -------------------------------
+# 26 h de samples (1 toutes les 2 s) écrits par lots comme history.loop, puis :
+# agrégats minute/heure justes, purge selon la rétention, requête "nuit de jeu"
+# servie par les agrégats, et route /metrics/range (relative, gzip).
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from metrics_history import MetricsHistory
+
+DT = 2
+HOURS = 26
+T0 = 1_700_000_000 // 3600 * 3600
+clock = [float(T0)]
+tmp = Path(tempfile.mkdtemp())
+hist = MetricsHistory(str(tmp / "h.db"), lambda: {"raw": 24 * 3600}, clock=lambda: clock[0]).start()
+ok = hist.ok
+
+def cpu_at(t):
+    # 20 % la journée, 90 % pendant la "session de jeu" (heures 20 à 23)
+    return 90.0 if 20 <= (t - T0) // 3600 < 23 else 20.0
+
+t_write = time.perf_counter()
+n = 0
+for i in range(HOURS * 3600 // DT):
+    t = T0 + i * DT
+    clock[0] = t
+    hist.append({"cpu": cpu_at(t), "gpu": 50, "temp_cpu": 45.5, "temp_gpu": "n/a", "net_rx": 1.25}, ts=t)
+    if i % 5 == 4: n += hist.flush()  # flush_s = 10 s
+n += hist.flush()
+t_write = (time.perf_counter() - t_write) / n * 1e6
+counts = {t: hist.db.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0] for t in ("raw", "m1", "h1")}
+print(f"=== Ecriture : {n} samples, {t_write:.1f} µs/sample (agrégats compris) ===")
+print(f"  lignes : {counts}")
+ok &= counts == {"raw": n, "m1": HOURS * 60, "h1": HOURS}
+
+h20 = hist.db.execute("SELECT n, cpu, cpu_max, temp_gpu FROM h1 WHERE ts = ?", (T0 + 20 * 3600,)).fetchone()
+print(f"  heure 20 : n={h20[0]} cpu moy={h20[1] / 10} max={h20[2] / 10} temp_gpu={h20[3]}")
+ok &= h20 == (1800, 900, 900, None)
+
+print("\n=== Compactage (raw gardé 24 h) ===")
+deleted = hist.compact(force=True)
+counts = {t: hist.db.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0] for t in ("raw", "m1", "h1")}
+print(f"  {deleted} lignes supprimées, reste {counts}")
+ok &= counts["raw"] == 24 * 3600 // DT + 1 and counts["m1"] == HOURS * 60
+
+print("\n=== Requêtes ===")
+END = T0 + HOURS * 3600
+for label, frm, to, step in (("12 h en 120 points", END - 12 * 3600, END, 360),
+                             ("soirée en 1 min", T0 + 19 * 3600, T0 + 24 * 3600, 60),
+                             ("26 h en 26 points", T0, END, 3600), ("pas trop fin", T0, END, 1)):
+    t0 = time.perf_counter()
+    r = hist.range(frm, to, step)
+    dt = (time.perf_counter() - t0) * 1000
+    print(f"  {label:20s}: {r['table']:3s} pas {r['step']:5d}s  {len(r['ts']):4d} points  {dt:6.2f} ms  "
+          f"cpu max {max(v for v in r['max']['cpu'] if v is not None)}")
+    if step == 360:
+        ok &= r["table"] == "m1" and len(r["ts"]) == 120
+        game = [v for ts, v in zip(r["ts"], r["avg"]["cpu"]) if T0 + 20 * 3600 <= ts < T0 + 23 * 3600]
+        ok &= set(game) == {90.0} and r["avg"]["temp_cpu"][0] == 45.5 and r["avg"]["temp_gpu"][0] is None
+    if step == 3600: ok &= r["table"] == "h1" and len(r["ts"]) == HOURS
+    if step == 1: ok &= len(r["ts"]) <= 2001
+
+print("\n=== Route /metrics/range ===")
+import pi_serveur as srv
+srv.history = hist
+clock[0] = T0 + HOURS * 3600
+real_time = time.time
+srv.time.time = lambda: clock[0]
+client = srv.app.test_client()
+r1 = client.get("/metrics/range?from=-43200&step=360", headers={"Accept-Encoding": "gzip"})
+srv.time.time = real_time
+body = json.loads(gzip.decompress(r1.data))
+print(f"  {r1.status_code} {r1.headers.get('Content-Encoding')} {len(r1.data)} o "
+      f"({len(gzip.decompress(r1.data))} o JSON), {len(body['ts'])} points")
+r2 = client.get("/metrics/range?from=abc")
+print(f"  paramètre invalide : {r2.status_code}")
+ok &= r1.status_code == 200 and body["ok"] and len(body["ts"]) == 120 and r2.status_code == 400
+
+print("OK" if ok else "ECHEC")
+sys.exit(0 if ok else 1)
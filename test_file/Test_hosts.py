@@ -0,0 +1,112 @@
+import json, socket, sys, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# -------------------------------
+# Plusieurs helpers PC
+# -------------------------------
+# 3 helpers loopback (dont un lent), un "trou noir" qui accepte la connexion
+# sans jamais répondre, puis une balise UDP : un tour de poll_hosts() doit durer
+# le timeout une seule fois (pas la somme), chaque PC garder ses métriques et
+# ses alertes, et le PC actif recevoir les vues détaillées (historique restauré
+# du snapshot compris, même après un changement de PC).
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+PORT0 = 5021
+TIMEOUT_S = 0.5
+HELPERS = [  # (nom, cpu, temp_gpu, délai s)
+    ("Bureau", 20.0, 60, 0.0),
+    ("Salon", 80.0, 91, 0.0),
+    ("Portable lent", 50.0, 55, 0.3),
+]
+
+def make_handler(cpu, temp_gpu, delay):
+    class Helper(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        def log_message(self, *a): pass
+        def do_GET(self):
+            time.sleep(delay)
+            body = {"cpu": cpu, "gpu": 10, "temp_cpu": 40, "temp_gpu": temp_gpu} if self.path.startswith("/metrics") else {}
+            data = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+    return Helper
+
+for i, (_, cpu, temp, delay) in enumerate(HELPERS):
+    srv = ThreadingHTTPServer(("127.0.0.1", PORT0 + i), make_handler(cpu, temp, delay))
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+blackhole = socket.socket()
+blackhole.bind(("127.0.0.1", PORT0 + len(HELPERS)))
+blackhole.listen(8)  # jamais accept() : la requête part en timeout
+
+sys.argv = ["pi_panel.py", "--bench", "/dev/null", "--helper", f"http://127.0.0.1:{PORT0}"]
+import pi_panel as p
+from pc_hosts import listen_beacons
+
+p.hosts.hosts[f"http://127.0.0.1:{PORT0}"].name = HELPERS[0][0]
+for i, (name, *_) in enumerate(HELPERS[1:], 1): p.hosts.add(f"http://127.0.0.1:{PORT0 + i}", name)
+p.hosts.add(f"http://127.0.0.1:{PORT0 + len(HELPERS)}", "Eteint")
+hs = p.hosts.list()
+ok = True
+
+# Snapshot du boot précédent (user-032) : l'historique du PC actif doit le suivre
+import tempfile
+p.SNAPSHOT_PATH = Path(tempfile.mkdtemp()) / "snap.json"
+p.SNAPSHOT_PATH.write_text(json.dumps({"stats_host": hs[0].base, "saved_at": time.time(),
+                                       "stats_history": [{"cpu": 11.0}, {"cpu": 12.0}, {"cpu": 13.0}]}))
+p.restore_snapshot()
+
+print(f"=== {len(hs)} helpers, timeout {TIMEOUT_S}s ===")
+t0 = time.perf_counter()
+for h in hs: p.poll_host(h, TIMEOUT_S)
+serial = time.perf_counter() - t0
+p.poll_hosts(TIMEOUT_S)  # chauffe (connexions keep-alive)
+t0 = time.perf_counter()
+p.poll_hosts(TIMEOUT_S)
+parallel = time.perf_counter() - t0
+print(f"  un par un : {serial * 1000:.0f} ms   en parallèle : {parallel * 1000:.0f} ms")
+ok &= parallel < TIMEOUT_S + 0.25 and parallel < serial
+
+with p.state_lock: cards, agg, banner = p.state["hosts"], p.state["hosts_agg"], p.state["alert_banner"]
+for c in cards:
+    print(f"  {'*' if c['active'] else ' '} {c['name']:14s} {'ok' if c['ok'] else 'KO'}  cpu={c['m'].get('cpu') if c['m'] else '--'}")
+print(f"  ensemble : {agg}")
+print(f"  alerte : {banner[0] if banner else None}")
+ok &= [c["ok"] for c in cards] == [True, True, True, False] and agg["online"] == 3 and agg["cpu"] == 50.0
+ok &= agg["temp_gpu"] == 91 and banner is not None and banner[0].startswith("Salon : GPU chaud")
+
+print("\n=== PC actif ===")
+p.set_active_host(hs[1].base)
+with p.state_lock: m, n_hist = p.state["metrics"], len(p.state["stats_history"])
+print(f"  {p.hosts.active().name} : pc_base={p.pc_base()} cpu={m.get('cpu')} historique={n_hist}")
+ok &= p.pc_base() == hs[1].base and m.get("cpu") == 80.0 and n_hist == 2
+p.cycle_active_host(1)
+print(f"  suivant : {p.hosts.active().name}")
+ok &= p.hosts.active() is hs[2]
+p.set_active_host(hs[0].base)
+with p.state_lock: back = [d.get("cpu") for d in p.state["stats_history"]]
+print(f"  retour sur {hs[0].name} : historique {back}")
+ok &= back[:3] == [11.0, 12.0, 13.0] and back[-1] == 20.0
+
+print("\n=== Balise UDP ===")
+BEACON = PORT0 + 10
+threading.Thread(target=listen_beacons, args=(p.hosts, BEACON), daemon=True).start()
+time.sleep(0.2)
+tx = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+tx.sendto(b'PI_HELPER_SERVER_HERE {"port": 5099, "name": "Nouveau PC"}', ("127.0.0.1", BEACON))
+tx.sendto(b"PI_HELPER_SERVER_HERE", ("127.0.0.1", BEACON))  # ancien helper : port par défaut
+tx.sendto(f'PI_HELPER_SERVER_HERE {{"port": {PORT0 + 1}, "name": "autre nom"}}'.encode(), ("127.0.0.1", BEACON))
+time.sleep(0.3)
+names = [h.name for h in p.hosts.list()]
+print(f"  hôtes : {names}")
+ok &= names[-2:] == ["Nouveau PC", "127.0.0.1:5005"] and "Salon" in names and len(names) == 6
+gone = p.hosts.expire(time.time() + 600)
+print(f"  balises muettes retirées : {gone}")
+ok &= len(gone) == 2 and len(p.hosts) == 4
+
+print("OK" if ok else "ECHEC")
+sys.exit(0 if ok else 1)
@@ -0,0 +1,73 @@
+import sys, tempfile, time
+from pathlib import Path
+
+# -------------------------------
+# Icônes du launcher, sans Windows
+# -------------------------------
+# FileIconBackend sur les PNG du dossier icons/ : extraction unique, cache
+# disque réutilisé par un nouveau store, image remplacée -> nouvel ETag (une seule
+# version gardée en mémoire), puis
+# ETag / 304 sur /apps/<nom>/icon.
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import pi_serveur
+from app_icons import IconStore, FileIconBackend
+
+class CountingBackend(FileIconBackend):
+    calls = 0
+    def extract(self, name, target):
+        CountingBackend.calls += 1
+        return super().extract(name, target)
+
+tmp = Path(tempfile.mkdtemp())
+apps = {"Play": str(ROOT / "icons" / "play.png"), "Pause": str(ROOT / "icons" / "pause.png"), "Texte": "notepad.exe"}
+backend = CountingBackend(str(tmp / "app_icons"))
+store = IconStore([backend], str(tmp / "cache"))
+
+print("=== Extraction ===")
+for name, target in apps.items():
+    t0 = time.perf_counter()
+    png, etag = store.get(name, target, 48)
+    print(f"  {name:6s}: {len(png) if png else 0:5d} o  etag={etag}  {(time.perf_counter() - t0) * 1000:.1f} ms")
+for name, target in apps.items(): store.get(name, target, 48)
+print(f"Appels backend après 2 passes : {CountingBackend.calls} (attendu {len(apps)})")
+ok = CountingBackend.calls == len(apps)
+
+# Nouveau store (redémarrage) : le disque suffit, pas de ré-extraction
+CountingBackend.calls = 0
+store2 = IconStore([backend], str(tmp / "cache"))
+same = store2.get("Play", apps["Play"], 48) == store.get("Play", apps["Play"], 48)
+print(f"Cache disque : {CountingBackend.calls} extraction(s) pour les images déjà connues, ETag identique : {same}")
+ok &= same and CountingBackend.calls == 0
+
+print("\n=== Image remplacée ===")
+import os, shutil
+swap = tmp / "app_icons" / "Swap.png"
+swap.parent.mkdir(parents=True, exist_ok=True)
+shutil.copy(ROOT / "icons" / "play.png", swap)
+_, etag_a = store.get("Swap", "swap.exe", 48)
+shutil.copy(ROOT / "icons" / "pause.png", swap)
+os.utime(swap, ns=(time.time_ns(), time.time_ns() + 10**9))
+CountingBackend.calls = 0
+_, etag_b = IconStore([backend], str(tmp / "cache")).get("Swap", "swap.exe", 48)  # redémarrage : disque seul
+_, etag_c = store.get("Swap", "swap.exe", 48)  # store déjà chaud (mémoire)
+n_files = len(list((tmp / "cache").glob("*.png")))
+n_mem = len(store.mem)  # Play, Pause, Texte, Swap : l'ancienne version de Swap est remplacée
+print(f"  ETag avant {etag_a}, après {etag_b} / {etag_c}, {CountingBackend.calls} extraction(s), {n_files} PNG en cache, {n_mem} en mémoire")
+ok &= etag_b != etag_a and etag_c == etag_b and CountingBackend.calls == 1 and n_files == 3 and n_mem == 4
+
+print("\n=== Route /apps/<nom>/icon ===")
+pi_serveur.CFG = {**pi_serveur.CFG, "APPS": apps, "APP_ICONS": {}}
+pi_serveur.icons = store
+client = pi_serveur.app.test_client()
+r1 = client.get("/apps/Play/icon")
+r2 = client.get("/apps/Play/icon", headers={"If-None-Match": r1.headers["ETag"]})
+r3 = client.get("/apps/Texte/icon")
+print(f"  1er GET : {r1.status_code} {r1.headers.get('Content-Type')} {len(r1.data)} o")
+print(f"  If-None-Match : {r2.status_code} ({len(r2.data)} o)")
+print(f"  App sans image : {r3.status_code}")
+ok &= r1.status_code == 200 and r2.status_code == 304 and r3.status_code == 404
+
+print("OK" if ok else "ECHEC")
+sys.exit(0 if ok else 1)
@@ -0,0 +1,127 @@
+import argparse, hashlib, json, os, subprocess, sys, tempfile, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# -------------------------------
+# Latence appui -> ack serveur
+# -------------------------------
+# Lance pi_panel.py avec un GPIO simulé (--sim-gpio) contre un helper PC
+# loopback (ou un vrai pi_serveur.py avec --helper), puis affiche les
+# histogrammes par route. Avec --from-file, lit simplement un fichier écrit
+# par un panel réel lancé avec --latency-out (boutons physiques sur le Pi).
+ROOT = Path(__file__).resolve().parent.parent
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--presses", type=int, default=200, help="Nombre d'appuis simulés")
+parser.add_argument("--helper", help="URL d'un vrai helper (ATTENTION : le launcher lance vraiment les apps)")
+parser.add_argument("--server-delay-ms", type=float, default=0, help="Délai artificiel du serveur loopback")
+parser.add_argument("--from-file", help="Analyse un JSON écrit par pi_panel.py --latency-out")
+parser.add_argument("--port", type=int, default=5015)
+args = parser.parse_args()
+
+# -------------------------------
+# Helper PC loopback
+# -------------------------------
+APPS = ["Steam", "Discord", "VSCode"]
+SESSIONS = [{"name": "Spotify", "vol": 50}, {"name": "Discord", "vol": 80}, {"name": "Jeu", "vol": 30}]
+LIST_GETS = {"200": 0, "304": 0}  # /apps_list et /mixer/list : le panel doit renvoyer l'ETag
+
+class LoopbackHelper(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive comme requests.Session côté panel
+    def log_message(self, *a): pass
+
+    def do_GET(self):
+        t0 = time.perf_counter()
+        if self.path == "/metrics": body = {"cpu": 12.0, "gpu": 5, "temp_cpu": 45, "temp_gpu": 40}
+        elif self.path in ("/apps_list", "/mixer/list"):
+            body = {"version": "loopback", "apps": APPS} if self.path == "/apps_list" else SESSIONS
+            etag = '"%s"' % hashlib.sha1(json.dumps(body).encode()).hexdigest()[:16]
+            if self.headers.get("If-None-Match") == etag:
+                LIST_GETS["304"] += 1
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            LIST_GETS["200"] += 1
+            return self.reply(body, t0, {"ETag": etag})
+        else: body = {}
+        self.reply(body, t0)
+
+    def do_POST(self):
+        t0 = time.perf_counter()
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if args.server_delay_ms: time.sleep(args.server_delay_ms / 1000)
+        if self.path == "/launch": body = {"ok": True, "msg": "Lancement (loopback)"}
+        elif self.path == "/mixer/set": body = {"ok": True, "new_vol": 50}
+        else: body = {"ok": True}
+        self.reply(body, t0)
+
+    def reply(self, body, t0, extra=None):
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        for k, v in (extra or {}).items(): self.send_header(k, v)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Server-Timing", f"app;dur={(time.perf_counter() - t0) * 1000:.2f}")
+        self.end_headers()
+        self.wfile.write(data)
+
+# -------------------------------
+# Histogrammes
+# -------------------------------
+BUCKETS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000]
+
+def pct(vals, p):
+    return vals[min(len(vals) - 1, int(round(p / 100 * (len(vals) - 1))))]
+
+def histogram(name, vals):
+    vals = sorted(v for v in vals if v is not None)
+    if not vals:
+        print(f"  {name}: aucune mesure")
+        return
+    print(f"  {name}: n={len(vals)}  p50={pct(vals, 50):.2f}  p95={pct(vals, 95):.2f}  "
+          f"p99={pct(vals, 99):.2f}  max={vals[-1]:.2f} ms")
+    counts, lo = [], 0
+    for hi in BUCKETS + [float("inf")]:
+        counts.append(sum(1 for v in vals if lo <= v < hi))
+        lo = hi
+    top = max(counts)
+    lo = 0
+    for hi, c in zip(BUCKETS + [float("inf")], counts):
+        if c:
+            label = f"{lo:>5g}-{hi:<5g}" if hi != float("inf") else f"{lo:>5g}+     "
+            print(f"    {label} ms | {'#' * max(1, int(40 * c / top))} {c}")
+        lo = hi
+
+def report(path):
+    with open(path, "r", encoding="utf-8") as f: data = json.load(f)
+    print(f"\n=== Latences (helper {data.get('helper')}, {'simulé' if data.get('sim') else 'GPIO réel'}) ===")
+    for route, rows in sorted(data["routes"].items()):
+        print(f"\n[{route}]")
+        histogram("appui -> ack (total)", [r[3] for r in rows])
+        histogram("appui -> envoi      ", [r[0] for r in rows])
+        histogram("envoi -> ack        ", [r[1] for r in rows])
+        histogram("traitement serveur  ", [r[2] for r in rows])
+
+if args.from_file:
+    report(args.from_file)
+    sys.exit()
+
+helper = args.helper
+if not helper:
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), LoopbackHelper)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    helper = f"http://127.0.0.1:{args.port}"
+
+env = dict(os.environ, SDL_VIDEODRIVER=os.environ.get("SDL_VIDEODRIVER", "dummy"))
+print(f"=== {args.presses} appuis simulés contre {helper} ===")
+# Snapshot, frame de boot, perf.log et rapport dans un dossier jetable : le vrai panel n'est pas touché
+with tempfile.TemporaryDirectory() as state_dir:
+    out = Path(state_dir) / "latency_report.json"
+    subprocess.run([sys.executable, str(ROOT / "pi_panel.py"), "--sim-gpio", str(args.presses),
+                    "--helper", helper, "--latency-out", str(out), "--state-dir", state_dir],
+                   env=env, stdin=subprocess.DEVNULL)
+    report(out)
+if not args.helper:
+    print(f"\nListes (GET conditionnels) : {LIST_GETS['200']} x 200, {LIST_GETS['304']} x 304")
@@ -0,0 +1,48 @@
+import sys, time
+from pathlib import Path
+
+# -------------------------------
+# Suivi des apps lancées (/launch, /launch/status)
+# -------------------------------
+# Une app courte ("sleep 0.5") : "running" tant qu'elle tourne, puis faux dès
+# sa fermeture (process récolté, pas de zombie dans proc_index), et un second
+# lancement repart au lieu de répondre "déjà lancé".
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import psutil
+import pi_serveur as srv
+
+srv.CFG = {**srv.CFG, "APPS": {"Sleeper": "sleep 0.5"}, "APP_PROCESS": {}}
+client = srv.app.test_client()
+ok = True
+
+def status():
+    srv.sample_processes()  # proc_thread, sans attendre son intervalle
+    return client.get("/launch/status").get_json()["Sleeper"]
+
+def wait_state(want, timeout=5):
+    t0 = time.time()
+    while time.time() - t0 < timeout:
+        st = status()
+        if st["running"] == want: return st, time.time() - t0
+        time.sleep(0.05)
+    return status(), None
+
+for n in (1, 2):
+    print(f"=== Lancement {n} ===")
+    r = client.post("/launch", json={"name": "Sleeper"}).get_json()
+    print(f"  /launch : {r['msg']}")
+    ok &= r["msg"] == "Lancement Sleeper"
+    st, dt = wait_state(True)
+    print(f"  en cours : {st['running']} état={st['state']} pids={st['pids']}")
+    ok &= dt is not None and st["pids"] != []
+    pid = srv.launches["Sleeper"]["pid"]
+    st, dt = wait_state(False)
+    print(f"  après sortie : running={st['running']} pids={st['pids']} ({dt and round(dt, 2)} s)")
+    zombie = psutil.pid_exists(pid) and psutil.Process(pid).status() == psutil.STATUS_ZOMBIE
+    print(f"  process {pid} : {'zombie' if zombie else 'récolté'}")
+    ok &= dt is not None and not st["pids"] and not zombie
+
+print("OK" if ok else "ECHEC")
+sys.exit(0 if ok else 1)
@@ -0,0 +1,122 @@
+import json, sys, time
+from pathlib import Path
+
+# -------------------------------
+# /metrics : JSON vs encodage compact
+# -------------------------------
+# Justesse d'abord : trames complètes et deltas décodent la même chose, époque
+# différente, base sortie de l'anneau, champs absents (n/a). Puis taille et coût
+# de décodage par sample contre le vrai pi_serveur.py (GPU simulés) via le
+# client de test Flask, avec un JSON réduit aux mêmes champs pour comparer.
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+import os
+os.environ.setdefault("PI_FAKE_GPU", "2")
+
+import pi_serveur
+from metrics_wire import MetricsEncoder, MetricsDecoder, MetricsRecord, CONTENT_TYPE, HEADER, FULL, DELTA, INDEX
+
+ok = True
+def check(label, cond):
+    global ok
+    print(f"  {label:52s} {'OK' if cond else 'ECHEC'}")
+    ok &= bool(cond)
+
+def kind(buf): return HEADER.unpack_from(buf, 0)[1]
+
+print("=== Encodeur seul ===")
+enc = MetricsEncoder(keep=8)
+vals = [{"cpu": 12.5, "gpu": 40, "temp_cpu": 51.2, "temp_gpu": 60, "net_rx": 1.25, "cfg_v": "0badcafe"},
+        {"cpu": 13.0, "gpu": 40, "temp_cpu": 51.2, "temp_gpu": "n/a", "net_rx": 1.25, "cfg_v": "0badcafe"},
+        {"cpu": None, "gpu": 41, "temp_cpu": 51.2, "temp_gpu": 62, "net_rx": 0, "cfg_v": "0badcafe"}]
+dec = MetricsDecoder()
+enc.publish(vals[0])
+first = enc.encode()
+check("1re requête : trame complète", kind(first) == FULL and dec.decode(first) == MetricsRecord.from_dict(vals[0]))
+same = True
+for v in vals[1:]:
+    enc.publish(v)
+    p = dec.params()
+    delta = enc.encode(p["epoch"], p["since"])
+    rec = dec.decode(delta)
+    same &= kind(delta) == DELTA and rec == MetricsDecoder().decode(enc.encode()) == MetricsRecord.from_dict(v)
+check("delta == trame complète == from_dict", same)
+rec = dec.decode(enc.encode(dec.epoch, dec.seq - 1))
+check("n/a et None -> None, 0 reste 0", rec.get("cpu") is None and rec.get("net_rx") == 0 and rec.get("temp_gpu") == 62)
+check("\"n/a\" (JSON) -> None", MetricsRecord.from_dict(vals[1]).get("temp_gpu") is None)
+
+old = dec.params()
+enc.publish({**vals[0], "cpu": 99.9})
+check("époque inconnue -> trame complète", kind(enc.encode(old["epoch"] ^ 1, old["since"])) == FULL)
+for i in range(20): enc.publish({**vals[0], "cpu": i})
+buf = enc.encode(old["epoch"], old["since"])
+check("base sortie de l'anneau (keep=8) -> trame complète", kind(buf) == FULL and dec.decode(buf).get("cpu") == 19)
+other = MetricsEncoder()
+other.publish(vals[0]); other.publish(vals[2])
+foreign = other.encode(other.epoch, 1)
+try:
+    dec.decode(foreign)
+    refused = False
+except ValueError: refused = True
+check("delta d'un autre démarrage refusé", kind(foreign) == DELTA and refused)
+
+print("\n=== Serveur : deltas successifs ===")
+N = 2000
+srv = pi_serveur
+srv.gpu.start()
+client = srv.app.test_client()
+
+def sample(i):
+    # Valeurs qui bougent comme en vrai : CPU/réseau souvent, températures rarement
+    srv.cache_cpu_load = 10 + i % 7
+    srv.cache_cpu_temp = 50 + (i // 10) % 3
+    srv.cache_io = {**srv.cache_io, "net_rx": round(i % 13 * 0.37, 2), "net_tx": 0.05}
+    srv.gpu.sample()
+    srv.metrics_enc.publish(srv.metrics_values())
+
+sample(0)
+json_body = client.get("/metrics").data
+same_json = srv.app.json.dumps({k: v for k, v in json.loads(json_body).items() if k in INDEX}).encode()
+t0 = time.perf_counter()
+for _ in range(N): MetricsRecord.from_dict(json.loads(json_body))
+json_us = (time.perf_counter() - t0) / N * 1e6
+t0 = time.perf_counter()
+for _ in range(N): json.loads(json_body)
+loads_us = (time.perf_counter() - t0) / N * 1e6
+
+dec = MetricsDecoder()
+full = client.get("/metrics", headers={"Accept": CONTENT_TYPE}).data
+dec.decode(full)
+sizes, bodies = [], []
+match = True
+for i in range(1, 200):
+    sample(i)
+    p = dec.params()
+    body = client.get(f"/metrics?epoch={p['epoch']}&since={p['since']}", headers={"Accept": CONTENT_TYPE}).data
+    rec = dec.decode(body)
+    ref = MetricsDecoder().decode(client.get("/metrics", headers={"Accept": CONTENT_TYPE}).data)
+    match &= rec == ref == MetricsRecord.from_dict(json.loads(client.get("/metrics").data))
+    sizes.append(len(body)); bodies.append(body)
+check("199 deltas == trame complète == JSON", match)
+check("dernier sample", rec.get("cpu") == srv.cache_cpu_load and rec.get("net_rx") == srv.cache_io["net_rx"])
+
+dec2 = MetricsDecoder()
+t0 = time.perf_counter()
+for _ in range(N): dec2.decode(full)
+full_us = (time.perf_counter() - t0) / N * 1e6
+dec2.epoch = dec.epoch
+t0 = time.perf_counter()
+for b in bodies * (N // len(bodies)): dec2.decode(b)
+delta_us = (time.perf_counter() - t0) / (N // len(bodies) * len(bodies)) * 1e6
+
+avg_delta = sum(sizes) / len(sizes)
+print(f"\nJSON    : {len(json_body):5d} o/sample   décodage {json_us:6.1f} µs (json.loads seul {loads_us:.1f} µs)"
+      f"  - liste 'gpus' comprise")
+print(f"JSON    : {len(same_json):5d} o/sample   mêmes champs que la trame binaire")
+print(f"Complet : {len(full):5d} o/sample   décodage {full_us:6.1f} µs")
+print(f"Delta   : {avg_delta:5.1f} o/sample   décodage {delta_us:6.1f} µs")
+print(f"Gain taille x{len(same_json) / avg_delta:.0f} à champs égaux (x{len(json_body) / avg_delta:.0f} contre /metrics JSON),"
+      f" décodage x{json_us / delta_us:.1f}")
+
+print("OK" if ok else "ECHEC")
+sys.exit(0 if ok else 1)
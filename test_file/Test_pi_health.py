@@ -0,0 +1,82 @@
+import builtins, sys, tempfile, time
+from pathlib import Path
+
+# -------------------------------
+# Santé du Pi (pi_health) + page "Pi"
+# -------------------------------
+# /proc et /sys simulés dans un dossier temporaire et faux vcgencmd : valeurs
+# décodées, deltas CPU entre deux samples, vcgencmd lancé 1 sample sur 5, puis
+# coût d'un sample réel et rendu STATS sans aucun open() pendant la frame.
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from pi_health import HealthSampler, decode_throttled, THROTTLE_EVERY
+
+fake = Path(tempfile.mkdtemp())
+def put(path, text):
+    (fake / path).parent.mkdir(parents=True, exist_ok=True)
+    (fake / path).write_text(text)
+
+put("sys/class/thermal/thermal_zone0/temp", "61234\n")
+put("proc/loadavg", "0.52 0.40 0.31 2/180 1234\n")
+put("proc/meminfo", "MemTotal:        3884032 kB\nMemFree:          100000 kB\nMemAvailable:    3269632 kB\n")
+put("proc/self/statm", "20000 12800 900 1 0 9000 0\n")
+put("proc/stat", "cpu  100 0 100 700 100 0 0 0 0 0\ncpu0 1 2 3 4\n")
+
+calls = fake / "calls"
+vcg = [sys.executable, "-c", f"open({str(calls)!r}, 'a').write('x'); print('throttled=0x50005')"]
+clock, cpu_t = [0.0], [0.0]
+smp = HealthSampler(root=str(fake), vcgencmd=vcg, clock=lambda: clock[0], cpu_time=lambda: cpu_t[0])
+ok = True
+
+print("=== Sample simulé ===")
+first = smp.sample()
+put("proc/stat", "cpu  400 0 200 1000 100 0 0 0 0 0\n")  # +400 occupé sur +700
+clock[0], cpu_t[0] = 2.0, 0.3
+second = smp.sample()
+for k in ("temp", "throttled", "throttle_now", "throttle_past", "load", "cpu", "mem_used", "mem_total", "rss_mb", "proc_cpu"):
+    print(f"  {k:14s} {first[k]!s:40s} {second[k]}")
+ok &= first["temp"] == 61.2 and first["load"] == (0.52, 0.4, 0.31) and first["cpu"] is None
+ok &= (first["mem_used"], first["mem_total"]) == (600, 3793) and first["rss_mb"] == round(12800 * smp.page / 1048576, 1)
+ok &= first["throttled"] == 0x50005 and first["throttle_now"] == ["Sous-tension", "Throttling"]
+ok &= second["cpu"] == round(400 / 700 * 100, 1) and second["proc_cpu"] == 15.0
+
+for _ in range(8): smp.sample()
+n_calls = len(calls.read_text())
+print(f"  vcgencmd lancé {n_calls} fois pour 10 samples (1 sur {THROTTLE_EVERY})")
+ok &= n_calls == 2
+ok &= decode_throttled(0) == ([], []) and decode_throttled(0x80000) == ([], ["Limite temp."])
+
+print("\n=== Hors Pi ===")
+bare = HealthSampler(root=str(fake / "absent"), vcgencmd=("commande_inexistante_pi",))
+h = bare.sample()
+print(f"  {h}")
+ok &= h["temp"] is None and h["throttled"] is None and h["load"] is None and bare.vcgencmd is None
+
+print("\n=== Coût d'un sample réel (sans vcgencmd) ===")
+real = HealthSampler(vcgencmd=None)
+real.sample()
+n = 200
+t0 = time.perf_counter()
+for _ in range(n): real.sample()
+print(f"  {(time.perf_counter() - t0) / n * 1e6:.0f} µs/sample  -> {real.sample()}")
+
+print("\n=== Rendu STATS : aucun fichier ouvert pendant la frame ===")
+sys.argv = ["pi_panel.py", "--bench", "/dev/null"]
+import pi_panel as p
+import ui_render
+with p.state_lock: p.state.update({"mode": "STATS", "pi_health": second, "pi_history": [first, second]})
+opened = []
+real_open = builtins.open
+builtins.open = lambda f, *a, **k: opened.append(str(f)) or real_open(f, *a, **k)
+try:
+    for view in ("GAUGES", "GRAPHS", "HOSTS", "PI"):
+        with p.state_lock: p.state["stats_view"] = view
+        ui_render.render_stats_ui(p.frame)
+finally:
+    builtins.open = real_open
+print(f"  fichiers ouverts : {opened or 'aucun'}")
+ok &= not opened
+
+print("OK" if ok else "ECHEC")
+sys.exit(0 if ok else 1)
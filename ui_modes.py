@@ -0,0 +1,175 @@
+"""Logique des modes du PiPanel (boutons, molette, menu).
+
+Rechargé à chaud après "Update Git" (voir pi_panel.reload_ui) : aucun état ici,
+tout vit dans pi_panel (state, caches, clients réseau, GPIO).
+"""
+from pi_panel import (state, state_lock, REPLAY, REPLAY_SKIP_ACTS, SYS_ACTIONS, submit_sys, menu_msg,
+                      pc_cmd, pc_post, spawn, launch_app_cmd, refresh_launcher, refresh_processes,
+                      refresh_history, HISTORY_RANGES, cycle_active_host)
+
+
+def input_rotate(direction):
+    with state_lock: curr_mode = state["mode"]
+    
+    if curr_mode == "MENU":
+        with state_lock:
+            idx = state["menu_idx"] + direction
+            state["menu_idx"] = max(0, min(idx, len(state["menu_items"])-1))
+    elif curr_mode == "LAUNCHER":
+        with state_lock:
+            idx = state["launcher_idx"] + direction
+            state["launcher_idx"] = max(0, min(idx, len(state["launcher_apps"])-1))
+    elif curr_mode == "STATS":
+        with state_lock: view = state["stats_view"]
+        if view == "HOSTS": cycle_active_host(1 if direction > 0 else -1)
+    elif curr_mode == "SPOTIFY":
+        if direction > 0: pc_cmd("vol_up")
+        else: pc_cmd("vol_down")
+    
+    # (Note : J'ai retiré le contrôle Mixer par molette ici pour privilégier les boutons ci-dessous, 
+    # mais tu pourras le remettre quand ta molette sera réparée)
+
+def input_click():
+    action_to_do = None
+    launch_app = None
+    
+    with state_lock: 
+        curr_mode = state["mode"]
+        if curr_mode == "MENU":
+            action_to_do = state["menu_items"][state["menu_idx"]]["act"]
+        elif curr_mode == "LAUNCHER":
+            launch_app = state["launcher_apps"][state["launcher_idx"]]
+
+    if action_to_do: menu_action(action_to_do)
+    elif launch_app:
+        def t_launch():
+            msg = launch_app_cmd(launch_app)
+            with state_lock: state["launcher_status"] = msg
+        spawn(t_launch)
+    elif curr_mode == "SPOTIFY": 
+        pc_cmd("mute_toggle")
+
+def input_button(name):
+    # Variables d'action (pour exécuter hors du lock)
+    cmd_pc = None
+    action_menu = None
+    launch_btn_app = None
+    change_mode = False
+    toggle_stats = False
+    host_step = 0
+    mixer_action = None # (change, app_name)
+    
+    with state_lock: 
+        curr_mode = state["mode"]
+        
+        if name == "B4_MODE":
+            change_mode = True
+        
+        elif curr_mode == "MENU":
+            if name == "B1_PREV": state["menu_idx"] = max(0, state["menu_idx"] - 1)
+            elif name == "B3_NEXT": state["menu_idx"] = min(len(state["menu_items"])-1, state["menu_idx"] + 1)
+            elif name == "B2_PLAY": action_menu = state["menu_items"][state["menu_idx"]]["act"]
+        
+        elif curr_mode == "MIXER":
+            sessions = state.get("mixer_sessions", [])
+            if sessions:
+                idx = state["mixer_idx"]
+                # B2 (PLAY) -> Changer d'App
+                if name == "B2_PLAY":
+                    state["mixer_idx"] = (idx + 1) % len(sessions)
+                # B1 (PREV) -> Volume -
+                elif name == "B1_PREV":
+                    app = sessions[idx]
+                    app["vol"] = max(0, app["vol"] - 10)
+                    mixer_action = (-10, app["name"])
+                # B3 (NEXT) -> Volume +
+                elif name == "B3_NEXT":
+                    app = sessions[idx]
+                    app["vol"] = min(100, app["vol"] + 10)
+                    mixer_action = (10, app["name"])
+
+        elif curr_mode == "STATS":
+            if name == "B2_PLAY": toggle_stats = True
+            elif state["stats_view"] == "HISTORY" and name in ("B1_PREV", "B3_NEXT"):
+                step = -1 if name == "B1_PREV" else 1
+                state["stats_range_idx"] = max(0, min(len(HISTORY_RANGES)-1, state["stats_range_idx"] + step))
+                spawn(refresh_history)
+            elif state["stats_view"] == "HOSTS" and name in ("B1_PREV", "B3_NEXT"):
+                host_step = -1 if name == "B1_PREV" else 1
+
+        elif curr_mode == "PROCESSES":
+            if name == "B2_PLAY":
+                state["proc_sort"] = "mem" if state["proc_sort"] == "cpu" else "cpu"
+                spawn(refresh_processes)
+        
+        elif curr_mode == "LAUNCHER":
+            if name == "B1_PREV": state["launcher_idx"] = max(0, state["launcher_idx"]-1)
+            elif name == "B3_NEXT": state["launcher_idx"] = min(len(state["launcher_apps"])-1, state["launcher_idx"]+1)
+            elif name == "B2_PLAY": launch_btn_app = state["launcher_apps"][state["launcher_idx"]]
+            
+        else: # Mode SPOTIFY
+            if name == "B1_PREV": cmd_pc = "prev"
+            elif name == "B2_PLAY": cmd_pc = "playpause"
+            elif name == "B3_NEXT": cmd_pc = "next"
+
+    # --- EXÉCUTION DES ACTIONS (Hors Lock) ---
+    if change_mode:
+        with state_lock:
+            if state["mode"] == "SPOTIFY": state["mode"] = "STATS"
+            elif state["mode"] == "STATS": state["mode"] = "PROCESSES"
+            elif state["mode"] == "PROCESSES": state["mode"] = "MIXER"
+            elif state["mode"] == "MIXER": state["mode"] = "LAUNCHER"
+            elif state["mode"] == "LAUNCHER": state["mode"] = "MENU"
+            else: state["mode"] = "SPOTIFY"
+            if state["mode"] == "LAUNCHER": spawn(refresh_launcher)
+            if state["mode"] == "PROCESSES": spawn(refresh_processes)
+            state["menu_msg"] = "" 
+    
+    if toggle_stats:
+        with state_lock:
+            views = ("GAUGES", "GRAPHS", "HISTORY", "HOSTS", "PI")
+            state["stats_view"] = views[(views.index(state["stats_view"]) + 1) % len(views)]
+            if state["stats_view"] == "HISTORY": spawn(refresh_history)
+
+    if host_step: cycle_active_host(host_step)  # hors lock : réinitialise l'état du PC actif
+
+    if mixer_action:
+        change, appname = mixer_action
+        def t_mix():
+            try: pc_post("/mixer/set", {"name": appname, "change": change}, 0.2)
+            except: pass
+        spawn(t_mix)
+
+    if action_menu: menu_action(action_menu)
+    if cmd_pc: pc_cmd(cmd_pc)
+    if launch_btn_app:
+        def t_launch_btn():
+            msg = launch_app_cmd(launch_btn_app)
+            with state_lock: state["launcher_status"] = msg
+        spawn(t_launch_btn)
+
+def menu_action(act):
+    if REPLAY and act in REPLAY_SKIP_ACTS:
+        menu_msg(f"(replay) {act}")
+        return
+    if act in SYS_ACTIONS:
+        if not submit_sys(act, SYS_ACTIONS[act]): menu_msg("Déjà en cours...")
+        return
+    with state_lock:
+        if act == "BACK":
+            state["mode"] = "SPOTIFY"
+            state["menu_msg"] = ""
+        elif act == "TOGGLE_SLEEP":
+            state["sleep_enabled"] = not state["sleep_enabled"]
+            status = "ON" if state["sleep_enabled"] else "OFF"
+            for item in state["menu_items"]:
+                if "Veille Auto" in item["lbl"]:
+                    item["lbl"] = f"Veille Auto: {status}"
+                    break
+        elif act == "TOGGLE_PERF":
+            state["perf_overlay"] = not state["perf_overlay"]
+            status = "ON" if state["perf_overlay"] else "OFF"
+            for item in state["menu_items"]:
+                if "Overlay Perf" in item["lbl"]:
+                    item["lbl"] = f"Overlay Perf: {status}"
+                    break
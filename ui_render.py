@@ -0,0 +1,494 @@
+"""Ecrans du PiPanel : un render_*_ui par mode, indexés dans RENDERERS.
+
+Rechargé à chaud après "Update Git" (voir pi_panel.reload_ui). Les caches
+(texte, marquee, pochettes) restent dans pi_panel et survivent au rechargement.
+"""
+import time
+import pygame
+
+from pi_panel import (W, H, MAX_HISTORY, FONT_S, FONT_M, FONT_L, FONT_XL,
+                      icon_prev, icon_next, icon_play, icon_pause, icon_mode,
+                      state, state_lock, text_cache, text_surf, render_text_centered, render_text_marquee,
+                      perf_snapshot, app_icon, HISTORY_RANGES, alert_clock)
+
+
+def render_spotify_ui(s):
+    with state_lock:
+        bg, art = state["bg_surf"], state["art_surf"]
+        tit, art_name = state["title"], state["artist"]
+        col = state["text_col"]
+        prog, dur, playing = state["progress"], state["duration"], state["playing"]
+    
+    if bg: s.blit(bg, (0,0))
+    else: s.fill((20,20,20))
+    
+    if art: 
+        r = art.get_rect(center=(W//2, 250))
+        s.blit(art, r)
+        pygame.draw.rect(s, (255,255,255), r, 2)
+    
+    render_text_marquee(s, tit, FONT_L, col, 450, W-40)
+    render_text_marquee(s, art_name, FONT_M, col, 500, W-40)
+    
+    bar_w, bar_h = 360, 8
+    bar_x = (W - bar_w)//2
+    ratio = max(0, min(1, prog/dur))
+    pygame.draw.rect(s, (80,80,80), (bar_x, 540, bar_w, bar_h), border_radius=4)
+    pygame.draw.rect(s, col, (bar_x, 540, int(bar_w*ratio), bar_h), border_radius=4)
+    
+    t1 = text_surf(FONT_S, ms_str(prog), (200,200,200))
+    t2 = text_surf(FONT_S, ms_str(dur), (200,200,200))
+    s.blit(t1, (bar_x, 555))
+    s.blit(t2, (bar_x + bar_w - t2.get_width(), 555))
+
+    btn_y = 620
+    s.blit(icon_prev, (W//2 - 140, btn_y))
+    s.blit(icon_pause if playing else icon_play, (W//2 - 32, btn_y))
+    s.blit(icon_next, (W//2 + 76, btn_y))
+    s.blit(icon_mode, (W//2 - 24, 720))
+
+def draw_chart(s, x, y, w, h, data_points, color, label, max_val=100, n=MAX_HISTORY, value=None):
+    """n : nombre de points de la grille ; None dans data_points = trou (ligne coupée).
+    value : texte affiché à droite à la place de la dernière valeur."""
+    pygame.draw.rect(s, (20,20,30), (x, y, w, h))
+    pygame.draw.rect(s, (60,60,70), (x, y, w, h), 1)
+    
+    lbl = text_surf(FONT_S, label, color)
+    s.blit(lbl, (x + 5, y + 5))
+    if value:
+        v_surf = text_surf(FONT_S, value, (255,255,255))
+        s.blit(v_surf, (x + w - 5 - v_surf.get_width(), y + 5))
+    
+    if len(data_points) < 2: return
+    
+    segments, points = [], []
+    step_x = w / (n - 1)
+    
+    for i, val in enumerate(data_points):
+        if val is None:
+            if points: segments.append(points)
+            points = []
+            continue
+        try: v = float(val)
+        except: v = 0
+        px = x + (i * step_x)
+        py = y + h - ((min(v, max_val) / max_val) * h)
+        points.append((px, py))
+    if points: segments.append(points)
+    
+    for seg in segments:
+        if len(seg) > 1: pygame.draw.lines(s, color, False, seg, 2)
+        else: pygame.draw.circle(s, color, (int(seg[0][0]), int(seg[0][1])), 2)
+    if value is None and points:
+        pygame.draw.circle(s, color, (int(points[-1][0]), int(points[-1][1])), 4)
+        curr_val = text_surf(FONT_M, f"{data_points[-1]}", (255,255,255))
+        s.blit(curr_val, (x + w - 45, y + 5))
+
+def ms_str(ms):
+    s = int(ms / 1000)
+    return f"{s//60}:{s%60:02d}"
+
+def render_stats_ui(s):
+    s.fill((10,10,15))
+    with state_lock: 
+        view = state["stats_view"]
+        mets = state["metrics"]
+        hist = list(state["stats_history"])
+        pi = state["pi_health"]
+    render_text_centered(s, "PI HEALTH" if view == "PI" else "PC MONITOR", FONT_XL, (0,255,200), 40)
+    
+    if view == "GAUGES":
+        # --- VUE JAUGES ---
+        y = 130
+        for label, key, unit in [("CPU Load", "cpu", "%"), ("CPU Temp", "temp_cpu", "°C"),
+                                 ("GPU Load", "gpu", "%"), ("GPU Temp", "temp_gpu", "°C")]:
+            val = mets.get(key, "--")
+            pygame.draw.rect(s, (30,30,40), (40, y+35, 400, 20), border_radius=10)
+            try:
+                v_float = float(val)
+                col_bar = (50, 255, 50)
+                if v_float > 60: col_bar = (255, 200, 0)
+                if v_float > 80: col_bar = (255, 50, 50)
+                w_bar = int((v_float/100)*400)
+                pygame.draw.rect(s, col_bar, (40, y+35, w_bar, 20), border_radius=10)
+            except: pass
+            
+            lbl_surf = text_surf(FONT_L, label, (220,220,220))
+            val_surf = text_surf(FONT_L, f"{val}{unit}", (255,255,255))
+            s.blit(lbl_surf, (40, y))
+            s.blit(val_surf, (W - 40 - val_surf.get_width(), y))
+            y += 100
+
+        # Débits (Mo/s) : téléchargement ou disque qui sature pendant un jeu
+        for label, k1, k2, n1, n2 in [("Réseau", "net_rx", "net_tx", "DL", "UL"),
+                                      ("Disque", "disk_r", "disk_w", "L", "E")]:
+            v1, v2 = mets.get(k1, "--"), mets.get(k2, "--")
+            s.blit(text_surf(FONT_M, label, (220,220,220)), (40, y))
+            io_surf = text_surf(FONT_M, f"{n1} {v1}  {n2} {v2} Mo/s", (255,255,255))
+            s.blit(io_surf, (W - 40 - io_surf.get_width(), y))
+            y += 45
+            
+        hint = text_surf(FONT_S, "[PLAY] -> Voir Graphiques", (100,100,100))
+        s.blit(hint, (W//2 - hint.get_width()//2, 640))
+        
+    elif view == "GRAPHS":
+        # --- VUE GRAPHIQUES ---
+        cpu_loads = [d.get("cpu",0) for d in hist]
+        gpu_loads = [d.get("gpu",0) for d in hist]
+        cpu_temps = [d.get("temp_cpu",0) for d in hist]
+        gpu_temps = [d.get("temp_gpu",0) for d in hist]
+        net_rx = [d.get("net_rx",0) for d in hist]
+        disk_io = [round(d.get("disk_r",0) + d.get("disk_w",0), 2) for d in hist]
+                
+        # Zone 1 : CPU
+        draw_chart(s, 20, 90, W-40, 130, cpu_loads, (0, 200, 255), "CPU Load (%)")
+        
+        # Zone 2 : GPU
+        draw_chart(s, 20, 230, W-40, 130, gpu_loads, (0, 255, 100), "GPU Load (%)")
+        
+        # Zone 3 : Températures
+        draw_chart(s, 20, 370, (W-50)//2, 110, cpu_temps, (255, 100, 100), "CPU Temp", 100)
+        draw_chart(s, W//2 + 5, 370, (W-50)//2, 110, gpu_temps, (255, 180, 50), "GPU Temp", 100)
+
+        # Zone 4 : Débits (échelle auto, Mo/s)
+        draw_chart(s, 20, 490, (W-50)//2, 110, net_rx, (180, 120, 255), "Net DL Mo/s", max(max(net_rx, default=0), 1))
+        draw_chart(s, W//2 + 5, 490, (W-50)//2, 110, disk_io, (255, 120, 200), "Disque Mo/s", max(max(disk_io, default=0), 1))
+        
+        hint = text_surf(FONT_S, "[PLAY] -> Voir Historique", (100,100,100))
+        s.blit(hint, (W//2 - hint.get_width()//2, 620))
+
+    elif view == "HISTORY":
+        # --- VUE HISTORIQUE (/metrics/range, préparée par apply_history) ---
+        with state_lock: rng, r_idx = state["stats_range"], state["stats_range_idx"]
+        r_lbl = HISTORY_RANGES[r_idx][0]
+        if rng is None:
+            render_text_centered(s, f"Historique {r_lbl} : chargement...", FONT_M, (150,150,150), 300)
+        else:
+            avg, peak, n = rng["avg"], rng["peak"], rng["n"]
+            step = rng["step"]
+            render_text_centered(s, f"Historique {r_lbl} (moyennes / {step}s)" if step < 60 else
+                                 f"Historique {r_lbl} (moyennes / {step//60} min)", FONT_S, (150,150,150), 95)
+
+            def pk(key, unit):
+                v = peak.get(key)
+                return f"max {v:g}{unit}" if v is not None else "--"
+            draw_chart(s, 20, 115, W-40, 115, avg["cpu"], (0, 200, 255), "CPU Load (%)", n=n, value=pk("cpu", "%"))
+            draw_chart(s, 20, 240, W-40, 115, avg["gpu"], (0, 255, 100), "GPU Load (%)", n=n, value=pk("gpu", "%"))
+            draw_chart(s, 20, 365, (W-50)//2, 110, avg["temp_cpu"], (255, 100, 100), "CPU Temp", 100, n=n,
+                       value=pk("temp_cpu", "°"))
+            draw_chart(s, W//2 + 5, 365, (W-50)//2, 110, avg["temp_gpu"], (255, 180, 50), "GPU Temp", 100, n=n,
+                       value=pk("temp_gpu", "°"))
+            net_max = max(peak.get("net_rx") or 0, 1)
+            disk_max = max(peak["disk"] or 0, 1)
+            draw_chart(s, 20, 485, (W-50)//2, 110, avg["net_rx"], (180, 120, 255), "Net DL Mo/s", net_max, n=n)
+            draw_chart(s, W//2 + 5, 485, (W-50)//2, 110, avg["disk"], (255, 120, 200), "Disque Mo/s", disk_max, n=n)
+
+        hint = text_surf(FONT_S, "[<< >>] Plage   [PLAY] -> Voir PCs", (100,100,100))
+        s.blit(hint, (W//2 - hint.get_width()//2, 620))
+
+    elif view == "HOSTS":
+        # --- VUE PCs : ensemble + une carte par helper (publish_host_cards) ---
+        with state_lock: cards, agg = state["hosts"], state["hosts_agg"]
+        fmt = lambda v, unit="": "--" if v is None else f"{v:g}{unit}"
+        pygame.draw.rect(s, (25,25,35), (20, 80, W-40, 110), border_radius=10)
+        s.blit(text_surf(FONT_M, f"{agg.get('online', 0)}/{agg.get('total', len(cards))} PC en ligne", (0,255,200)), (35, 88))
+        if agg.get("online"):
+            s.blit(text_surf(FONT_S, f"Charge moy. CPU {fmt(agg['cpu'], '%')}  GPU {fmt(agg['gpu'], '%')}",
+                             (220,220,220)), (35, 124))
+            s.blit(text_surf(FONT_S, f"Temp max CPU {fmt(agg['temp_cpu'], '°')}  GPU {fmt(agg['temp_gpu'], '°')}   "
+                                     f"I/O {agg['net']:g} / {agg['disk']:g} Mo/s", (220,220,220)), (35, 152))
+
+        # 4 cartes visibles, fenêtre centrée sur le PC actif
+        act = next((i for i, c in enumerate(cards) if c["active"]), 0)
+        first = max(0, min(act - 1, len(cards) - 4))
+        y = 205
+        for c in cards[first:first + 4]:
+            m = c["m"]
+            border = (0,255,200) if c["active"] else (60,60,70)
+            pygame.draw.rect(s, (20,20,30), (20, y, W-40, 95), border_radius=10)
+            pygame.draw.rect(s, border, (20, y, W-40, 95), 2, border_radius=10)
+            pygame.draw.circle(s, (0,220,100) if c["ok"] else (220,50,50), (42, y + 22), 7)
+            render_text_marquee(s, c["name"], FONT_M, (255,255,255), y + 8, W-170, x=58)
+            if c["active"]:
+                tag = text_surf(FONT_S, "ACTIF", (0,255,200))
+                s.blit(tag, (W-35 - tag.get_width(), y + 10))
+            if m is not None:
+                for i, (lbl, key) in enumerate((("CPU", "cpu"), ("GPU", "gpu"))):
+                    v = m.get(key)
+                    x = 35 + i * 210
+                    s.blit(text_surf(FONT_S, f"{lbl} {fmt(v, '%')}", (200,200,200)), (x, y + 42))
+                    pygame.draw.rect(s, (40,40,50), (x, y + 70, 190, 10), border_radius=5)
+                    if isinstance(v, (int, float)):
+                        col = (50,255,50) if v <= 60 else (255,200,0) if v <= 80 else (255,50,50)
+                        pygame.draw.rect(s, col, (x, y + 70, int(min(v, 100) / 100 * 190), 10), border_radius=5)
+                temps = text_surf(FONT_S, f"{fmt(m.get('temp_cpu'), '°')} / {fmt(m.get('temp_gpu'), '°')}", (255,180,120))
+                s.blit(temps, (W-35 - temps.get_width(), y + 42))
+            elif not c["ok"]:
+                s.blit(text_surf(FONT_S, "Hors ligne", (150,150,150)), (35, y + 50))
+            y += 105
+
+        hint = text_surf(FONT_S, "[<< >>] PC actif   [PLAY] -> Voir Pi", (100,100,100))
+        s.blit(hint, (W//2 - hint.get_width()//2, 640))
+
+    else:
+        # --- VUE PI : le panel lui-même (pi_panel.loop_pi_health, jamais /sys ni /proc ici) ---
+        with state_lock: p_hist = list(state["pi_history"])
+        fmt = lambda v, unit="": "--" if v is None else f"{v:g}{unit}"
+        now_f, past_f = pi.get("throttle_now", []), pi.get("throttle_past", [])
+        if pi.get("throttled") is None: t_line, t_col = "Bridage : inconnu (pas de vcgencmd)", (150,150,150)
+        elif now_f: t_line, t_col = "Maintenant : " + ", ".join(now_f), (255,80,80)
+        elif past_f: t_line, t_col = "Depuis le boot : " + ", ".join(past_f), (255,200,0)
+        else: t_line, t_col = "Aucun bridage", (0,220,100)
+        pygame.draw.rect(s, (25,25,35), (20, 80, W-40, 95), border_radius=10)
+        temp_col = (255,80,80) if (pi.get("temp") or 0) > 80 else (255,255,255)
+        s.blit(text_surf(FONT_L, f"SoC {fmt(pi.get('temp'), '°C')}", temp_col), (35, 88))
+        render_text_marquee(s, t_line, FONT_S, t_col, 138, W-70, x=35)
+
+        load, cores = pi.get("load"), pi.get("cores", 1)
+        rows = [("Charge", f"{' '.join(f'{v:.2f}' for v in load)} ({cores} cœurs)" if load else "--"),
+                ("CPU système", fmt(pi.get("cpu"), "%")),
+                ("Mémoire", f"{pi['mem_used']} / {pi['mem_total']} Mo" if pi.get("mem_total") else "--"),
+                ("Panel CPU", f"{fmt(pi.get('proc_cpu'), '%')} d'un cœur"),
+                ("Panel RSS", f"{fmt(pi.get('rss_mb'))} Mo   FPS {fmt(pi.get('fps'))}  p95 {fmt(pi.get('p95_ms'))} ms")]
+        y = 190
+        for lbl, val in rows:
+            s.blit(text_surf(FONT_S, lbl, (180,180,180)), (35, y))
+            v_surf = text_surf(FONT_S, val, (255,255,255))
+            s.blit(v_surf, (W-35 - v_surf.get_width(), y))
+            y += 30
+
+        draw_chart(s, 20, 345, W-40, 120, [h.get("temp") for h in p_hist], (255, 100, 100), "Temp SoC", 90,
+                   value=fmt(pi.get("temp"), "°"))
+        draw_chart(s, 20, 475, (W-50)//2, 120, [h.get("cpu") for h in p_hist], (0, 200, 255), "CPU système %",
+                   value=fmt(pi.get("cpu"), "%"))
+        draw_chart(s, W//2 + 5, 475, (W-50)//2, 120, [h.get("proc_cpu") for h in p_hist], (255, 0, 150), "CPU panel %",
+                   value=fmt(pi.get("proc_cpu"), "%"))
+
+        hint = text_surf(FONT_S, "[PLAY] -> Voir Jauges", (100,100,100))
+        s.blit(hint, (W//2 - hint.get_width()//2, 620))
+
+    rpi_t = pi.get("temp")
+    pygame.draw.rect(s, (30,30,35), (0, H-40, W, 40))
+    t_msg = text_surf(FONT_S, f"RPI Temp: {'--' if rpi_t is None else rpi_t}°C", (150,150,150))
+    s.blit(t_msg, (W//2 - t_msg.get_width()//2, H-30))
+
+    s.blit(icon_mode, (W//2 - 24, 720))
+
+def render_launcher_ui(s):
+    s.fill((25, 20, 35)) # Fond violet sombre
+    render_text_centered(s, "APP LAUNCHER", FONT_XL, (255, 0, 150), 60)
+    pygame.draw.line(s, (255,0,150), (40, 90), (W-40, 90), 3)
+    
+    with state_lock:
+        apps = state["launcher_apps"]
+        idx = state["launcher_idx"]
+        status = state["launcher_status"]
+        running = state["launcher_running"]
+        names = state["launcher_app_names"]
+    
+    start_y = 150
+    # Affiche 5 items autour de la sélection
+    for i in range(idx-2, idx+3):
+        if 0 <= i < len(apps):
+            is_sel = (i == idx)
+            lbl = apps[i]
+            y_pos = start_y + (i - (idx-2)) * 80
+            
+            col = (255, 255, 255) if is_sel else (100, 100, 100)
+            font = FONT_L if is_sel else FONT_M
+            
+            if is_sel:
+                r = pygame.Rect(40, y_pos - 25, W-80, 60)
+                pygame.draw.rect(s, (255, 0, 150), r, border_radius=10)
+                pygame.draw.rect(s, (50, 0, 50), r.inflate(-4,-4), border_radius=10)
+            
+            icon = app_icon(lbl) if lbl in names else None  # pas pour les macros ni "Chargement..."
+            if icon:
+                s.blit(icon, (52, y_pos + 5 - icon.get_height()//2))
+                render_text_marquee(s, lbl, font, col, y_pos - font.get_height()//2, W-180, x=52+icon.get_width()+12, scroll=is_sel)
+            else:
+                render_text_marquee(s, lbl, font, col, y_pos, W-100, scroll=is_sel)
+            if running.get(lbl, {}).get("running"):
+                pygame.draw.circle(s, (0, 220, 100), (W-58, y_pos + 5), 6)
+
+    if status:
+        render_text_marquee(s, status, FONT_S, (200, 200, 200), 620, W-60)
+    info = running.get(apps[idx]) if 0 <= idx < len(apps) else None
+    if info:
+        if info.get("state") == "starting": line, c = "Démarrage...", (255, 200, 0)
+        elif info.get("running"):
+            up = info.get("up_ms")
+            line, c = ("En cours" + (f" - prêt en {up/1000:.1f}s" if up is not None else "")), (0, 220, 100)
+        elif info.get("state") == "timeout": line, c = "Pas de fenêtre après 30s", (255, 80, 80)
+        else: line, c = "Arrêté", (120, 120, 120)
+        render_text_centered(s, line, FONT_S, c, 670)
+    
+    hint = text_surf(FONT_S, "[PLAY] Lancer App", (150,150,150))
+    s.blit(hint, (W//2 - hint.get_width()//2, 750))
+
+def render_menu_ui(s):
+    s.fill((30, 30, 35))
+    render_text_centered(s, "SYSTEM MENU", FONT_L, (255, 200, 0), 50)
+    pygame.draw.line(s, (255,200,0), (40, 80), (W-40, 80), 2)
+    
+    with state_lock:
+        items = state["menu_items"]
+        idx = state["menu_idx"]
+        msg = state["menu_msg"]
+    
+    y = 120
+    for i, item in enumerate(items):
+        is_sel = (i == idx)
+        col = (0, 0, 0) if is_sel else (200, 200, 200)
+        bg_col = (255, 200, 0) if is_sel else None
+        
+        txt = text_surf(FONT_M, f"  {item['lbl']}  ", col)
+        if bg_col:
+            rect = txt.get_rect(center=(W//2, y))
+            pygame.draw.rect(s, bg_col, rect.inflate(20, 10), border_radius=5)
+        render_text_centered(s, item['lbl'], FONT_M, col, y)
+        y += 60
+        
+    if msg:
+        pygame.draw.rect(s, (10,10,10), (20, 500, W-40, 200), border_radius=8)
+        pygame.draw.rect(s, (100,100,100), (20, 500, W-40, 200), 2, border_radius=8)
+        lines = msg.split('\n')
+        my = 520
+        for l in lines:
+            ts = text_surf(FONT_S, l, (200,255,200))
+            s.blit(ts, (40, my))
+            my += 25
+
+    inst = text_surf(FONT_S, "[PREV/NEXT] Naviguer  -  [PLAY] Valider", (100,100,100))
+    s.blit(inst, (W//2 - inst.get_width()//2, 760))
+
+def render_mixer_ui(s):
+    s.fill((20, 25, 30))
+    render_text_centered(s, "AUDIO MIXER", FONT_XL, (50, 150, 255), 60)
+    pygame.draw.line(s, (50,150,255), (40, 90), (W-40, 90), 3)
+        
+    with state_lock:
+        sessions = state.get("mixer_sessions", [])
+        idx = state.get("mixer_idx", 0)
+        
+    if not sessions:
+        render_text_centered(s, "Aucune application audio", FONT_M, (150,150,150), H//2)
+        return
+
+    start_y = 150
+    # Affiche 5 items autour de la sélection
+    for i in range(idx-2, idx+3):
+        if 0 <= i < len(sessions):
+            item = sessions[i]
+            is_sel = (i == idx)
+                
+            y_pos = start_y + (i - (idx-2)) * 100
+            col = (255, 255, 255) if is_sel else (100, 100, 100)
+                
+            if is_sel:
+                pygame.draw.rect(s, (40, 40, 50), (30, y_pos-10, W-60, 90), border_radius=10)
+                pygame.draw.rect(s, (50, 150, 255), (30, y_pos-10, W-60, 90), 2, border_radius=10)
+
+            render_text_marquee(s, item["name"], FONT_L, col, y_pos, W-310, x=50, scroll=is_sel)
+
+            vol = item["vol"]
+            bar_w = 200
+            pygame.draw.rect(s, (50,50,50), (W-250, y_pos+15, bar_w, 15), border_radius=5)
+            
+            c_bar = (50, 255, 50)
+            if vol > 80: c_bar = (255, 50, 50)
+            elif vol > 60: c_bar = (255, 200, 0)
+            
+            pygame.draw.rect(s, c_bar, (W-250, y_pos+15, int(bar_w * (vol/100)), 15), border_radius=5)
+            
+            v_txt = text_surf(FONT_M, f"{vol}%", col)
+            s.blit(v_txt, (W-250 + bar_w/2 - v_txt.get_width()/2, y_pos+40))
+
+    hint = text_surf(FONT_S, "[Molette] Volume  -  [Haut/Bas] Choisir", (150,150,150))
+    s.blit(hint, (W//2 - hint.get_width()//2, 750))
+
+def render_processes_ui(s):
+    s.fill((15, 25, 20))
+    render_text_centered(s, "PROCESSUS PC", FONT_XL, (0, 220, 120), 60)
+    pygame.draw.line(s, (0,220,120), (40, 90), (W-40, 90), 3)
+
+    with state_lock:
+        procs = state["proc_top"]
+        total = state["proc_total"]
+        by = state["proc_sort"]
+
+    if not procs:
+        render_text_centered(s, "Aucune donnée", FONT_M, (150,150,150), H//2)
+        return
+
+    head = text_surf(FONT_S, f"Top {len(procs)} / {total} - tri {'CPU' if by == 'cpu' else 'RAM'}", (150,150,150))
+    s.blit(head, (W//2 - head.get_width()//2, 105))
+    y = 140
+    for p in procs:
+        render_text_marquee(s, p["name"], FONT_S, (230,230,230), y, W-230, x=30, scroll=False)
+        # Barre CPU (0-100 % de la machine entière)
+        cpu = min(100.0, p["cpu"])
+        c_bar = (255, 50, 50) if cpu > 50 else (255, 200, 0) if cpu > 20 else (0, 220, 120)
+        pygame.draw.rect(s, (50,50,50), (W-190, y+4, 70, 12), border_radius=4)
+        pygame.draw.rect(s, c_bar, (W-190, y+4, int(70 * cpu / 100), 12), border_radius=4)
+        c_txt = text_surf(FONT_S, f"{p['cpu']:.0f}%", (255,255,255) if by == "cpu" else (150,150,150))
+        s.blit(c_txt, (W-115, y))
+        m_txt = text_surf(FONT_S, f"{p['mem_mb']} Mo", (255,255,255) if by == "mem" else (150,150,150))
+        s.blit(m_txt, (W-30 - m_txt.get_width(), y))
+        y += 58
+
+    hint = text_surf(FONT_S, "[PLAY] Tri CPU / RAM", (150,150,150))
+    s.blit(hint, (W//2 - hint.get_width()//2, 750))
+
+perf_overlay_cache = {"t": 0, "surf": None}
+def render_perf_overlay(s):
+    """Overlay semi-transparent, reconstruit 2x/s pour ne pas polluer le cache texte."""
+    now = time.time()
+    if perf_overlay_cache["surf"] is None or now - perf_overlay_cache["t"] > 0.5:
+        snap = perf_snapshot()
+        lines = [f"FPS {snap['fps']}   p95 {snap['p95_ms']} ms   RSS {snap['rss_mb']} MB"]
+        for k, v in snap["render_ms"].items():
+            lines.append(f"{k}: {v} ms")
+        for k, v in snap["pollers"].items():
+            age = f"{v['age_s']}s" if v["age_s"] is not None else "jamais"
+            lines.append(f"{k}: ok il y a {age}, {v['lat_ms']} ms, err {v['errors']}")
+        if snap["spotify_api"]:
+            api = snap["spotify_api"]
+            for k, v in api["endpoints"].items():
+                lines.append(f"API {k}: {v['count']} req, {v['avg_ms']} ms moy, 429 x{v['throttled']}")
+            if api["backoff_s"]: lines.append(f"API Spotify en backoff: {api['backoff_s']}s")
+        lines.append(f"Cache texte: {snap['text_cache_hit']}% hit ({len(text_cache)})")
+        if "first_frame_ms" in snap["boot_ms"]:
+            lines.append(f"Boot: 1re frame {snap['boot_ms']['first_frame_ms']} ms")
+        o = pygame.Surface((W, 12 + 22*len(lines)), pygame.SRCALPHA)
+        o.fill((0,0,0,180))
+        for i, l in enumerate(lines):
+            o.blit(FONT_S.render(l, True, (0,255,120)), (8, 6 + 22*i))
+        perf_overlay_cache.update(t=now, surf=o)
+    s.blit(perf_overlay_cache["surf"], (0,0))
+
+def render_alert_banner(s):
+    """Bannière d'alerte (pi_panel.raise_alert) en haut de l'écran, jusqu'à expiration."""
+    with state_lock: banner = state["alert_banner"]
+    if banner is None: return
+    msg, until = banner
+    if alert_clock() > until:
+        with state_lock:
+            if state["alert_banner"] is banner: state["alert_banner"] = None
+        return
+    lines = msg.split("\n")
+    h = 52 + 26*len(lines)
+    pygame.draw.rect(s, (150,20,20), (0, 0, W, h))
+    pygame.draw.rect(s, (255,80,80), (0, 0, W, h), 2)
+    render_text_centered(s, "ALERTE", FONT_M, (255,255,255), 22)
+    for i, l in enumerate(lines):
+        render_text_centered(s, l, FONT_S, (255,230,230), 52 + 26*i)
+
+RENDERERS = {
+    "SPOTIFY": render_spotify_ui,
+    "STATS": render_stats_ui,
+    "PROCESSES": render_processes_ui,
+    "MIXER": render_mixer_ui,
+    "LAUNCHER": render_launcher_ui,
+    "MENU": render_menu_ui,
+}